@@ -0,0 +1,61 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlmodel import SQLModel
+from typing import Optional, Literal
+
+from app.auth import verify_token
+from app.db import as_utc, StakeAction, TaoDividendQuery
+from app.services.export_service import export_service, EXPORT_FORMATS
+
+router = APIRouter()
+
+ExportFormat = Literal["ndjson", "csv"]
+
+def stream_export(
+    model: SQLModel,
+    format: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    netuid: Optional[int],
+) -> StreamingResponse:
+    """Streaming response with every row of model matching the filters"""
+    start, end = as_utc(start), as_utc(end)
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    statement = export_service.build_query(model, start, end, netuid)
+    filename = f"{model.__tablename__}.{format}"
+    return StreamingResponse(
+        export_service.stream(statement, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/exports/stake_actions")
+async def export_stake_actions(
+    format: ExportFormat = Query("ndjson", description="ndjson or csv"),
+    start: Optional[datetime] = Query(None, description="Only actions created at or after this time (UTC)"),
+    end: Optional[datetime] = Query(None, description="Only actions created before this time (UTC)"),
+    netuid: Optional[int] = Query(None, description="Only actions on this subnet"),
+    token: str = Depends(verify_token)
+):
+    """
+    Stream stake actions for offline reconciliation.
+    - Rows are ordered by creation time, then id
+    """
+    return stream_export(StakeAction, format, start, end, netuid)
+
+@router.get("/exports/tao_dividend_queries")
+async def export_tao_dividend_queries(
+    format: ExportFormat = Query("ndjson", description="ndjson or csv"),
+    start: Optional[datetime] = Query(None, description="Only queries made at or after this time (UTC)"),
+    end: Optional[datetime] = Query(None, description="Only queries made before this time (UTC)"),
+    netuid: Optional[int] = Query(None, description="Only queries on this subnet"),
+    token: str = Depends(verify_token)
+):
+    """
+    Stream the dividend query log.
+    - Only rows still within RETENTION_DAYS are available when retention is enabled
+    """
+    return stream_export(TaoDividendQuery, format, start, end, netuid)
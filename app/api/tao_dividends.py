@@ -1,17 +1,66 @@
+import logging
+import uuid
+from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
 from app.auth import verify_token
 from app.config import settings
-from app.db import get_db_session, TaoDividendQuery
-from app.models import TaoDividendResponse
+from app.db import get_db_session, as_utc, utcnow, TaoDividendQuery
+from app.metrics import track_stage
+from app.responses import FastJSONResponse
+from app.models import (
+    TaoDividendResponse,
+    SubnetDividendsResponse,
+    TaoDividendBatchRequest,
+    TaoDividendBatchResponse,
+    TaoDividendBatchResult,
+    DividendHistoryPoint,
+    DividendHistoryResponse,
+)
 from app.services.bittensor_service import bittensor_service
+from app.services.circuit_breaker import ChainUnavailableError
+from app.services.audit_service import audit_service
+from app.services.history_service import history_service
+from app.services.cache_service import cache
 from app.worker import celery_app
 
 
 router = APIRouter()
 
+async def schedule_trade(netuid: int, hotkey: str) -> Tuple[str, bool]:
+    """
+    Enqueue a sentiment/stake task unless one was scheduled for the same
+    netuid/hotkey within TRADE_DEBOUNCE_WINDOW seconds.
+    Returns the task id and whether an existing task was reused.
+    """
+    task_id = str(uuid.uuid4())
+    trade_key = cache.get_trade_key(netuid, hotkey)
+    claimed = False
+    if settings.TRADE_DEBOUNCE_WINDOW > 0:
+        try:
+            existing_task_id = await cache.claim(trade_key, task_id, settings.TRADE_DEBOUNCE_WINDOW)
+            if existing_task_id is not None:
+                return existing_task_id, True
+            claimed = True
+        except Exception as e:
+            logging.error(f"Error debouncing trade, scheduling without it: {e}")
+
+    try:
+        with track_stage("send_task"):
+            celery_app.send_task(
+                "process_sentiment_and_stake",
+                args=[netuid, hotkey],
+                task_id=task_id
+            )
+    except Exception:
+        # Let the next trigger schedule the trade
+        if claimed:
+            await cache.delete(trade_key)
+        raise
+    return task_id, False
+
 @router.get("/tao_dividends", response_model=TaoDividendResponse)
 async def get_tao_dividends(
     netuid: Optional[int] = Query(None, description="Subnet ID (optional)"),
@@ -36,25 +85,39 @@ async def get_tao_dividends(
         # Get data from blockchain (or cache)
         result = await bittensor_service.get_tao_dividends(netuid, hotkey)
 
-        # Store query in database
+        # Store query in database (buffered, off the request path)
         dividend_query = TaoDividendQuery(
             netuid=netuid,
             hotkey=hotkey,
             dividend=result["dividend"],
             from_cache=result["cached"]
         )
-        db.add(dividend_query)
-        await db.commit()
+        await audit_service.record(db, [dividend_query])
 
         # Handle trade parameter (trigger stake/unstake based on sentiment)
         stake_tx_triggered = False
+        stake_task_id = None
+        trade_status = None
         if trade:
             # Async task to analyze sentiment and stake/unstake
-            celery_app.send_task(
-                "process_sentiment_and_stake",
-                args=[netuid, hotkey]
-            )
+            stake_task_id, coalesced = await schedule_trade(netuid, hotkey)
             stake_tx_triggered = True
+            trade_status = "coalesced" if coalesced else "scheduled"
+
+        # Cached values were validated when first served; skip the response model for them
+        if settings.RESPONSE_FAST_PATH and result["cached"] and not trade:
+            return FastJSONResponse({
+                "netuid": result["netuid"],
+                "hotkey": result["hotkey"],
+                "dividend": float(result["dividend"]),
+                "cached": True,
+                "stake_tx_triggered": False,
+                "stake_task_id": None,
+                "trade_status": None,
+                "block": result.get("block"),
+                "stale": result.get("stale", False),
+                "timestamp": datetime.utcnow(),
+            })
 
         # Prepare response
         response = TaoDividendResponse(
@@ -62,11 +125,163 @@ async def get_tao_dividends(
             hotkey=result["hotkey"],
             dividend=result["dividend"],
             cached=result["cached"],
-            stake_tx_triggered=stake_tx_triggered
+            stake_tx_triggered=stake_tx_triggered,
+            stake_task_id=stake_task_id,
+            trade_status=trade_status,
+            block=result.get("block"),
+            stale=result.get("stale", False)
         )
 
         return response
+    except ChainUnavailableError as e:
+        raise HTTPException(status_code=503, detail=f"Chain unavailable: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving TAO dividends: {str(e)}")
 
 
+@router.get("/tao_dividends/subnet", response_model=SubnetDividendsResponse)
+async def get_subnet_dividends(
+    netuid: Optional[int] = Query(None, description="Subnet ID (optional)"),
+    token: str = Depends(verify_token)
+):
+    """
+    Get TAO dividends for every hotkey on a subnet.
+    - If netuid is omitted, returns data for the default netuid
+    - Data is read from one block-pinned snapshot of the subnet
+    """
+    try:
+        result = await bittensor_service.get_subnet_dividends(netuid)
+
+        if settings.RESPONSE_FAST_PATH and result["cached"]:
+            return FastJSONResponse({
+                "netuid": result["netuid"],
+                "block_hash": result["block_hash"],
+                "block": result.get("block"),
+                "dividends": result["dividends"],
+                "cached": True,
+                "timestamp": datetime.utcnow(),
+            })
+
+        return SubnetDividendsResponse(
+            netuid=result["netuid"],
+            block_hash=result["block_hash"],
+            block=result.get("block"),
+            dividends=result["dividends"],
+            cached=result["cached"]
+        )
+    except ChainUnavailableError as e:
+        raise HTTPException(status_code=503, detail=f"Chain unavailable: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving subnet TAO dividends: {str(e)}")
+
+
+@router.post("/tao_dividends/batch", response_model=TaoDividendBatchResponse)
+async def get_tao_dividends_batch(
+    request: TaoDividendBatchRequest,
+    token: str = Depends(verify_token),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """
+    Get TAO dividends for many subnet/hotkey pairs in one request.
+    - Omitted netuid/hotkey values fall back to the defaults
+    - Each item reports its own error; one failure does not fail the batch
+    """
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch size exceeds the maximum of {settings.BATCH_MAX_ITEMS} items"
+        )
+
+    try:
+        pairs = [
+            (
+                item.netuid if item.netuid is not None else settings.DEFAULT_NETUID,
+                item.hotkey if item.hotkey is not None else settings.DEFAULT_HOTKEY,
+            )
+            for item in request.items
+        ]
+
+        # Get data from blockchain (or cache)
+        results = await bittensor_service.get_tao_dividends_batch(pairs)
+
+        items = []
+        dividend_queries = []
+        for result in results:
+            if result.get("error"):
+                items.append(TaoDividendBatchResult(
+                    netuid=result["netuid"],
+                    hotkey=result["hotkey"],
+                    error=result["error"]
+                ))
+                continue
+
+            items.append(TaoDividendBatchResult(
+                netuid=result["netuid"],
+                hotkey=result["hotkey"],
+                dividend=result["dividend"],
+                cached=result["cached"],
+                block=result.get("block"),
+                stale=result.get("stale", False)
+            ))
+            dividend_queries.append(TaoDividendQuery(
+                netuid=result["netuid"],
+                hotkey=result["hotkey"],
+                dividend=result["dividend"],
+                from_cache=result["cached"]
+            ))
+
+        # Store all successful queries in one bulk insert
+        if dividend_queries:
+            await audit_service.record(db, dividend_queries)
+
+        return TaoDividendBatchResponse(
+            results=items,
+            succeeded=len(dividend_queries),
+            failed=len(items) - len(dividend_queries)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving TAO dividends: {str(e)}")
+
+
+@router.get("/tao_dividends/history", response_model=DividendHistoryResponse)
+async def get_tao_dividends_history(
+    netuid: Optional[int] = Query(None, description="Subnet ID (optional)"),
+    hotkey: Optional[str] = Query(None, description="Hotkey address (optional)"),
+    start: Optional[datetime] = Query(None, description="Start of the range, UTC (default: 7 days before end)"),
+    end: Optional[datetime] = Query(None, description="End of the range, UTC (default: now)"),
+    interval: Optional[int] = Query(None, ge=60, description="Bucket width in seconds (default: fit HISTORY_MAX_POINTS)"),
+    token: str = Depends(verify_token),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """
+    Get the sampled dividend history of a subnet/hotkey pair.
+    - If netuid or hotkey is omitted, the defaults are used
+    - Samples are downsampled in the database to min/max/avg per bucket
+    """
+    if netuid is None:
+        netuid = settings.DEFAULT_NETUID
+    if hotkey is None:
+        hotkey = settings.DEFAULT_HOTKEY
+    end = as_utc(end) or utcnow()
+    start = as_utc(start) or end - timedelta(days=7)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if interval is None:
+        interval = history_service.pick_interval(start, end)
+    elif (end - start).total_seconds() / interval > settings.HISTORY_MAX_POINTS * 10:
+        raise HTTPException(status_code=400, detail="interval is too small for this range")
+
+    try:
+        points = await history_service.get_history(db, netuid, hotkey, start, end, interval)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving TAO dividend history: {str(e)}")
+
+    return DividendHistoryResponse(
+        netuid=netuid,
+        hotkey=hotkey,
+        start=start,
+        end=end,
+        interval=interval,
+        points=[DividendHistoryPoint(**point) for point in points]
+    )
+
@@ -1,13 +1,85 @@
+import hashlib
+import hmac
+import logging
+from typing import Dict, NamedTuple, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.config import settings
+from app.services.cache_service import cache
 
 security = HTTPBearer()
 
+class ApiToken(NamedTuple):
+    """A configured API token, identified by a digest prefix so the secret never leaves the process"""
+    id: str
+    quota: int
+
+def _digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+class TokenRegistry:
+    """
+    API tokens loaded once from settings and kept only as SHA-256 digests.
+    Lookups compare digests in constant time against every configured token.
+    """
+
+    def __init__(self, tokens: Dict[str, int]):
+        self.tokens = [
+            (_digest(token), ApiToken(_digest(token).hex()[:16], quota))
+            for token, quota in tokens.items()
+        ]
+
+    @classmethod
+    def from_settings(cls) -> "TokenRegistry":
+        """Build the registry from API_TOKEN and API_TOKENS ("token[:quota],...")"""
+        tokens = {}
+        if settings.API_TOKEN:
+            tokens[settings.API_TOKEN] = settings.RATE_LIMIT_DEFAULT
+        for item in settings.API_TOKENS.split(","):
+            item = item.strip()
+            token, separator, quota = item.rpartition(":")
+            if not separator or not quota.isdigit():
+                token, quota = item, ""
+            if token:
+                tokens[token] = int(quota) if quota else settings.RATE_LIMIT_DEFAULT
+        return cls(tokens)
+
+    def lookup(self, token: str) -> Optional[ApiToken]:
+        """The configured token matching token, if any"""
+        digest = _digest(token)
+        match = None
+        # No early exit, so timing does not depend on which token matched
+        for candidate, api_token in self.tokens:
+            if hmac.compare_digest(candidate, digest):
+                match = api_token
+        return match
+
+token_registry = TokenRegistry.from_settings()
+
+async def enforce_rate_limit(api_token: ApiToken):
+    """Reject the request with 429 once the token has used up its quota"""
+    if api_token.quota <= 0:
+        return
+    try:
+        allowed, remaining, retry_after = await cache.rate_limit(
+            cache.get_rate_limit_key(api_token.id), api_token.quota, settings.RATE_LIMIT_WINDOW
+        )
+    except Exception as e:
+        # Fail open: an unavailable Redis should not take the API down with it
+        logging.error(f"Error checking rate limit: {e}")
+        return
+    if not allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded.",
+            headers={"Retry-After": str(max(int(retry_after + 0.999), 1))}
+        )
+
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """
-    Simple token verification for API authentication.
-    In a production environment, this would be more robust.
+    Token verification for API authentication.
+    Checks the token against the configured set and applies its rate limit
+    before the request reaches the cache, chain or database.
     """
     if credentials.scheme.lower() != "bearer":
         raise HTTPException(
@@ -15,12 +87,12 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
             detail="Invalid authentication scheme."
         )
     
-    if credentials.credentials != settings.API_TOKEN:
+    api_token = token_registry.lookup(credentials.credentials)
+    if api_token is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="Invalid token."
         )
     
+    await enforce_rate_limit(api_token)
     return credentials.credentials
-
-
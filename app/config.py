@@ -7,6 +7,7 @@ load_dotenv()
 class Settings(BaseSettings):
     # API Settings
     API_TOKEN: str = os.getenv("API_TOKEN", "default_token_for_development")
+    API_TOKENS: str = os.getenv("API_TOKENS", "")  # Extra tokens: "token[:quota],..."
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     
@@ -15,9 +16,103 @@ class Settings(BaseSettings):
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
     REDIS_PASSWORD: str = os.getenv("REDIS_PASSWORD", "")
     REDIS_TTL: int = int(os.getenv("REDIS_TTL", "120"))  # Cache TTL in seconds
+    REDIS_STALE_TTL: int = int(os.getenv("REDIS_STALE_TTL", "0"))  # Extra seconds a stale entry is served while refreshing
+    
+    # Rate Limit Settings
+    RATE_LIMIT_DEFAULT: int = int(os.getenv("RATE_LIMIT_DEFAULT", "0"))  # Requests per window per token, 0 disables
+    RATE_LIMIT_WINDOW: int = int(os.getenv("RATE_LIMIT_WINDOW", "60"))  # Seconds for a full quota to refill
+    
+    # In-process L1 Cache Settings
+    CACHE_L1_ENABLED: bool = os.getenv("CACHE_L1_ENABLED", "false").lower() == "true"
+    CACHE_L1_MAX_SIZE: int = int(os.getenv("CACHE_L1_MAX_SIZE", "1024"))  # Max entries per worker
+    CACHE_L1_TTL: int = int(os.getenv("CACHE_L1_TTL", os.getenv("REDIS_TTL", "120")))  # Capped by the Redis TTL
+    
+    # Background Refresh Settings
+    REFRESH_TOP_N: int = int(os.getenv("REFRESH_TOP_N", "0"))  # Most-requested pairs kept warm, 0 disables
+    REFRESH_INTERVAL: int = int(os.getenv("REFRESH_INTERVAL", "30"))  # Seconds between refresh passes
+    
+    # Subtensor Connection Pool Settings
+    SUBTENSOR_POOL_SIZE: int = int(os.getenv("SUBTENSOR_POOL_SIZE", "1"))  # Read connections; 1 keeps a single connection
+    SUBTENSOR_ENDPOINTS: str = os.getenv("SUBTENSOR_ENDPOINTS", "")  # Comma-separated networks/URLs; empty uses BITTENSOR_NETWORK
+    SUBTENSOR_PROBE_INTERVAL: float = float(os.getenv("SUBTENSOR_PROBE_INTERVAL", "15"))  # Seconds between health probes
+    
+    # Chain Circuit Breaker Settings
+    CHAIN_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("CHAIN_BREAKER_FAILURE_THRESHOLD", "5"))  # Consecutive failures before opening
+    CHAIN_BREAKER_RECOVERY_TIMEOUT: float = float(os.getenv("CHAIN_BREAKER_RECOVERY_TIMEOUT", "30"))  # Seconds open before a probe
+    CHAIN_TIMEOUT_MIN: float = float(os.getenv("CHAIN_TIMEOUT_MIN", "1"))  # Seconds
+    CHAIN_TIMEOUT_MAX: float = float(os.getenv("CHAIN_TIMEOUT_MAX", "10"))  # Seconds; also used until latencies are known
+    CHAIN_TIMEOUT_MULTIPLIER: float = float(os.getenv("CHAIN_TIMEOUT_MULTIPLIER", "3"))  # Timeout = multiplier x p99 latency
+    CHAIN_TIMEOUT_WINDOW: int = int(os.getenv("CHAIN_TIMEOUT_WINDOW", "200"))  # Recent latencies tracked
+    CHAIN_FALLBACK: str = os.getenv("CHAIN_FALLBACK", "last_known_good")  # last_known_good, mock or error
+    CHAIN_LAST_GOOD_TTL: int = int(os.getenv("CHAIN_LAST_GOOD_TTL", "86400"))  # Seconds a last known good value is kept
+    
+    # Block-aware Cache Settings
+    CACHE_BLOCK_AWARE: bool = os.getenv("CACHE_BLOCK_AWARE", "false").lower() == "true"
+    BLOCK_POLL_INTERVAL: float = float(os.getenv("BLOCK_POLL_INTERVAL", "2.0"))  # Seconds between chain head polls
+    DIVIDEND_UPDATE_INTERVAL_BLOCKS: int = int(os.getenv("DIVIDEND_UPDATE_INTERVAL_BLOCKS", "1"))  # Blocks per dividend update
+    
+    # Batch Settings
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "500"))  # Max pairs per batch request
+    BATCH_MAX_CONCURRENCY: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))  # Concurrent chain queries per batch
+    
+    # Request Coalescing Settings
+    SINGLE_FLIGHT_DISTRIBUTED: bool = os.getenv("SINGLE_FLIGHT_DISTRIBUTED", "false").lower() == "true"
+    SINGLE_FLIGHT_LOCK_TTL: int = int(os.getenv("SINGLE_FLIGHT_LOCK_TTL", "10"))  # Lock expiry in seconds
+    SINGLE_FLIGHT_WAIT_TIMEOUT: float = float(os.getenv("SINGLE_FLIGHT_WAIT_TIMEOUT", "5.0"))  # Max wait for peer in seconds
     
     # Database Settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "postgresql+asyncpg://user:password@db:5432/bittensor_api")
+    DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() == "true"  # Log every SQL statement
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))  # Persistent connections per worker
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))  # Extra connections under load
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # Max seconds to wait for a connection
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Reconnect after this many seconds
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))  # asyncpg; 0 behind pgbouncer
+    
+    # Trade Settings
+    TRADE_DEBOUNCE_WINDOW: int = int(os.getenv("TRADE_DEBOUNCE_WINDOW", "60"))  # Seconds; 0 disables debouncing
+    STAKE_BATCHING: bool = os.getenv("STAKE_BATCHING", "false").lower() == "true"  # Net and batch stake actions
+    STAKE_BATCH_WINDOW: float = float(os.getenv("STAKE_BATCH_WINDOW", "30"))  # Seconds between batch submissions
+    STAKE_CLAIM_TIMEOUT: float = float(os.getenv("STAKE_CLAIM_TIMEOUT", "600"))  # Seconds before a processing action is flagged unreconciled
+    SWEEP_ENABLED: bool = os.getenv("SWEEP_ENABLED", "false").lower() == "true"  # Periodic sentiment/stake sweep
+    SWEEP_INTERVAL: float = float(os.getenv("SWEEP_INTERVAL", "300"))  # Seconds between sweeps
+    SWEEP_TARGETS: str = os.getenv("SWEEP_TARGETS", "")  # "netuid:hotkey,..."; empty uses DEFAULT_NETUID/DEFAULT_HOTKEY
+    SWEEP_CHUNK_SIZE: int = int(os.getenv("SWEEP_CHUNK_SIZE", "100"))  # Stake actions inserted per transaction
+    
+    # Metrics Settings
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"  # Prometheus /metrics endpoint
+    METRICS_CELERY_QUEUES: str = os.getenv("METRICS_CELERY_QUEUES", "celery,bittensor_queue")  # Queues reported by celery_queue_depth
+    
+    # Dividend History Settings
+    HISTORY_ENABLED: bool = os.getenv("HISTORY_ENABLED", "false").lower() == "true"  # Periodic dividend sampling
+    HISTORY_INTERVAL: float = float(os.getenv("HISTORY_INTERVAL", "300"))  # Seconds between samples
+    HISTORY_NETUIDS: str = os.getenv("HISTORY_NETUIDS", "")  # Comma-separated subnets; empty uses DEFAULT_NETUID
+    HISTORY_MAX_POINTS: int = int(os.getenv("HISTORY_MAX_POINTS", "500"))  # Buckets returned when no interval is given
+    
+    # Audit Retention Settings
+    RETENTION_ENABLED: bool = os.getenv("RETENTION_ENABLED", "false").lower() == "true"  # Periodic audit rollup and pruning
+    RETENTION_INTERVAL: float = float(os.getenv("RETENTION_INTERVAL", "3600"))  # Seconds between retention runs
+    RETENTION_DAYS: float = float(os.getenv("RETENTION_DAYS", "7"))  # Days raw audit rows are kept
+    RETENTION_BATCH_SIZE: int = int(os.getenv("RETENTION_BATCH_SIZE", "5000"))  # Rows deleted per transaction
+    RETENTION_MAX_BATCHES: int = int(os.getenv("RETENTION_MAX_BATCHES", "200"))  # Delete batches per run
+    
+    # Serialization Settings
+    CACHE_SERIALIZER: str = os.getenv("CACHE_SERIALIZER", "orjson")  # json, orjson or msgpack
+    RESPONSE_FAST_PATH: bool = os.getenv("RESPONSE_FAST_PATH", "true").lower() == "true"  # Serve cache hits without re-validating them
+    
+    # Export Settings
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))  # Rows fetched per cursor round trip when exporting
+    
+    # Celery Worker Settings
+    WORKER_PERSISTENT_LOOP: bool = os.getenv("WORKER_PERSISTENT_LOOP", "true").lower() == "true"  # One event loop per process
+    
+    # Audit Write-behind Settings
+    AUDIT_WRITE_BEHIND: bool = os.getenv("AUDIT_WRITE_BEHIND", "true").lower() == "true"
+    AUDIT_QUEUE_MAX_SIZE: int = int(os.getenv("AUDIT_QUEUE_MAX_SIZE", "10000"))  # Max buffered rows
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", "500"))  # Rows per INSERT
+    AUDIT_FLUSH_INTERVAL: float = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))  # Max seconds a row waits
+    AUDIT_ENQUEUE_TIMEOUT: float = float(os.getenv("AUDIT_ENQUEUE_TIMEOUT", "0.1"))  # Max wait on a full queue
     
     # Bittensor Settings
     BITTENSOR_NETWORK: str = os.getenv("BITTENSOR_NETWORK", "testnet")
@@ -28,6 +123,22 @@ class Settings(BaseSettings):
     # External API Keys
     DATURA_API_KEY: str = os.getenv("DATURA_API_KEY", "dt_$q4qWC2K5mwT5BnNh0ZNF9MfeMDJenJ-pddsi_rE1FZ8")
     CHUTES_API_KEY: str = os.getenv("CHUTES_API_KEY", "cpk_9402c24cc755440b94f4b0931ebaa272.7a748b60e4a557f6957af9ce25778f49.8huXjHVlrSttzKuuY0yU2Fy4qEskr5J0")
+    DATURA_BASE_URL: str = os.getenv("DATURA_BASE_URL", "https://api.datura.ai")
+    CHUTES_BASE_URL: str = os.getenv("CHUTES_BASE_URL", "https://api.chutes.ai")
+    
+    # Sentiment Cache Settings
+    SENTIMENT_CACHE_TTL: int = int(os.getenv("SENTIMENT_CACHE_TTL", "300"))  # Per-netuid result TTL in seconds
+    SENTIMENT_CACHE_TTL_OVERRIDES: str = os.getenv("SENTIMENT_CACHE_TTL_OVERRIDES", "")  # e.g. "18:60,19:600"
+    SENTIMENT_LLM_CACHE_TTL: int = int(os.getenv("SENTIMENT_LLM_CACHE_TTL", "3600"))  # TTL of LLM scores by tweet set
+    SENTIMENT_BULK_MAX_SUBNETS: int = int(os.getenv("SENTIMENT_BULK_MAX_SUBNETS", "16"))  # Subnets per bulk LLM call
+    SENTIMENT_BULK_TOKENS_PER_SUBNET: int = int(os.getenv("SENTIMENT_BULK_TOKENS_PER_SUBNET", "1000"))  # Approx prompt tokens per subnet
+    SENTIMENT_SEARCH_CONCURRENCY: int = int(os.getenv("SENTIMENT_SEARCH_CONCURRENCY", "4"))  # Concurrent tweet searches
+    
+    # Outbound HTTP Client Settings
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))  # Per upstream
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))  # Per upstream
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))  # Idle seconds before closing
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"  # Used when h2 is installed
     
     class Config:
         env_file = ".env"
@@ -1,19 +1,121 @@
 import logging
+import os
+import time
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Index, BigInteger
 from sqlmodel import SQLModel, Field, Column, DateTime
-from datetime import datetime
+from datetime import datetime, timezone
 from app.config import settings
 import uuid
-from typing import Optional
+from typing import Optional, Dict, Any
+
+class PoolMetrics:
+    """Counters for connection pool checkouts and connection churn"""
+    
+    def __init__(self):
+        self.checkouts = 0
+        self.checkins = 0
+        self.checkout_waits = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+    
+    def record_checkout_wait(self, wait: float):
+        self.checkout_waits += 1
+        self.checkout_wait_total += wait
+        self.checkout_wait_max = max(self.checkout_wait_max, wait)
+
+pool_metrics = PoolMetrics()
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that times how long each checkout waits for a connection.
+    Pool events only fire once a connection is handed out, so the wait is
+    timed around the public connect() instead.
+    """
+    
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            pool_metrics.record_checkout_wait(time.perf_counter() - start)
+
+def _engine_options() -> Dict[str, Any]:
+    """Engine keyword arguments built from the pool settings"""
+    options = {
+        "echo": settings.DB_ECHO,
+        "future": True,
+    }
+    # SQLite (used in tests and benchmarks) manages its own connections
+    if settings.DATABASE_URL.startswith("sqlite"):
+        return options
+    
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if "+asyncpg" in settings.DATABASE_URL:
+        options["connect_args"] = {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    return options
 
 # Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL, 
-    echo=True if settings.ENVIRONMENT == "development" else False,
-    future=True,
-)
+engine = create_async_engine(settings.DATABASE_URL, **_engine_options())
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_metrics.checkouts += 1
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    pool_metrics.checkins += 1
+
+@event.listens_for(engine.sync_engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    pool_metrics.connects += 1
+
+@event.listens_for(engine.sync_engine, "close")
+def _on_close(dbapi_connection, connection_record):
+    pool_metrics.closes += 1
+
+@event.listens_for(engine.sync_engine, "invalidate")
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    pool_metrics.invalidations += 1
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Pool occupancy, checkout wait time and connection churn"""
+    pool = engine.pool
+    stats = {
+        "checkouts": pool_metrics.checkouts,
+        "checkins": pool_metrics.checkins,
+        "checkout_wait_avg_ms": (
+            pool_metrics.checkout_wait_total / pool_metrics.checkout_waits * 1000
+            if pool_metrics.checkout_waits else 0.0
+        ),
+        "checkout_wait_max_ms": pool_metrics.checkout_wait_max * 1000,
+        "connects": pool_metrics.connects,
+        "closes": pool_metrics.closes,
+        "invalidations": pool_metrics.invalidations,
+    }
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        capacity = pool.size() + max(settings.DB_MAX_OVERFLOW, 0)
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            saturation=pool.checkedout() / capacity if capacity else 0.0,
+        )
+    return stats
 
 # Create async session
 async_session = sessionmaker(
@@ -25,29 +127,100 @@ async_session = sessionmaker(
 # Base model
 Base = declarative_base()
 
+def uuid7() -> uuid.UUID:
+    """
+    Time-ordered UUID (RFC 9562 version 7): a 48-bit Unix millisecond timestamp
+    followed by random bits, so new keys land at the right edge of the index.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = value & ~(0xF << 76) | 0x7 << 76  # version 7
+    value = value & ~(0x3 << 62) | 0x2 << 62  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+def utcnow() -> datetime:
+    """Timezone-aware current UTC time, for timestamp columns"""
+    return datetime.now(timezone.utc)
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """value in UTC; naive timestamps (query parameters, SQLite reads) are taken as UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
 # Define SQLModel models
 class StakeAction(SQLModel, table=True):
     __tablename__ = "stake_actions"
+    __table_args__ = (
+        # The executor claims pending actions oldest first
+        Index("ix_stake_actions_status_created_at", "status", "created_at"),
+        # Exports stream in (created_at, id) order straight off this index, without a sort
+        Index("ix_stake_actions_created_at_id", "created_at", "id"),
+    )
     
-    id: Optional[str] = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    id: Optional[uuid.UUID] = Field(default_factory=uuid7, primary_key=True)
     action_type: str  # stake or unstake
     netuid: int
     hotkey: str
     amount: float
     sentiment_score: float
-    created_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime(timezone=True)))
+    created_at: datetime = Field(default_factory=utcnow, sa_column=Column(DateTime(timezone=True)))
     transaction_hash: Optional[str] = None
-    status: str = "pending"  # pending, success, failed
+    status: str = "pending"  # pending, processing, success, failed, netted, unreconciled
+    # When the action moved to processing; stale claims are flagged by the executor
+    claimed_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True)))
 
 class TaoDividendQuery(SQLModel, table=True):
     __tablename__ = "tao_dividend_queries"
+    __table_args__ = (
+        Index("ix_tao_dividend_queries_netuid_hotkey_created_at", "netuid", "hotkey", "created_at"),
+        # Rollup and retention scan by time alone; rows arrive in time order, so BRIN suffices
+        Index("ix_tao_dividend_queries_created_at_brin", "created_at", postgresql_using="brin"),
+        # Exports stream in (created_at, id) order straight off this index, without a sort
+        Index("ix_tao_dividend_queries_created_at_id", "created_at", "id"),
+    )
     
-    id: Optional[str] = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    id: Optional[uuid.UUID] = Field(default_factory=uuid7, primary_key=True)
     netuid: int
     hotkey: str
     dividend: float
     from_cache: bool = False
-    created_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime(timezone=True)))
+    created_at: datetime = Field(default_factory=utcnow, sa_column=Column(DateTime(timezone=True)))
+
+class TaoDividendQueryRollup(SQLModel, table=True):
+    """
+    Hourly aggregates of tao_dividend_queries, written by the retention job.
+    They outlive the raw rows, which are deleted after RETENTION_DAYS.
+    """
+    __tablename__ = "tao_dividend_query_rollups"
+    
+    hour: datetime = Field(sa_column=Column(DateTime(timezone=True), primary_key=True))
+    netuid: int = Field(primary_key=True)
+    hotkey: str = Field(primary_key=True)
+    from_cache: bool = Field(primary_key=True)
+    queries: int
+    min_dividend: float
+    max_dividend: float
+    avg_dividend: float
+
+class TaoDividendHistory(SQLModel, table=True):
+    """
+    Dividend samples taken by the history collector.
+    The primary key (netuid, hotkey, sampled_at) doubles as the index for range
+    queries on one pair; rows arrive in time order, so a BRIN index on
+    sampled_at stays tiny while still pruning old blocks of the table in Postgres.
+    """
+    __tablename__ = "tao_dividend_history"
+    __table_args__ = (
+        Index("ix_tao_dividend_history_sampled_at_brin", "sampled_at", postgresql_using="brin"),
+    )
+    
+    netuid: int = Field(primary_key=True)
+    hotkey: str = Field(primary_key=True)
+    sampled_at: datetime = Field(sa_column=Column(DateTime(timezone=True), primary_key=True))
+    dividend: float
+    block: Optional[int] = Field(default=None, sa_column=Column(BigInteger))
 
 # Create tables
 async def init_db():
@@ -1,13 +1,20 @@
 import logging
 import os
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.config import settings
 from app.api.tao_dividends import router as tao_router
-from app.db import init_db
+from app.api.exports import router as exports_router
+from app.auth import verify_token
+from app.db import init_db, get_pool_stats
+from app.metrics import MetricsMiddleware, metrics_enabled, render_metrics, CONTENT_TYPE_LATEST
+from app.responses import FastJSONResponse
 from app.services.cache_service import cache
+from app.services.bittensor_service import bittensor_service
+from app.services.audit_service import audit_service
+from app.services.sentiment_service import sentiment_service
 
 # Configure logging
 logging.basicConfig(
@@ -27,14 +34,25 @@ async def lifespan(app: FastAPI):
         logging.info("Initializing database")
         await init_db()
 
+        if settings.AUDIT_WRITE_BEHIND:
+            audit_service.start()
+
     # Initialize Redis
     logging.info("Initializing Redis cache")
     await cache.init_redis()
+    await cache.start_invalidation_listener()
+    if settings.CACHE_BLOCK_AWARE:
+        bittensor_service.block_tracker.start()
+    bittensor_service.start_refresher()
 
     yield
 
     # Cleanup
     logging.info("Shutting down...")
+    await audit_service.stop()
+    await bittensor_service.close()
+    await sentiment_service.close()
+    await cache.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -53,11 +71,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record request latency per route (outermost, so it covers CORS handling too)
+app.add_middleware(MetricsMiddleware)
+
 # Include API routes
 app.include_router(tao_router, prefix="/api/v1", tags=["tao"])
+app.include_router(exports_router, prefix="/api/v1", tags=["exports"])
+
+# Routes with a response_model are serialized by pydantic-core straight to bytes,
+# which a custom default response class would turn off; the plain-dict routes
+# below use orjson instead of the stdlib encoder.
 
 # Root endpoint
-@app.get("/")
+@app.get("/", response_class=FastJSONResponse)
 async def root():
     return {
         "message": "Bittensor TAO Dividends API",
@@ -65,10 +91,29 @@ async def root():
     }
 
 # Health check endpoint
-@app.get("/health")
+@app.get("/health", response_class=FastJSONResponse)
 async def health():
     return {"status": "healthy"}
 
+# Operational stats for this worker process
+@app.get("/stats", response_class=FastJSONResponse)
+async def stats(token: str = Depends(verify_token)):
+    return {
+        "cache": cache.get_stats(),
+        "coalescing": bittensor_service.get_coalescing_stats(),
+        "chain_breaker": bittensor_service.get_breaker_stats(),
+        "subtensor_pool": bittensor_service.get_pool_stats(),
+        "audit": audit_service.get_stats(),
+        "db_pool": get_pool_stats(),
+    }
+
+# Prometheus metrics for this worker process
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not metrics_enabled():
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(content=await render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,183 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+try:
+    from prometheus_client import CollectorRegistry, Histogram, Gauge, CONTENT_TYPE_LATEST, generate_latest
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+    logging.warning("prometheus_client not available. Metrics are disabled.")
+
+from app.config import settings
+
+# Buckets sized for a cache-served API: sub-millisecond Redis hits up to multi-second chain queries
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class StatsCollector:
+    """
+    Reads counters the services already keep at scrape time, so cache hits and
+    in-flight chain queries cost nothing extra on the request path.
+    """
+
+    def collect(self):
+        # Imported here so the metrics module does not pull in the services at import time
+        from app.services.cache_service import cache
+        from app.services.bittensor_service import bittensor_service
+
+        stats = cache.get_stats()
+        hits = CounterMetricFamily("cache_hits", "Cache hits per tier", labels=["tier"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses per tier", labels=["tier"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Share of lookups answered by any cache tier since start")
+        for tier in ("l1", "l2"):
+            hits.add_metric([tier], stats[f"{tier}_hits"])
+            misses.add_metric([tier], stats[f"{tier}_misses"])
+        # L1 misses fall through to L2, so L2 hits and misses cover every lookup when L1 is off
+        lookups = stats["l1_hits"] + stats["l2_hits"] + stats["l2_misses"]
+        ratio.add_metric([], (stats["l1_hits"] + stats["l2_hits"]) / lookups if lookups else 0.0)
+        yield hits
+        yield misses
+        yield ratio
+
+        coalescing = bittensor_service.get_coalescing_stats()
+        yield GaugeMetricFamily("chain_queries_in_flight", "Chain queries currently running", value=coalescing["in_flight"])
+        coalesced = CounterMetricFamily("chain_queries_coalesced", "Callers served by another caller's chain query", labels=["scope"])
+        coalesced.add_metric(["local"], coalescing["coalesced_local"])
+        coalesced.add_metric(["remote"], coalescing["coalesced_remote"])
+        yield coalesced
+
+        breaker = bittensor_service.get_breaker_stats()
+        state = GaugeMetricFamily("chain_breaker_state", "Chain circuit breaker state (1 for the current state)", labels=["state"])
+        for name in ("closed", "half_open", "open"):
+            state.add_metric([name], 1.0 if breaker["state"] == name else 0.0)
+        yield state
+        yield GaugeMetricFamily("chain_timeout_seconds", "Current adaptive chain read timeout", value=breaker["timeout"])
+        calls = CounterMetricFamily("chain_breaker_calls", "Chain reads by outcome", labels=["outcome"])
+        for outcome in ("successes", "failures", "timeouts", "rejected"):
+            calls.add_metric([outcome], breaker[outcome])
+        yield calls
+
+        connections = bittensor_service.get_pool_stats()
+        if connections:
+            labels = ["connection", "endpoint"]
+            outstanding = GaugeMetricFamily("subtensor_pool_outstanding", "Requests in flight per pooled connection", labels=labels)
+            healthy = GaugeMetricFamily("subtensor_pool_healthy", "1 if the pooled connection is healthy", labels=labels)
+            latency = GaugeMetricFamily("subtensor_pool_latency_seconds", "Recent average latency per pooled connection", labels=labels)
+            requests = CounterMetricFamily("subtensor_pool_requests", "Requests per pooled connection", labels=labels)
+            errors = CounterMetricFamily("subtensor_pool_errors", "Failed requests per pooled connection", labels=labels)
+            for index, conn in enumerate(connections):
+                label_values = [str(index), conn["endpoint"]]
+                outstanding.add_metric(label_values, conn["outstanding"])
+                healthy.add_metric(label_values, 1.0 if conn["healthy"] else 0.0)
+                latency.add_metric(label_values, (conn["latency_ms"] or 0.0) / 1000)
+                requests.add_metric(label_values, conn["requests"])
+                errors.add_metric(label_values, conn["errors"])
+            yield from (outstanding, healthy, latency, requests, errors)
+
+if PROMETHEUS_AVAILABLE:
+    registry = CollectorRegistry()
+    REQUEST_LATENCY = Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route and status",
+        ["method", "route", "status"],
+        buckets=LATENCY_BUCKETS,
+        registry=registry,
+    )
+    STAGE_LATENCY = Histogram(
+        "stage_duration_seconds",
+        "Latency of hot-path stages (cache_get, chain_query, db_commit, send_task)",
+        ["stage"],
+        buckets=LATENCY_BUCKETS,
+        registry=registry,
+    )
+    CELERY_QUEUE_DEPTH = Gauge(
+        "celery_queue_depth",
+        "Messages waiting in each Celery queue",
+        ["queue"],
+        registry=registry,
+    )
+    registry.register(StatsCollector())
+
+def metrics_enabled() -> bool:
+    return PROMETHEUS_AVAILABLE and settings.METRICS_ENABLED
+
+# Histogram children per stage, so timing a stage skips the labels() lookup
+_stage_timers: Dict[str, object] = {}
+
+@contextmanager
+def track_stage(stage: str):
+    """Time a block of code into the stage_duration_seconds histogram"""
+    if not metrics_enabled():
+        yield
+        return
+    timer = _stage_timers.get(stage)
+    if timer is None:
+        timer = _stage_timers[stage] = STAGE_LATENCY.labels(stage)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.observe(time.perf_counter() - started)
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template and status.
+    Routes are labelled by their path template (e.g. /api/v1/tao_dividends), never
+    by raw URL, to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_LATENCY.labels(
+                scope["method"],
+                self._route_path(scope),
+                str(status_code),
+            ).observe(time.perf_counter() - started)
+
+    def _route_path(self, scope) -> str:
+        """Path template of the route that handled the request"""
+        route = scope.get("route")
+        if route is None:
+            return "unmatched"
+        # Static routes are labelled by the request path, which already carries any router prefix
+        if not getattr(route, "param_convertors", None):
+            return scope["path"]
+        return getattr(route, "path", "unmatched")
+
+async def update_queue_depth():
+    """Read Celery queue lengths from the broker"""
+    from app.services.cache_service import cache
+
+    if cache.redis is None:
+        return
+    for queue in filter(None, (name.strip() for name in settings.METRICS_CELERY_QUEUES.split(","))):
+        try:
+            CELERY_QUEUE_DEPTH.labels(queue).set(await cache.redis.llen(queue))
+        except Exception as e:
+            logging.error(f"Error reading Celery queue depth for {queue}: {e}")
+
+async def render_metrics() -> bytes:
+    """Current metrics in the Prometheus text format"""
+    await update_queue_depth()
+    return generate_latest(registry)
@@ -8,8 +8,57 @@ class TaoDividendResponse(BaseModel):
     dividend: float
     cached: bool
     stake_tx_triggered: Optional[bool] = False
+    stake_task_id: Optional[str] = None
+    trade_status: Optional[str] = None  # scheduled or coalesced
+    block: Optional[int] = None
+    stale: bool = False  # Last known good value served while the chain is unavailable
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
+class SubnetDividendsResponse(BaseModel):
+    netuid: int
+    block_hash: Optional[str] = None
+    block: Optional[int] = None
+    dividends: Dict[str, float]
+    cached: bool
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+class TaoDividendBatchItem(BaseModel):
+    netuid: Optional[int] = None
+    hotkey: Optional[str] = None
+
+class TaoDividendBatchRequest(BaseModel):
+    items: List[TaoDividendBatchItem]
+
+class TaoDividendBatchResult(BaseModel):
+    netuid: int
+    hotkey: str
+    dividend: Optional[float] = None
+    cached: bool = False
+    block: Optional[int] = None
+    stale: bool = False
+    error: Optional[str] = None
+
+class TaoDividendBatchResponse(BaseModel):
+    results: List[TaoDividendBatchResult]
+    succeeded: int
+    failed: int
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+class DividendHistoryPoint(BaseModel):
+    timestamp: datetime  # Start of the bucket
+    min: float
+    max: float
+    avg: float
+    samples: int
+
+class DividendHistoryResponse(BaseModel):
+    netuid: int
+    hotkey: str
+    start: datetime
+    end: datetime
+    interval: int  # Bucket width in seconds
+    points: List[DividendHistoryPoint]
+
 class SentimentAnalysisResult(BaseModel):
     score: float  # -100 to 100
     tweets_analyzed: int
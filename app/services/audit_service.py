@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from typing import Optional, Dict, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel
+
+from app.config import settings
+from app.db import async_session
+from app.metrics import track_stage
+
+class AuditService:
+    """
+    Write-behind buffer for audit rows such as TaoDividendQuery.
+    Rows are queued in memory and inserted in batches by a background task,
+    so request handlers do not wait on a database round trip.
+    """
+
+    def __init__(self):
+        self.batch_size = settings.AUDIT_BATCH_SIZE
+        self.flush_interval = settings.AUDIT_FLUSH_INTERVAL
+        self.enqueue_timeout = settings.AUDIT_ENQUEUE_TIMEOUT
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            'enqueued': 0,
+            'dropped': 0,
+            'flushed': 0,
+            'failed': 0,
+            'batches': 0,
+        }
+
+    def start(self):
+        """Start the background flusher"""
+        if self._task is None:
+            self.queue = asyncio.Queue(maxsize=settings.AUDIT_QUEUE_MAX_SIZE)
+            self._task = asyncio.create_task(self._run())
+            logging.info("Audit write-behind started")
+
+    async def stop(self):
+        """Flush everything queued so far and stop the background flusher"""
+        if self._task is None:
+            return
+        # New rows go straight to the database from here on
+        task, self._task = self._task, None
+        await self.queue.put(None)
+        await task
+        logging.info(f"Audit write-behind stopped: {self.stats}")
+
+    async def record(self, db: AsyncSession, rows: List[SQLModel]):
+        """
+        Queue rows for a batched insert.
+        Falls back to writing through db when the flusher is not running.
+        When the queue stays full for enqueue_timeout, remaining rows are dropped.
+        """
+        if self._task is None:
+            db.add_all(rows)
+            with track_stage("db_commit"):
+                await db.commit()
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.enqueue_timeout
+        dropped = 0
+        for row in rows:
+            try:
+                self.queue.put_nowait(row)
+            except asyncio.QueueFull:
+                try:
+                    await asyncio.wait_for(self.queue.put(row), max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    dropped += 1
+                    continue
+            self.stats['enqueued'] += 1
+
+        if dropped:
+            self.stats['dropped'] += dropped
+            logging.warning(f"Audit queue full, dropped {dropped} rows")
+
+    async def _run(self):
+        """Collect rows into batches by size or age and flush them until stopped"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            row = await self.queue.get()
+            if row is None:
+                break
+            batch = [row]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+            await self._flush(batch)
+
+        # Drain rows queued before stop()
+        remaining_rows = []
+        while not self.queue.empty():
+            row = self.queue.get_nowait()
+            if row is not None:
+                remaining_rows.append(row)
+        for start in range(0, len(remaining_rows), self.batch_size):
+            await self._flush(remaining_rows[start:start + self.batch_size])
+
+    async def _flush(self, batch: List[SQLModel]):
+        """Insert a batch of rows in one transaction"""
+        try:
+            async with async_session() as session:
+                session.add_all(batch)
+                with track_stage("db_commit"):
+                    await session.commit()
+            self.stats['flushed'] += len(batch)
+            self.stats['batches'] += 1
+        except Exception as e:
+            self.stats['failed'] += len(batch)
+            logging.error(f"Error flushing {len(batch)} audit rows: {e}")
+
+    def get_stats(self) -> Dict[str, int]:
+        """Write-behind counters and current queue depth"""
+        return {
+            **self.stats,
+            'queue_depth': self.queue.qsize() if self.queue is not None else 0,
+        }
+
+# Create service instance
+audit_service = AuditService()
@@ -1,6 +1,7 @@
 import asyncio
 import logging
-from typing import Optional, Dict, Any, Union, List
+from collections import Counter
+from typing import Optional, Dict, Any, Union, List, Tuple, Callable, Awaitable
 try:
     import bittensor
     from bittensor.core.async_subtensor import AsyncSubtensor
@@ -12,11 +13,40 @@ except ImportError:
 
 from app.config import settings
 from app.services.cache_service import cache
+from app.services.block_tracker import BlockTracker, SubtensorBlockSource, MockBlockSource
+from app.services.circuit_breaker import CircuitBreaker, ChainUnavailableError
+from app.services.subtensor_pool import SubtensorPool
+from app.metrics import track_stage
+
+# Most (netuid, hotkey) pairs counted between refresh passes; hotkeys are client-supplied
+REQUEST_COUNTS_MAX_SIZE = 10_000
+
+def _decode_hotkey(hotkey: Any) -> str:
+    """Convert a storage map key into an SS58 hotkey address"""
+    if isinstance(hotkey, str):
+        return hotkey
+    from bittensor.core.chain_data.utils import decode_account_id
+    return decode_account_id(hotkey)
 
 class BittensorService:
     def __init__(self):
         self.async_subtensor = None
+        # Read connections spread over SUBTENSOR_ENDPOINTS, when pooling is configured
+        self.pool: Optional[SubtensorPool] = None
         self.wallet = None
+        # In-flight chain queries keyed by cache key (single-flight)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced_local = 0
+        self.coalesced_remote = 0
+        # Request counts per (netuid, hotkey), used to pick keys to keep warm
+        self._request_counts: Counter = Counter()
+        self._refresher: Optional[asyncio.Task] = None
+        # Guards chain reads so a degraded RPC endpoint fails fast instead of piling up requests
+        self.breaker = CircuitBreaker("subtensor")
+        # Chain head used to version cached entries when CACHE_BLOCK_AWARE is on
+        self.block_tracker = BlockTracker(
+            SubtensorBlockSource(self._guarded_chain_read) if BITTENSOR_AVAILABLE else MockBlockSource()
+        )
         if not BITTENSOR_AVAILABLE:
             logging.warning("Bittensor is not available. Using mock implementations.")
         
@@ -35,6 +65,52 @@ class BittensorService:
                 logging.error(f"Bittensor connection error: {e}")
                 raise
     
+    def _pool_endpoints(self) -> List[str]:
+        """RPC endpoints for the read pool"""
+        endpoints = [endpoint.strip() for endpoint in settings.SUBTENSOR_ENDPOINTS.split(",") if endpoint.strip()]
+        return endpoints or [settings.BITTENSOR_NETWORK]
+    
+    def _pool_enabled(self) -> bool:
+        """Whether chain reads go through a connection pool instead of the single connection"""
+        return BITTENSOR_AVAILABLE and (settings.SUBTENSOR_POOL_SIZE > 1 or len(self._pool_endpoints()) > 1)
+    
+    async def init_pool(self):
+        """Create and connect the read pool"""
+        if self.pool is None:
+            async def connect(endpoint: str):
+                subtensor = AsyncSubtensor(network=endpoint)
+                await subtensor.connect()
+                return subtensor
+            
+            self.pool = SubtensorPool(self._pool_endpoints(), settings.SUBTENSOR_POOL_SIZE, connect)
+            await self.pool.connect()
+    
+    async def _chain_read(self, fn: Callable[[Any], Awaitable[Any]]) -> Any:
+        """Run a read-only chain call on a pooled connection, or the single connection"""
+        if self._pool_enabled():
+            await self.init_pool()
+            return await self.pool.run(fn)
+        await self.init_subtensor()
+        return await fn(self.async_subtensor)
+    
+    async def close(self):
+        """Stop background tasks and close the AsyncSubtensor connections"""
+        await self.stop_refresher()
+        await self.block_tracker.stop()
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+        if self.async_subtensor:
+            try:
+                await self.async_subtensor.close()
+            except Exception as e:
+                logging.error(f"Error closing Bittensor connection: {e}")
+            self.async_subtensor = None
+    
+    async def _guarded_chain_read(self, fn: Callable[[Any], Awaitable[Any]]) -> Any:
+        """Pooled chain read behind the circuit breaker"""
+        return await self.breaker.call(lambda: self._chain_read(fn))
+    
     async def init_wallet(self):
         """Initialize Bittensor wallet"""
         if not BITTENSOR_AVAILABLE:
@@ -55,8 +131,8 @@ class BittensorService:
     async def get_tao_dividends(self, netuid: Optional[int] = None, hotkey: Optional[str] = None) -> Dict[str, Any]:
         """
         Get TAO dividends for a given netuid and hotkey
-        If netuid is None, returns data for all netuids
-        If hotkey is None, returns data for all hotkeys on the specified netuid
+        If netuid is None, uses the default netuid
+        If hotkey is None, uses the default hotkey; see get_subnet_dividends for all hotkeys
         """
         # Use defaults if not provided
         if netuid is None:
@@ -64,56 +140,382 @@ class BittensorService:
         if hotkey is None:
             hotkey = settings.DEFAULT_HOTKEY
         
+        self._count_request(netuid, hotkey)
+        
         # Check cache first
         cache_key = cache.get_dividend_key(netuid, hotkey)
-        cached_data = await cache.get(cache_key)
+        with track_stage("cache_get"):
+            cached_entry = await cache.get_with_ttl(cache_key)
+        cached_data, soft_ttl = self._check_block(*cached_entry, await self._current_block())
         
         if cached_data:
+            if soft_ttl <= 0:
+                # Serve the stale value now and refresh it in the background
+                self._start_flight(
+                    cache_key,
+                    lambda: self._fetch_tao_dividends(netuid, hotkey, cache_key)
+                )
             cached_data['cached'] = True
             return cached_data
         
-        # If Bittensor is not available, return mock data
+        # Share a single chain query between concurrent misses on the same key
+        return await self._single_flight(
+            cache_key,
+            lambda: self._fetch_tao_dividends(netuid, hotkey, cache_key)
+        )
+    
+    async def get_tao_dividends_batch(self, pairs: List[Tuple[int, str]]) -> List[Dict[str, Any]]:
+        """
+        Get TAO dividends for many (netuid, hotkey) pairs, in request order.
+        Cache hits are resolved with one MGET and misses are queried concurrently,
+        at most BATCH_MAX_CONCURRENCY at a time. Failed items carry an 'error' key.
+        """
+        unique_pairs = list(dict.fromkeys(pairs))
+        cache_keys = [cache.get_dividend_key(netuid, hotkey) for netuid, hotkey in unique_pairs]
+        entries = await cache.get_many_with_ttl(cache_keys)
+        block = await self._current_block()
+        entries = [self._check_block(cached_data, soft_ttl, block) for cached_data, soft_ttl in entries]
+        
+        results: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        misses = []
+        for (netuid, hotkey), cache_key, (cached_data, soft_ttl) in zip(unique_pairs, cache_keys, entries):
+            self._count_request(netuid, hotkey)
+            if cached_data:
+                if soft_ttl <= 0:
+                    self._start_flight(
+                        cache_key,
+                        lambda n=netuid, h=hotkey, k=cache_key: self._fetch_tao_dividends(n, h, k)
+                    )
+                cached_data['cached'] = True
+                results[(netuid, hotkey)] = cached_data
+            else:
+                misses.append((netuid, hotkey, cache_key))
+        
+        semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+        
+        async def fetch(netuid: int, hotkey: str, cache_key: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._single_flight(
+                    cache_key,
+                    lambda: self._fetch_tao_dividends(netuid, hotkey, cache_key)
+                )
+        
+        fetched = await asyncio.gather(
+            *[fetch(netuid, hotkey, cache_key) for netuid, hotkey, cache_key in misses],
+            return_exceptions=True
+        )
+        for (netuid, hotkey, _), result in zip(misses, fetched):
+            if isinstance(result, Exception):
+                logging.error(f"Error getting TAO dividends for {netuid}/{hotkey}: {result}")
+                result = {
+                    'netuid': netuid,
+                    'hotkey': hotkey,
+                    'dividend': None,
+                    'cached': False,
+                    'error': str(result)
+                }
+            results[(netuid, hotkey)] = result
+        
+        return [dict(results[pair]) for pair in pairs]
+    
+    async def get_subnet_dividends(self, netuid: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get TAO dividends for every hotkey on a subnet.
+        The whole TaoDividendsPerSubnet map is read in one storage query pinned to a
+        single block and cached as one object, so all hotkeys share one chain round trip.
+        """
+        if netuid is None:
+            netuid = settings.DEFAULT_NETUID
+        
+        cache_key = cache.get_subnet_dividend_key(netuid)
+        cached_data, soft_ttl = self._check_block(
+            *await cache.get_with_ttl(cache_key),
+            await self._current_block()
+        )
+        
+        if cached_data:
+            if soft_ttl <= 0:
+                self._start_flight(cache_key, lambda: self._query_subnet_dividends(netuid, cache_key))
+            cached_data['cached'] = True
+            return cached_data
+        
+        return await self._single_flight(cache_key, lambda: self._query_subnet_dividends(netuid, cache_key))
+    
+    async def _query_subnet_dividends(self, netuid: int, cache_key: str) -> Dict[str, Any]:
+        """Read a subnet's dividend map from the chain and store it in cache"""
         if not BITTENSOR_AVAILABLE:
             mock_result = {
                 'netuid': netuid,
-                'hotkey': hotkey,
-                'dividend': 12345.67,  # Mock dividend value
+                'block_hash': None,
+                'block': await self._current_block(),
+                'dividends': {settings.DEFAULT_HOTKEY: 12345.67},  # Mock dividend value
                 'cached': False
             }
-            # Store in cache
             await cache.set(cache_key, mock_result)
             return mock_result
-            
-        # Initialize subtensor if needed
-        await self.init_subtensor()
         
-        # Query the blockchain
         try:
-            dividend = await self.async_subtensor.query_tao_dividends_per_subnet(netuid, hotkey)
+            # Pin the snapshot to one block so every hotkey is read from the same state
+            block = await self._current_block()
+            
+            async def read_snapshot(subtensor):
+                block_hash = await subtensor.get_block_hash(block)
+                entries = await subtensor.query_map(
+                    module="SubtensorModule",
+                    name="TaoDividendsPerSubnet",
+                    params=[netuid],
+                    block_hash=block_hash
+                )
+                dividends = {}
+                async for hotkey, dividend in entries:
+                    dividends[_decode_hotkey(hotkey)] = float(getattr(dividend, "value", dividend))
+                return block_hash, dividends
+            
+            block_hash, dividends = await self._guarded_chain_read(read_snapshot)
             
-            # Format result
             result = {
                 'netuid': netuid,
-                'hotkey': hotkey,
-                'dividend': float(dividend),
+                'block_hash': block_hash,
+                'block': block,
+                'dividends': dividends,
                 'cached': False
             }
-            
-            # Store in cache
             await cache.set(cache_key, result)
-            
             return result
         except Exception as e:
-            logging.error(f"Error getting TAO dividends: {e}")
-            # In case of error, return mock data
+            logging.error(f"Error getting subnet TAO dividends: {e}")
+            raise
+    
+    async def _current_block(self) -> Optional[int]:
+        """
+        Latest chain head when the cache is block-aware, otherwise None.
+        If the chain head cannot be read this is the last known block, or None
+        (plain TTL caching) when no block has been read yet.
+        """
+        if not settings.CACHE_BLOCK_AWARE:
+            return None
+        return await self.block_tracker.get_block()
+    
+    def _check_block(self, cached_data: Optional[Dict[str, Any]], soft_ttl: float, block: Optional[int]) -> Tuple[Optional[Dict[str, Any]], float]:
+        """
+        Validate a cached entry against the chain head when the cache is block-aware.
+        Entries from the current dividend period stay fresh regardless of wall-clock TTL;
+        older ones are misses, or stale if stale-while-revalidate is enabled.
+        """
+        if cached_data is None or block is None:
+            return cached_data, soft_ttl
+        cached_block = cached_data.get('block')
+        if cached_block is not None and \
+                self.block_tracker.get_version(cached_block) >= self.block_tracker.get_version(block):
+            return cached_data, max(soft_ttl, float(cache.ttl))
+        if cache.stale_ttl > 0:
+            return cached_data, min(soft_ttl, 0)
+        return None, 0
+    
+    def _start_flight(self, key: str, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> asyncio.Task:
+        """Return the in-flight task for key, starting fetch if there is none"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._flight_done(key, t))
+        return task
+    
+    def _flight_done(self, key: str, task: asyncio.Task):
+        """Forget a finished flight, logging failures no caller may be awaiting"""
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"Error refreshing {key}: {task.exception()}")
+    
+    async def _single_flight(self, key: str, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Run fetch once per key at a time; concurrent callers await the same task.
+        The task is shielded so a cancelled caller does not cancel it for the others.
+        """
+        if key in self._inflight:
+            self.coalesced_local += 1
+        task = self._start_flight(key, fetch)
+        result = await asyncio.shield(task)
+        return dict(result)
+    
+    async def _fetch_tao_dividends(self, netuid: int, hotkey: str, cache_key: str) -> Dict[str, Any]:
+        """Fetch dividends from the chain, optionally coordinating with other workers"""
+        if not settings.SINGLE_FLIGHT_DISTRIBUTED:
+            return await self._query_tao_dividends(netuid, hotkey, cache_key)
+        
+        lock_key = cache.get_lock_key(cache_key)
+        token = await cache.acquire_lock(lock_key, settings.SINGLE_FLIGHT_LOCK_TTL)
+        if token is None:
+            # Another worker is refreshing this key; wait for its result
+            cached_data = await cache.wait_for(cache_key, lock_key, settings.SINGLE_FLIGHT_WAIT_TIMEOUT)
+            if cached_data:
+                self.coalesced_remote += 1
+                cached_data['cached'] = True
+                return cached_data
+            return await self._query_tao_dividends(netuid, hotkey, cache_key)
+        
+        try:
+            return await self._query_tao_dividends(netuid, hotkey, cache_key)
+        finally:
+            await cache.release_lock(lock_key, token)
+    
+    async def _query_tao_dividends(self, netuid: int, hotkey: str, cache_key: str) -> Dict[str, Any]:
+        """Query dividends from the chain and store the result in cache"""
+        block = await self._current_block()
+        
+        # If Bittensor is not available, return mock data
+        if not BITTENSOR_AVAILABLE:
             mock_result = {
                 'netuid': netuid,
                 'hotkey': hotkey,
                 'dividend': 12345.67,  # Mock dividend value
-                'cached': False,
-                'error': str(e)
+                'block': block,
+                'cached': False
             }
+            # Store in cache
+            await cache.set(cache_key, mock_result)
             return mock_result
+            
+        # Query the blockchain
+        try:
+            with track_stage("chain_query"):
+                if block is None:
+                    dividend = await self._guarded_chain_read(
+                        lambda subtensor: subtensor.query_tao_dividends_per_subnet(netuid, hotkey)
+                    )
+                else:
+                    dividend = await self._guarded_chain_read(
+                        lambda subtensor: subtensor.query_tao_dividends_per_subnet(netuid, hotkey, block=block)
+                    )
+        except Exception as e:
+            logging.error(f"Error getting TAO dividends: {e!r}")
+            return await self._dividend_fallback(netuid, hotkey, block, cache_key, e)
+        
+        # Format result
+        result = {
+            'netuid': netuid,
+            'hotkey': hotkey,
+            'dividend': float(dividend),
+            'block': block,
+            'cached': False
+        }
+        
+        # Store in cache
+        await cache.set(cache_key, result)
+        if settings.CHAIN_FALLBACK == "last_known_good":
+            await cache.set(cache.get_last_good_key(cache_key), result, ttl=settings.CHAIN_LAST_GOOD_TTL)
+        
+        return result
+    
+    async def _dividend_fallback(self, netuid: int, hotkey: str, block: Optional[int], cache_key: str, error: Exception) -> Dict[str, Any]:
+        """
+        Answer for a failed chain query according to CHAIN_FALLBACK:
+        last_known_good serves the last value read from the chain, mock serves a
+        placeholder dividend, and error (or a missing last good value) raises.
+        """
+        if settings.CHAIN_FALLBACK == "last_known_good":
+            try:
+                last_good = await cache.get(cache.get_last_good_key(cache_key))
+            except Exception as e:
+                logging.error(f"Error reading last known good dividends: {e}")
+                last_good = None
+            if last_good:
+                last_good['cached'] = True
+                last_good['stale'] = True
+                return last_good
+        elif settings.CHAIN_FALLBACK == "mock":
+            return {
+                'netuid': netuid,
+                'hotkey': hotkey,
+                'dividend': 12345.67,  # Mock dividend value
+                'block': block,
+                'cached': False,
+                'error': str(error)
+            }
+        raise ChainUnavailableError(f"Chain query failed: {error!r}") from error
+    
+    def start_refresher(self):
+        """Start keeping the most-requested pairs warm, if enabled"""
+        if settings.REFRESH_TOP_N <= 0 or self._refresher:
+            return
+        self._refresher = asyncio.create_task(self._refresh_loop())
+        logging.info(f"Refreshing top {settings.REFRESH_TOP_N} dividend keys every {settings.REFRESH_INTERVAL}s")
+    
+    async def stop_refresher(self):
+        """Stop the background refresher"""
+        if self._refresher:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+    
+    async def _refresh_loop(self):
+        """Run refresh passes until cancelled"""
+        while True:
+            await asyncio.sleep(settings.REFRESH_INTERVAL)
+            try:
+                await self.refresh_hot_keys()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Error refreshing hot dividend keys: {e}")
+    
+    def _count_request(self, netuid: int, hotkey: str):
+        """Count a request for the hot-key refresher; nothing is kept when it is disabled"""
+        if settings.REFRESH_TOP_N <= 0:
+            return
+        self._request_counts[(netuid, hotkey)] += 1
+        limit = max(REQUEST_COUNTS_MAX_SIZE, settings.REFRESH_TOP_N * 4)
+        if len(self._request_counts) > limit:
+            # Keep the busiest half so a flood of one-off hotkeys cannot grow the counter
+            self._request_counts = Counter(dict(self._request_counts.most_common(limit // 2)))
+    
+    async def refresh_hot_keys(self) -> int:
+        """
+        Refresh the most-requested pairs that would go stale before the next pass.
+        Returns the number of pairs refreshed.
+        """
+        top_n = settings.REFRESH_TOP_N
+        hot_pairs = [pair for pair, _ in self._request_counts.most_common(top_n)]
+        
+        # Decay counts so the hot set follows recent traffic and stays bounded
+        self._request_counts = Counter({
+            pair: count // 2
+            for pair, count in self._request_counts.most_common(top_n * 4)
+            if count // 2
+        })
+        
+        tasks = []
+        for netuid, hotkey in hot_pairs:
+            cache_key = cache.get_dividend_key(netuid, hotkey)
+            cached_data, soft_ttl = await cache.get_with_ttl(cache_key)
+            if cached_data is None or soft_ttl < settings.REFRESH_INTERVAL:
+                tasks.append(self._start_flight(
+                    cache_key,
+                    lambda n=netuid, h=hotkey, k=cache_key: self._fetch_tao_dividends(n, h, k)
+                ))
+        
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return len(tasks)
+    
+    def get_coalescing_stats(self) -> Dict[str, int]:
+        """Number of callers served by another caller's chain query"""
+        return {
+            'in_flight': len(self._inflight),
+            'coalesced_local': self.coalesced_local,
+            'coalesced_remote': self.coalesced_remote,
+        }
+    
+    def get_pool_stats(self) -> List[Dict[str, Any]]:
+        """Per-connection stats of the read pool, empty when pooling is off"""
+        return self.pool.get_stats() if self.pool else []
+    
+    def get_breaker_stats(self) -> Dict[str, Any]:
+        """State of the circuit breaker around chain reads"""
+        return self.breaker.get_stats()
     
     async def stake(self, amount: float, netuid: int, hotkey: str) -> Dict[str, Any]:
         """Stake TAO to a hotkey"""
@@ -191,5 +593,72 @@ class BittensorService:
             logging.error(f"Error unstaking TAO: {e}")
             raise
 
+    async def submit_stake_batch(self, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Submit several stake/unstake operations as one Utility.batch_all extrinsic.
+        Each operation has 'action' (stake or unstake), 'amount', 'netuid' and 'hotkey'.
+        A single operation is submitted as a plain stake/unstake extrinsic.
+        """
+        if len(operations) == 1:
+            operation = operations[0]
+            submit = self.stake if operation['action'] == 'stake' else self.unstake
+            return await submit(operation['amount'], operation['netuid'], operation['hotkey'])
+        
+        if not BITTENSOR_AVAILABLE:
+            # Return mock data if Bittensor is not available
+            return {
+                'success': True,
+                'transaction_hash': 'mock_batch_tx_hash_' + str(len(operations)),
+                'operations': len(operations),
+                'mock': True
+            }
+        
+        await self.init_subtensor()
+        await self.init_wallet()
+        
+        try:
+            substrate = self.async_subtensor.substrate
+            calls = []
+            for operation in operations:
+                amount_rao = int(operation['amount'] * 1e9)
+                if operation['action'] == 'stake':
+                    call_function = 'add_stake'
+                    amount_param = 'amount_staked'
+                else:
+                    call_function = 'remove_stake'
+                    amount_param = 'amount_unstaked'
+                calls.append(await substrate.compose_call(
+                    call_module='SubtensorModule',
+                    call_function=call_function,
+                    call_params={
+                        'hotkey': operation['hotkey'],
+                        'netuid': operation['netuid'],
+                        amount_param: amount_rao,
+                    }
+                ))
+            
+            batch_call = await substrate.compose_call(
+                call_module='Utility',
+                call_function='batch_all',
+                call_params={'calls': calls}
+            )
+            extrinsic = await substrate.create_signed_extrinsic(call=batch_call, keypair=self.wallet.coldkey)
+            response = await substrate.submit_extrinsic(
+                extrinsic,
+                wait_for_inclusion=True,
+                wait_for_finalization=False
+            )
+            if not await response.is_success:
+                raise Exception(f"Batch extrinsic failed: {await response.error_message}")
+            
+            return {
+                'success': True,
+                'transaction_hash': str(response.extrinsic_hash),
+                'operations': len(operations)
+            }
+        except Exception as e:
+            logging.error(f"Error submitting stake batch: {e}")
+            raise
+
 # Create service instance
 bittensor_service = BittensorService()
\ No newline at end of file
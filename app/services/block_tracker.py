@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+from typing import Optional, Callable, Awaitable, Any
+
+from app.config import settings
+
+class SubtensorBlockSource:
+    """Reads the chain head through chain_read, which runs a call on an AsyncSubtensor connection"""
+
+    def __init__(self, chain_read: Callable[[Callable[[Any], Awaitable[Any]]], Awaitable[Any]]):
+        self.chain_read = chain_read
+
+    async def get_current_block(self) -> int:
+        return await self.chain_read(lambda subtensor: subtensor.get_current_block())
+
+class MockBlockSource:
+    """Block source advanced by hand, for tests and when Bittensor is unavailable"""
+
+    def __init__(self, block: int = 0):
+        self.block = block
+
+    def advance(self, blocks: int = 1):
+        self.block += blocks
+
+    async def get_current_block(self) -> int:
+        return self.block
+
+class BlockTracker:
+    """
+    Tracks the chain head by polling a block source.
+    Without a running poll loop, get_block() polls lazily once the last reading is older than poll_interval.
+    A failed lazy poll keeps the last known block and is not retried before poll_interval has passed.
+    """
+
+    def __init__(self, source, poll_interval: float = None):
+        self.source = source
+        self.poll_interval = settings.BLOCK_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.current_block: Optional[int] = None
+        self._polled_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> int:
+        """Read the current block from the source"""
+        block = await self.source.get_current_block()
+        if self.current_block is None or block > self.current_block:
+            self.current_block = block
+        self._polled_at = time.monotonic()
+        return self.current_block
+
+    async def get_block(self) -> Optional[int]:
+        """Get the latest known block, polling if the reading is out of date (None if no block was read yet)"""
+        due = self._polled_at is None or time.monotonic() - self._polled_at >= self.poll_interval
+        if due and (self.current_block is None or self._task is None):
+            try:
+                return await self.refresh()
+            except Exception as e:
+                self._polled_at = time.monotonic()
+                logging.error(f"Error polling chain head, keeping block {self.current_block}: {e}")
+        return self.current_block
+
+    def get_version(self, block: int) -> int:
+        """Index of the dividend update period containing block"""
+        return block // max(settings.DIVIDEND_UPDATE_INTERVAL_BLOCKS, 1)
+
+    def start(self):
+        """Start polling the chain head in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll_loop())
+            logging.info(f"Tracking chain head every {self.poll_interval}s")
+
+    async def stop(self):
+        """Stop the background poll loop"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _poll_loop(self):
+        """Poll the block source until cancelled"""
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Error polling chain head: {e}")
+            await asyncio.sleep(self.poll_interval)
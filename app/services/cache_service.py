@@ -1,12 +1,168 @@
+import asyncio
 import json
+import time
+import uuid
 import redis.asyncio as aioredis
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
 from app.config import settings
 import logging
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# Pub/sub channel used to evict L1 entries on other workers
+INVALIDATION_CHANNEL = "cache_invalidate"
+
+# Entry field holding the wall-clock time after which the value is stale
+SOFT_EXPIRY_FIELD = "_soft_expires_at"
+
+# Token bucket: refills ARGV[1] tokens every ARGV[2] ms; returns {allowed, remaining, retry_after_ms}
+RATE_LIMIT_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = capacity / tonumber(ARGV[2])
+local time = redis.call("time")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local state = redis.call("hmget", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = math.ceil((1 - tokens) / rate)
+end
+redis.call("hset", KEYS[1], "tokens", tostring(tokens), "ts", now)
+redis.call("pexpire", KEYS[1], tonumber(ARGV[2]))
+return {allowed, math.floor(tokens), retry_after}
+"""
+
+# Deletes the lock only if it is still held by the caller's token
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+class Serializer:
+    """Encodes cache entries to bytes for Redis and back, with the stdlib json module"""
+    name = "json"
+    
+    def dumps(self, value: dict) -> bytes:
+        return json.dumps(value).encode()
+    
+    def loads(self, data: bytes) -> dict:
+        return json.loads(data)
+
+class ORJSONSerializer(Serializer):
+    """JSON via orjson; reads entries written by the json serializer"""
+    name = "orjson"
+    
+    def dumps(self, value: dict) -> bytes:
+        # json.dumps turns non-string keys into strings; keep that behaviour
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    
+    def loads(self, data: bytes) -> dict:
+        return orjson.loads(data)
+
+class MsgpackSerializer(Serializer):
+    """Binary msgpack entries; JSON entries written before a switch read as misses"""
+    name = "msgpack"
+    
+    def dumps(self, value: dict) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+    
+    def loads(self, data: bytes) -> dict:
+        return msgpack.unpackb(data, raw=False)
+
+def get_serializer(name: str) -> Serializer:
+    """Serializer named by CACHE_SERIALIZER, falling back to json when its package is missing"""
+    name = name.lower()
+    if name == "orjson" and ORJSON_AVAILABLE:
+        return ORJSONSerializer()
+    if name == "msgpack" and MSGPACK_AVAILABLE:
+        return MsgpackSerializer()
+    if name != "json":
+        logging.warning(f"Cache serializer {name} is not available. Using json.")
+    return Serializer()
+
+def _text(value) -> Optional[str]:
+    """Redis replies are bytes; decode the ones holding plain strings"""
+    return value.decode() if isinstance(value, bytes) else value
+
+class LRUCache:
+    """Bounded in-process cache with LRU eviction and per-entry expiry"""
+    
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+    
+    def get(self, key: str) -> Optional[dict]:
+        """Get a copy of an unexpired entry, marking it most recently used"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return dict(value)
+    
+    def set(self, key: str, value: dict, ttl: Optional[float] = None):
+        """Store an entry, expiring after min(ttl, self.ttl) seconds"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            self._data.pop(key, None)
+            return
+        self._data[key] = (time.monotonic() + ttl, dict(value))
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+    
+    def pop(self, key: str):
+        """Remove an entry if present"""
+        self._data.pop(key, None)
+    
+    def clear(self):
+        """Remove all entries"""
+        self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
 class RedisCache:
     def __init__(self):
         self.redis = None
         self.ttl = settings.REDIS_TTL
+        self.stale_ttl = settings.REDIS_STALE_TTL
+        # Optional in-process tier in front of Redis
+        self.l1 = LRUCache(settings.CACHE_L1_MAX_SIZE, settings.CACHE_L1_TTL) if settings.CACHE_L1_ENABLED else None
+        self.instance_id = uuid.uuid4().hex
+        self.serializer = get_serializer(settings.CACHE_SERIALIZER)
+        self._rate_limit_script = None
+        self._pubsub = None
+        self._listener = None
+        self.stats = {
+            'l1_hits': 0,
+            'l1_misses': 0,
+            'l2_hits': 0,
+            'l2_misses': 0,
+        }
         
     async def init_redis(self):
         """Initialize Redis connection"""
@@ -15,32 +171,187 @@ class RedisCache:
                 self.redis = await aioredis.from_url(
                     f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}",
                     password=settings.REDIS_PASSWORD if settings.REDIS_PASSWORD else None,
-                    decode_responses=True
+                    # Entries stay bytes end to end; the serializer decodes them directly
+                    decode_responses=False
                 )
                 logging.info("Redis connection established")
             except Exception as e:
                 logging.error(f"Redis connection error: {e}")
                 raise
     
+    async def close(self):
+        """Stop the invalidation listener and close the Redis connection"""
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pubsub:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        if self.redis:
+            await self.redis.aclose()
+            self.redis = None
+    
+    async def start_invalidation_listener(self):
+        """Subscribe to L1 invalidations published by other workers"""
+        if self.l1 is None or self._listener:
+            return
+        if not self.redis:
+            await self.init_redis()
+        self._listener = asyncio.create_task(self._listen_invalidations())
+    
+    async def _listen_invalidations(self):
+        """Evict L1 entries named on the invalidation channel, resubscribing on errors"""
+        while True:
+            try:
+                self._pubsub = self.redis.pubsub()
+                await self._pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in self._pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    origin, _, key = _text(message["data"]).partition(":")
+                    if origin != self.instance_id:
+                        self.l1.pop(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Cache invalidation listener error: {e}")
+                # Invalidations may have been missed while disconnected
+                self.l1.clear()
+                await asyncio.sleep(1)
+    
+    async def _publish_invalidation(self, key: str):
+        """Tell other workers to drop key from their L1"""
+        try:
+            await self.redis.publish(INVALIDATION_CHANNEL, f"{self.instance_id}:{key}")
+        except Exception as e:
+            logging.error(f"Error publishing cache invalidation: {e}")
+    
     async def get(self, key: str) -> dict:
-        """Get item from cache"""
+        """Get item from cache, ignoring entries past their soft TTL"""
+        value, soft_ttl = await self.get_with_ttl(key)
+        if value is None or soft_ttl <= 0:
+            return None
+        return value
+    
+    async def get_with_ttl(self, key: str) -> Tuple[Optional[dict], float]:
+        """
+        Get item from cache along with the seconds left until its soft TTL.
+        A negative TTL means the entry is stale but still within its hard TTL.
+        """
+        return self._split_entry(await self._get_entry(key))
+    
+    async def get_many_with_ttl(self, keys: List[str]) -> List[Tuple[Optional[dict], float]]:
+        """Like get_with_ttl for many keys, resolving L1 misses with a single MGET"""
+        entries: Dict[str, Optional[dict]] = {}
+        missing = []
+        for key in keys:
+            value = self.l1.get(key) if self.l1 is not None else None
+            if value is not None:
+                self.stats['l1_hits'] += 1
+                entries[key] = value
+            else:
+                if self.l1 is not None:
+                    self.stats['l1_misses'] += 1
+                missing.append(key)
+        
+        if missing:
+            if not self.redis:
+                await self.init_redis()
+            if self.l1 is None:
+                results = await self.redis.mget(missing)
+                ttls = [None] * len(missing)
+            else:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.mget(missing)
+                    for key in missing:
+                        pipe.pttl(key)
+                    results, *ttls = await pipe.execute()
+            
+            for key, result, ttl_ms in zip(missing, results, ttls):
+                value = self._loads(key, result) if result else None
+                if value is not None:
+                    self.stats['l2_hits'] += 1
+                    entries[key] = value
+                    if self.l1 is not None and ttl_ms and ttl_ms > 0:
+                        self.l1.set(key, entries[key], ttl_ms / 1000)
+                else:
+                    self.stats['l2_misses'] += 1
+                    entries[key] = None
+        
+        return [self._split_entry(dict(entries[key]) if entries[key] else None) for key in keys]
+    
+    def _loads(self, key: str, result: bytes) -> Optional[dict]:
+        """Decode a stored entry, treating one the serializer cannot read as a miss"""
+        try:
+            return self.serializer.loads(result)
+        except Exception as e:
+            logging.error(f"Error decoding cache entry {key} with {self.serializer.name}: {e}")
+            return None
+    
+    def _split_entry(self, value: Optional[dict]) -> Tuple[Optional[dict], float]:
+        """Separate a stored entry into its value and remaining soft TTL"""
+        if value is None:
+            return None, 0
+        soft_expires_at = value.pop(SOFT_EXPIRY_FIELD, None)
+        if soft_expires_at is None:
+            return value, float(self.ttl)
+        return value, soft_expires_at - time.time()
+    
+    async def _get_entry(self, key: str) -> Optional[dict]:
+        """Get the stored entry from L1 or Redis"""
+        if self.l1 is not None:
+            value = self.l1.get(key)
+            if value is not None:
+                self.stats['l1_hits'] += 1
+                return value
+            self.stats['l1_misses'] += 1
+        
         if not self.redis:
             await self.init_redis()
-        result = await self.redis.get(key)
-        if result:
-            return json.loads(result)
+        
+        if self.l1 is None:
+            result = await self.redis.get(key)
+            ttl_ms = None
+        else:
+            # Fetch the remaining TTL in the same round trip so L1 never outlives Redis
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.get(key)
+                pipe.pttl(key)
+                result, ttl_ms = await pipe.execute()
+        
+        value = self._loads(key, result) if result else None
+        if value is not None:
+            self.stats['l2_hits'] += 1
+            if self.l1 is not None and ttl_ms and ttl_ms > 0:
+                self.l1.set(key, value, ttl_ms / 1000)
+            return value
+        self.stats['l2_misses'] += 1
         return None
     
-    async def set(self, key: str, value: dict) -> bool:
-        """Set item in cache with TTL"""
+    async def set(self, key: str, value: dict, ttl: Optional[int] = None) -> bool:
+        """
+        Set item in cache with TTL (defaults to REDIS_TTL).
+        The entry stays readable as stale for stale_ttl seconds after it expires.
+        """
         if not self.redis:
             await self.init_redis()
+        if ttl is None:
+            ttl = self.ttl
         try:
+            entry = {**value, SOFT_EXPIRY_FIELD: time.time() + ttl}
+            hard_ttl = ttl + self.stale_ttl
             await self.redis.set(
                 key,
-                json.dumps(value),
-                ex=self.ttl
+                self.serializer.dumps(entry),
+                ex=hard_ttl
             )
+            if self.l1 is not None:
+                self.l1.set(key, entry, hard_ttl)
+                await self._publish_invalidation(key)
             return True
         except Exception as e:
             logging.error(f"Error setting cache: {e}")
@@ -52,14 +363,123 @@ class RedisCache:
             await self.init_redis()
         try:
             await self.redis.delete(key)
+            if self.l1 is not None:
+                self.l1.pop(key)
+                await self._publish_invalidation(key)
             return True
         except Exception as e:
             logging.error(f"Error deleting cache: {e}")
             return False
     
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per cache tier"""
+        return {
+            **self.stats,
+            'l1_enabled': self.l1 is not None,
+            'l1_size': len(self.l1) if self.l1 is not None else 0,
+        }
+    
+    async def claim(self, key: str, value: str, ttl: int) -> Optional[str]:
+        """
+        Store value under key for ttl seconds unless the key already exists.
+        Returns None if the claim succeeded, otherwise the value already stored.
+        """
+        if not self.redis:
+            await self.init_redis()
+        for _ in range(2):
+            if await self.redis.set(key, value, nx=True, ex=ttl):
+                return None
+            existing = await self.redis.get(key)
+            if existing is not None:
+                return _text(existing)
+            # The existing claim expired in between; try again
+        return None
+    
+    async def acquire_lock(self, key: str, ttl: int) -> Optional[str]:
+        """Try to acquire a lock, returning its token if acquired"""
+        if not self.redis:
+            await self.init_redis()
+        token = uuid.uuid4().hex
+        try:
+            if await self.redis.set(key, token, nx=True, ex=ttl):
+                return token
+        except Exception as e:
+            logging.error(f"Error acquiring lock: {e}")
+        return None
+    
+    async def release_lock(self, key: str, token: str) -> bool:
+        """Release a lock previously acquired with acquire_lock"""
+        if not self.redis:
+            await self.init_redis()
+        try:
+            await self.redis.eval(RELEASE_LOCK_SCRIPT, 1, key, token)
+            return True
+        except Exception as e:
+            logging.error(f"Error releasing lock: {e}")
+            return False
+    
+    async def rate_limit(self, key: str, limit: int, window: int) -> Tuple[bool, int, float]:
+        """
+        Take one request from a token bucket holding up to limit requests that
+        refills over window seconds, in one script round trip.
+        Returns whether the request is allowed, the requests left and seconds until the next one.
+        """
+        if not self.redis:
+            await self.init_redis()
+        if self._rate_limit_script is None or self._rate_limit_script.registered_client is not self.redis:
+            self._rate_limit_script = self.redis.register_script(RATE_LIMIT_SCRIPT)
+        allowed, remaining, retry_after_ms = await self._rate_limit_script(
+            keys=[key], args=[limit, window * 1000]
+        )
+        return bool(allowed), int(remaining), int(retry_after_ms) / 1000
+    
+    async def wait_for(self, key: str, lock_key: str, timeout: float, interval: float = 0.05) -> Optional[dict]:
+        """
+        Wait for another worker holding lock_key to populate key.
+        Returns None if the lock is released without a value or the timeout elapses.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
+            value = await self.get(key)
+            if value:
+                return value
+            if not await self.redis.exists(lock_key):
+                return await self.get(key)
+            await asyncio.sleep(interval)
+        return None
+    
     def get_dividend_key(self, netuid: int, hotkey: str) -> str:
         """Get cache key for TAO dividend data"""
         return f"tao_dividend:{netuid}:{hotkey}"
+    
+    def get_subnet_dividend_key(self, netuid: int) -> str:
+        """Get cache key for a subnet-wide TAO dividend snapshot"""
+        return f"tao_dividend_subnet:{netuid}"
+    
+    def get_sentiment_key(self, netuid: int) -> str:
+        """Get cache key for a subnet's sentiment result"""
+        return f"sentiment:{netuid}"
+    
+    def get_sentiment_llm_key(self, content_hash: str) -> str:
+        """Get cache key for an LLM score of a specific tweet set"""
+        return f"sentiment_llm:{content_hash}"
+    
+    def get_trade_key(self, netuid: int, hotkey: str) -> str:
+        """Get idempotency key for trades triggered on a netuid/hotkey"""
+        return f"trade:{netuid}:{hotkey}"
+    
+    def get_rate_limit_key(self, token_id: str) -> str:
+        """Generate the rate limit bucket key for an API token"""
+        return f"ratelimit:{token_id}"
+    
+    def get_last_good_key(self, cache_key: str) -> str:
+        """Generate the key holding the last value read from the chain for cache_key"""
+        return f"last_good:{cache_key}"
+    
+    def get_lock_key(self, key: str) -> str:
+        """Get lock key guarding the refresh of a cache key"""
+        return f"lock:{key}"
 
 # Create cache instance
 cache = RedisCache()
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class ChainUnavailableError(Exception):
+    """The chain could not answer and no fallback value was available"""
+
+class CircuitOpenError(ChainUnavailableError):
+    """The breaker is open and rejected the call without trying it"""
+
+class CircuitBreaker:
+    """
+    Circuit breaker with a latency-based adaptive timeout.
+    Calls time out after a multiple of the recent p99 latency (clamped to
+    [min_timeout, max_timeout]). After failure_threshold consecutive failures
+    the breaker opens and rejects calls for recovery_timeout seconds, then lets
+    a single probe through: success closes it, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = None,
+        recovery_timeout: float = None,
+        min_timeout: float = None,
+        max_timeout: float = None,
+        timeout_multiplier: float = None,
+        latency_window: int = None,
+    ):
+        self.name = name
+        self.failure_threshold = settings.CHAIN_BREAKER_FAILURE_THRESHOLD if failure_threshold is None else failure_threshold
+        self.recovery_timeout = settings.CHAIN_BREAKER_RECOVERY_TIMEOUT if recovery_timeout is None else recovery_timeout
+        self.min_timeout = settings.CHAIN_TIMEOUT_MIN if min_timeout is None else min_timeout
+        self.max_timeout = settings.CHAIN_TIMEOUT_MAX if max_timeout is None else max_timeout
+        self.timeout_multiplier = settings.CHAIN_TIMEOUT_MULTIPLIER if timeout_multiplier is None else timeout_multiplier
+        self.latencies = deque(maxlen=settings.CHAIN_TIMEOUT_WINDOW if latency_window is None else latency_window)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.stats = {
+            'successes': 0,
+            'failures': 0,
+            'timeouts': 0,
+            'rejected': 0,
+            'opened': 0,
+        }
+
+    def current_timeout(self) -> float:
+        """Timeout for the next call: timeout_multiplier x recent p99 latency"""
+        if not self.latencies:
+            return self.max_timeout
+        ordered = sorted(self.latencies)
+        p99 = ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)]
+        return min(max(p99 * self.timeout_multiplier, self.min_timeout), self.max_timeout)
+
+    def _admit(self) -> bool:
+        """Whether a call may go ahead, moving an expired open breaker to half-open"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                return False
+            self.state = HALF_OPEN
+            logging.info(f"Circuit {self.name} half-open, probing")
+        # Half-open: only one probe at a time
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn under the breaker, raising CircuitOpenError if it is open"""
+        if not self._admit():
+            self.stats['rejected'] += 1
+            raise CircuitOpenError(f"Circuit {self.name} is open")
+
+        probe = self.state == HALF_OPEN
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(fn(), self.current_timeout())
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            self._record_failure()
+            raise
+        except Exception:
+            self._record_failure()
+            raise
+        finally:
+            if probe:
+                self._probe_in_flight = False
+        self.latencies.append(time.monotonic() - started)
+        self._record_success()
+        return result
+
+    def _record_success(self):
+        self.stats['successes'] += 1
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            logging.info(f"Circuit {self.name} closed")
+            self.state = CLOSED
+
+    def _record_failure(self):
+        self.stats['failures'] += 1
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or (
+            self.state == CLOSED and self.consecutive_failures >= self.failure_threshold
+        ):
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self.stats['opened'] += 1
+            logging.warning(f"Circuit {self.name} opened after {self.consecutive_failures} failures")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Breaker state, current timeout and counters"""
+        retry_in: Optional[float] = None
+        if self.state == OPEN:
+            retry_in = max(self.recovery_timeout - (time.monotonic() - self.opened_at), 0.0)
+        return {
+            **self.stats,
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'timeout': self.current_timeout(),
+            'retry_in': retry_in,
+        }
@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Optional, Sequence
+
+from sqlalchemy import select, Select
+from sqlmodel import SQLModel
+
+from app.config import settings
+from app.db import async_session
+
+# Media type per export format
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _plain(value: Any) -> Any:
+    """Column value as a JSON/CSV friendly scalar"""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+class ExportService:
+    """
+    Streams audit tables as NDJSON or CSV.
+    Rows are read through a server-side cursor EXPORT_BATCH_SIZE at a time and
+    encoded one batch per chunk, so memory stays flat however many rows match.
+    """
+
+    def __init__(self, session_factory=async_session):
+        self.session_factory = session_factory
+
+    def build_query(
+        self,
+        model: SQLModel,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        netuid: Optional[int] = None,
+    ) -> Select:
+        """Plain column select (no ORM objects) over [start, end) and netuid, oldest first"""
+        table = model.__table__
+        statement = select(*table.columns)
+        if start is not None:
+            statement = statement.where(table.c.created_at >= start)
+        if end is not None:
+            statement = statement.where(table.c.created_at < end)
+        if netuid is not None:
+            statement = statement.where(table.c.netuid == netuid)
+        # Rows migrated from uuid4 keys keep random ids, so order by time; id breaks ties
+        return statement.order_by(table.c.created_at, table.c.id)
+
+    def _encode(self, columns: List[str], rows: Sequence[Any], format: str) -> str:
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerows([_plain(value) for value in row] for row in rows)
+            return buffer.getvalue()
+        return "".join(
+            json.dumps({column: _plain(value) for column, value in zip(columns, row)}) + "\n"
+            for row in rows
+        )
+
+    async def stream(self, statement: Select, format: str) -> AsyncIterator[str]:
+        """Yield the encoded result of statement, one chunk per fetched batch"""
+        columns = [column.name for column in statement.selected_columns]
+        if format == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(columns)
+            yield buffer.getvalue()
+
+        rows = 0
+        async with self.session_factory() as session:
+            try:
+                result = await session.stream(
+                    statement.execution_options(yield_per=max(settings.EXPORT_BATCH_SIZE, 1))
+                )
+                async for batch in result.partitions():
+                    rows += len(batch)
+                    yield self._encode(columns, batch, format)
+            except Exception as e:
+                # Headers are already sent, so the client sees a truncated body
+                logging.error(f"Error exporting rows after {rows} rows: {e}")
+                raise
+        logging.info(f"Exported {rows} rows as {format}")
+
+# Create service instance
+export_service = ExportService()
@@ -0,0 +1,143 @@
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import cast, func, select, literal_column, Integer
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db import async_session, utcnow, TaoDividendHistory
+from app.services.bittensor_service import bittensor_service
+
+# Rows per INSERT statement when storing a sample
+INSERT_CHUNK_SIZE = 1000
+
+class HistoryService:
+    """
+    Dividend time series: a collector that samples whole subnets into
+    TaoDividendHistory, and range queries downsampled in SQL.
+    """
+
+    def __init__(self, session_factory=async_session, service=bittensor_service):
+        self.session_factory = session_factory
+        self.service = service
+        # Last block sampled per subnet, so block-aware sampling skips unchanged snapshots
+        self._last_blocks: Dict[int, int] = {}
+
+    def get_netuids(self) -> List[int]:
+        """Subnets to sample, from HISTORY_NETUIDS"""
+        netuids = []
+        for item in settings.HISTORY_NETUIDS.split(","):
+            try:
+                netuids.append(int(item))
+            except ValueError:
+                if item.strip():
+                    logging.error(f"Ignoring invalid history netuid: {item}")
+        return list(dict.fromkeys(netuids)) or [settings.DEFAULT_NETUID]
+
+    async def collect(self, netuids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """Sample every hotkey of each subnet from one snapshot per subnet"""
+        sampled_at = utcnow()
+        rows = []
+        skipped = 0
+        errors = 0
+        for netuid in netuids or self.get_netuids():
+            try:
+                snapshot = await self.service.get_subnet_dividends(netuid)
+            except Exception as e:
+                logging.error(f"Error sampling dividends for netuid {netuid}: {e}")
+                errors += 1
+                continue
+
+            block = snapshot.get("block")
+            if block is not None and self._last_blocks.get(netuid) == block:
+                skipped += 1
+                continue
+            if block is not None:
+                self._last_blocks[netuid] = block
+
+            rows.extend(
+                {
+                    "netuid": netuid,
+                    "hotkey": hotkey,
+                    "sampled_at": sampled_at,
+                    "dividend": dividend,
+                    "block": block,
+                }
+                for hotkey, dividend in snapshot["dividends"].items()
+            )
+
+        await self._insert(rows)
+        return {"success": errors == 0, "rows": len(rows), "skipped": skipped, "errors": errors}
+
+    async def _insert(self, rows: List[Dict[str, Any]]):
+        """Bulk insert samples, ignoring ones already stored"""
+        if not rows:
+            return
+        async with self.session_factory() as session:
+            dialect = session.bind.dialect.name
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+                statement = insert(TaoDividendHistory).values(rows[start:start + INSERT_CHUNK_SIZE])
+                await session.execute(statement.on_conflict_do_nothing())
+            await session.commit()
+
+    def pick_interval(self, start: datetime, end: datetime) -> int:
+        """Smallest whole-minute bucket that keeps the series within HISTORY_MAX_POINTS"""
+        span = max((end - start).total_seconds(), 1)
+        interval = math.ceil(span / max(settings.HISTORY_MAX_POINTS, 1))
+        return max(math.ceil(interval / 60) * 60, 60)
+
+    def _epoch(self, dialect: str, column):
+        """Seconds since the epoch for a timestamp column, in the session's SQL dialect"""
+        if dialect == "postgresql":
+            return func.extract("epoch", column)
+        return cast(func.strftime("%s", column), Integer)
+
+    async def get_history(
+        self,
+        session: AsyncSession,
+        netuid: int,
+        hotkey: str,
+        start: datetime,
+        end: datetime,
+        interval: int,
+    ) -> List[Dict[str, Any]]:
+        """min/max/avg dividend per interval-second bucket, aggregated in the database"""
+        epoch = self._epoch(session.bind.dialect.name, TaoDividendHistory.sampled_at)
+        # Inlined rather than bound, so Postgres sees the same expression in SELECT and GROUP BY
+        width = literal_column(str(int(interval)))
+        bucket = (func.floor(epoch / width) * width).label("bucket")
+        statement = (
+            select(
+                bucket,
+                func.min(TaoDividendHistory.dividend),
+                func.max(TaoDividendHistory.dividend),
+                func.avg(TaoDividendHistory.dividend),
+                func.count(),
+            )
+            .where(
+                TaoDividendHistory.netuid == netuid,
+                TaoDividendHistory.hotkey == hotkey,
+                TaoDividendHistory.sampled_at >= start,
+                TaoDividendHistory.sampled_at < end,
+            )
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+        result = await session.execute(statement)
+        return [
+            {
+                "timestamp": datetime.fromtimestamp(int(bucket_start), tz=timezone.utc),
+                "min": float(minimum),
+                "max": float(maximum),
+                "avg": float(average),
+                "samples": samples,
+            }
+            for bucket_start, minimum, maximum, average, samples in result.all()
+        ]
+
+# Create service instance
+history_service = HistoryService()
@@ -0,0 +1,132 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, func, literal, select, DateTime
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db import async_session, as_utc, utcnow, TaoDividendQuery, TaoDividendQueryRollup
+
+# An hour is rolled up only this long after it ends, so rows still in the
+# audit write-behind buffer make it into the aggregate
+ROLLUP_GRACE = timedelta(minutes=5)
+
+def _hour_floor(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+class RetentionService:
+    """
+    Keeps the tao_dividend_queries audit table bounded.
+    Each completed hour is rolled up into TaoDividendQueryRollup with one
+    INSERT ... SELECT, skipping gaps without queries, then raw rows older than
+    RETENTION_DAYS (and already rolled up) are deleted in short batches so no
+    transaction holds locks for long.
+    """
+
+    def __init__(self, session_factory=async_session):
+        self.session_factory = session_factory
+
+    async def run(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Roll up completed hours, then prune expired raw rows"""
+        now = now or utcnow()
+        rollup = await self.rollup(now)
+        prune = await self.prune(now)
+        return {"success": True, **rollup, **prune}
+
+    async def _rolled_until(self, session: AsyncSession) -> Optional[datetime]:
+        """End of the last rolled-up hour"""
+        last = await session.scalar(select(func.max(TaoDividendQueryRollup.hour)))
+        return as_utc(last) + timedelta(hours=1) if last is not None else None
+
+    async def rollup(self, now: datetime) -> Dict[str, int]:
+        """Aggregate every completed hour that has not been rolled up yet"""
+        end = _hour_floor(now - ROLLUP_GRACE)
+        hours = 0
+        rows = 0
+        async with self.session_factory() as session:
+            hour = await self._rolled_until(session)
+            if hour is None:
+                first = await session.scalar(select(func.min(TaoDividendQuery.created_at)))
+                if first is None:
+                    return {"hours": 0, "rollup_rows": 0}
+                hour = _hour_floor(as_utc(first))
+
+            dialect = session.bind.dialect.name
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            while hour < end:
+                aggregates = (
+                    select(
+                        literal(hour, DateTime(timezone=True)),
+                        TaoDividendQuery.netuid,
+                        TaoDividendQuery.hotkey,
+                        TaoDividendQuery.from_cache,
+                        func.count(),
+                        func.min(TaoDividendQuery.dividend),
+                        func.max(TaoDividendQuery.dividend),
+                        func.avg(TaoDividendQuery.dividend),
+                    )
+                    .where(
+                        TaoDividendQuery.created_at >= hour,
+                        TaoDividendQuery.created_at < hour + timedelta(hours=1),
+                    )
+                    .group_by(TaoDividendQuery.netuid, TaoDividendQuery.hotkey, TaoDividendQuery.from_cache)
+                )
+                statement = insert(TaoDividendQueryRollup).from_select(
+                    ["hour", "netuid", "hotkey", "from_cache", "queries", "min_dividend", "max_dividend", "avg_dividend"],
+                    aggregates,
+                ).on_conflict_do_nothing()
+                result = await session.execute(statement)
+                await session.commit()
+                hour += timedelta(hours=1)
+                if result.rowcount > 0:
+                    rows += result.rowcount
+                    hours += 1
+                else:
+                    # Empty hour: jump to the next one with queries instead of walking each gap hour
+                    next_query = await session.scalar(
+                        select(func.min(TaoDividendQuery.created_at)).where(TaoDividendQuery.created_at >= hour)
+                    )
+                    if next_query is None:
+                        break
+                    hour = max(hour, _hour_floor(as_utc(next_query)))
+
+        return {"hours": hours, "rollup_rows": rows}
+
+    async def prune(self, now: datetime) -> Dict[str, Any]:
+        """Delete raw rows past the retention window, RETENTION_BATCH_SIZE per transaction"""
+        async with self.session_factory() as session:
+            rolled_until = await self._rolled_until(session)
+        if rolled_until is None:
+            return {"deleted": 0, "batches": 0, "backlog": False}
+        # Never delete rows that have not been rolled up yet
+        cutoff = min(now - timedelta(days=settings.RETENTION_DAYS), rolled_until)
+
+        batch_size = max(settings.RETENTION_BATCH_SIZE, 1)
+        deleted = 0
+        batches = 0
+        backlog = False
+        while True:
+            if batches >= settings.RETENTION_MAX_BATCHES:
+                backlog = True
+                break
+            expired = select(TaoDividendQuery.id).where(TaoDividendQuery.created_at < cutoff).limit(batch_size)
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    delete(TaoDividendQuery)
+                    .where(TaoDividendQuery.id.in_(expired))
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+            deleted += result.rowcount
+            batches += 1
+            if result.rowcount < batch_size:
+                break
+
+        if backlog:
+            logging.warning(f"Audit retention stopped after {batches} batches; expired rows remain")
+        return {"deleted": deleted, "batches": batches, "backlog": backlog}
+
+# Create service instance
+retention_service = RetentionService()
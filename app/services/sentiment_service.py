@@ -1,44 +1,151 @@
 import asyncio
+import hashlib
+import json
 import logging
+import time
 import httpx
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from app.config import settings
 from app.models import SentimentAnalysisResult
+from app.services.cache_service import cache
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 class SentimentService:
-    def __init__(self):
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
         self.datura_api_key = settings.DATURA_API_KEY
         self.chutes_api_key = settings.CHUTES_API_KEY
-        self.datura_base_url = "https://api.datura.ai"
-        self.chutes_base_url = "https://api.chutes.ai"
+        self.datura_base_url = settings.DATURA_BASE_URL
+        self.chutes_base_url = settings.CHUTES_BASE_URL
+        # Long-lived clients per upstream, recreated if the event loop changes
+        self.transport = transport
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._client_loops: Dict[str, asyncio.AbstractEventLoop] = {}
+        self.http_stats: Dict[str, Dict[str, float]] = {}
+        # In-flight LLM calls keyed by tweet content hash
+        self._inflight_llm: Dict[str, asyncio.Task] = {}
+        self.llm_stats = {
+            "inferences": 0,
+            "bulk_inferences": 0,
+            "deduplicated": 0,
+        }
+    
+    def _get_client(self, upstream: str) -> httpx.AsyncClient:
+        """Get the pooled client for an upstream ("datura" or "chutes")"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(upstream)
+        if client is not None and not client.is_closed and self._client_loops.get(upstream) is loop:
+            return client
+        if client is not None and not client.is_closed:
+            self._close_stale_client(client, self._client_loops.get(upstream))
+        
+        base_url, api_key = {
+            "datura": (self.datura_base_url, self.datura_api_key),
+            "chutes": (self.chutes_base_url, self.chutes_api_key),
+        }[upstream]
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            http2=settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+            transport=self.transport,
+        )
+        self._clients[upstream] = client
+        self._client_loops[upstream] = loop
+        return client
+    
+    def _close_stale_client(self, client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+        """
+        Close a client replaced because the event loop changed.
+        Its connections belong to the loop it was created on, so it is closed there
+        the next time that loop runs. If that loop is already closed, the close runs
+        on the current loop: sockets a dead loop can no longer shut down are dropped
+        from the pool and freed by the garbage collector.
+        """
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(lambda: loop.create_task(self._close_client(client)))
+        else:
+            asyncio.get_running_loop().create_task(self._close_client(client))
+    
+    async def _close_client(self, client: httpx.AsyncClient):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logging.error(f"Error closing HTTP client: {e}")
+    
+    async def close(self):
+        """Close all pooled clients"""
+        clients, self._clients = self._clients, {}
+        self._client_loops = {}
+        for client in clients.values():
+            await self._close_client(client)
+    
+    def _trace(self, upstream: str):
+        """
+        Build an httpcore trace hook counting requests, new connections and
+        time spent in TCP/TLS handshakes for an upstream
+        """
+        stats = self.http_stats.setdefault(upstream, {
+            "requests": 0,
+            "connections_opened": 0,
+            "handshake_ms": 0.0,
+        })
+        stats["requests"] += 1
+        started: Dict[str, float] = {}
+        
+        async def trace(event_name: str, info: Dict[str, Any]):
+            step, _, phase = event_name.rpartition(".")
+            if step not in ("connection.connect_tcp", "connection.start_tls"):
+                return
+            if phase == "started":
+                started[step] = time.perf_counter()
+            elif phase == "complete" and step in started:
+                stats["handshake_ms"] += (time.perf_counter() - started.pop(step)) * 1000
+                if step == "connection.connect_tcp":
+                    stats["connections_opened"] += 1
+        
+        return trace
+    
+    def get_http_stats(self) -> Dict[str, Dict[str, float]]:
+        """Requests, opened connections and handshake time per upstream"""
+        return {upstream: dict(stats) for upstream, stats in self.http_stats.items()}
 
     async def search_tweets(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """
         Search for tweets using Datura.ai API
         """
-        url = f"{self.datura_base_url}/twitter/search"
-        headers = {
-            "Authorization": f"Bearer {self.datura_api_key}",
-            "Content-Type": "application/json"
-        }
+        try:
+            return await self._search_tweets(query, limit)
+        except Exception as e:
+            logging.error(f"Error searching tweets: {e}")
+            return []
+    
+    async def _search_tweets(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Search for tweets, raising on API errors"""
         payload = {
             "query": query,
             "limit": limit
         }
 
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url, 
-                    headers=headers, 
-                    json=payload,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                return response.json().get("data", [])
-        except Exception as e:
-            logging.error(f"Error searching tweets: {e}")
-            return []
+        client = self._get_client("datura")
+        response = await client.post(
+            "/twitter/search",
+            json=payload,
+            timeout=30.0,
+            extensions={"trace": self._trace("datura")}
+        )
+        response.raise_for_status()
+        return response.json().get("data", [])
     
     async def analyze_sentiment(self, tweets: List[Dict[str, Any]]) -> SentimentAnalysisResult:
         """
@@ -51,8 +158,47 @@ class SentimentService:
                 summary="No tweets found for analysis"
             )
 
-        # Extract tweet text and create prompt
+        try:
+            return await self._analyze_sentiment(tweets)
+        except Exception as e:
+            logging.error(f"Error analyzing sentiment: {e}")
+            # Return neutral sentiment on error
+            return SentimentAnalysisResult(
+                score=0,
+                tweets_analyzed=len(tweets),
+                summary=f"Error analyzing sentiment: {str(e)}"
+            )
+    
+    async def _analyze_sentiment(self, tweets: List[Dict[str, Any]]) -> SentimentAnalysisResult:
+        """
+        Score tweets with the LLM, raising on API errors.
+        Results are cached by a hash of the tweet texts, and concurrent calls
+        for the same tweet set share one inference.
+        """
         tweet_texts = [tweet.get("text", "") for tweet in tweets if tweet.get("text")]
+        content_hash = hashlib.sha256("\n\n".join(sorted(tweet_texts)).encode()).hexdigest()
+        llm_key = cache.get_sentiment_llm_key(content_hash)
+        
+        cached_result = await self._cache_get(llm_key)
+        if cached_result:
+            self.llm_stats["deduplicated"] += 1
+            return SentimentAnalysisResult(**cached_result)
+        
+        task = self._inflight_llm.get(content_hash)
+        if task is not None:
+            self.llm_stats["deduplicated"] += 1
+        else:
+            task = asyncio.ensure_future(self._run_llm(tweet_texts, len(tweets)))
+            self._inflight_llm[content_hash] = task
+            task.add_done_callback(lambda _: self._inflight_llm.pop(content_hash, None))
+        result = await asyncio.shield(task)
+        
+        await cache.set(llm_key, result.model_dump(), ttl=settings.SENTIMENT_LLM_CACHE_TTL)
+        return result
+    
+    async def _run_llm(self, tweet_texts: List[str], tweets_analyzed: int) -> SentimentAnalysisResult:
+        """Call the Chutes.ai LLM to score a set of tweet texts"""
+        self.llm_stats["inferences"] += 1
         tweets_text = "\n\n".join(tweet_texts)
         
         prompt = f"""
@@ -70,42 +216,164 @@ class SentimentService:
         Return ONLY the score value (a number between -100 and 100).
         """
 
+        output = await self._call_llm(prompt)
+        score = self._extract_sentiment_score(output)
+
+        return SentimentAnalysisResult(
+            score=score,
+            tweets_analyzed=tweets_analyzed,
+            summary=f"Analyzed {tweets_analyzed} tweets with sentiment score {score}"
+        )
+    
+    async def _call_llm(self, prompt: str, timeout: float = 60.0) -> str:
+        """Send a prompt to the Chutes.ai LLM and return its raw output"""
         # Call Chutes API
-        chutes_endpoint = f"{self.chutes_base_url}/v1/app/chute/20acffc0-0c5f-58e3-97af-21fc0b261ec4/run"
-        headers = {
-            "Authorization": f"Bearer {self.chutes_api_key}",
-            "Content-Type": "application/json"
-        }
+        chutes_endpoint = "/v1/app/chute/20acffc0-0c5f-58e3-97af-21fc0b261ec4/run"
         payload = {
             "input": prompt
         }
 
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    chutes_endpoint,
-                    headers=headers,
-                    json=payload,
-                    timeout=60.0
-                )
-                response.raise_for_status()
-
-                result = response.json()
-                score = self._extract_sentiment_score(result.get("output", "0"))
-
-                return SentimentAnalysisResult(
+        client = self._get_client("chutes")
+        response = await client.post(
+            chutes_endpoint,
+            json=payload,
+            timeout=timeout,
+            extensions={"trace": self._trace("chutes")}
+        )
+        response.raise_for_status()
+        return response.json().get("output", "0")
+    
+    async def analyze_sentiment_bulk(self, tweets_by_netuid: Dict[int, List[Dict[str, Any]]]) -> Dict[int, SentimentAnalysisResult]:
+        """
+        Analyze sentiment for many subnets, packing up to SENTIMENT_BULK_MAX_SUBNETS
+        subnets into each LLM call. Subnets missing from an unparseable bulk
+        response fall back to one call each.
+        """
+        results, _ = await self._analyze_sentiment_bulk(tweets_by_netuid)
+        return results
+    
+    async def _analyze_sentiment_bulk(self, tweets_by_netuid: Dict[int, List[Dict[str, Any]]]) -> Tuple[Dict[int, SentimentAnalysisResult], set]:
+        """Bulk analysis returning results and the netuids whose analysis failed"""
+        results: Dict[int, SentimentAnalysisResult] = {}
+        failed = set()
+        pending: Dict[int, Tuple[List[Dict[str, Any]], List[str], str]] = {}
+        
+        for netuid, tweets in tweets_by_netuid.items():
+            if not tweets:
+                results[netuid] = await self.analyze_sentiment(tweets)
+                continue
+            tweet_texts = [tweet.get("text", "") for tweet in tweets if tweet.get("text")]
+            content_hash = hashlib.sha256("\n\n".join(sorted(tweet_texts)).encode()).hexdigest()
+            cached_result = await self._cache_get(cache.get_sentiment_llm_key(content_hash))
+            if cached_result:
+                self.llm_stats["deduplicated"] += 1
+                results[netuid] = SentimentAnalysisResult(**cached_result)
+                continue
+            pending[netuid] = (tweets, tweet_texts, content_hash)
+        
+        netuids = list(pending)
+        chunk_size = max(settings.SENTIMENT_BULK_MAX_SUBNETS, 1)
+        for start in range(0, len(netuids), chunk_size):
+            chunk = netuids[start:start + chunk_size]
+            scores: Dict[int, float] = {}
+            try:
+                scores = await self._run_bulk_llm({netuid: pending[netuid][1] for netuid in chunk})
+            except Exception as e:
+                logging.error(f"Error in bulk sentiment analysis, falling back to per-subnet calls: {e}")
+            
+            fallback = [netuid for netuid in chunk if netuid not in scores]
+            for netuid in chunk:
+                if netuid not in scores:
+                    continue
+                tweets, _, content_hash = pending[netuid]
+                score = scores[netuid]
+                results[netuid] = SentimentAnalysisResult(
                     score=score,
                     tweets_analyzed=len(tweets),
                     summary=f"Analyzed {len(tweets)} tweets with sentiment score {score}"
                 )
-        except Exception as e:
-            logging.error(f"Error analyzing sentiment: {e}")
-            # Return neutral sentiment on error
-            return SentimentAnalysisResult(
-                score=0,
-                tweets_analyzed=len(tweets),
-                summary=f"Error analyzing sentiment: {str(e)}"
+                await cache.set(
+                    cache.get_sentiment_llm_key(content_hash),
+                    results[netuid].model_dump(),
+                    ttl=settings.SENTIMENT_LLM_CACHE_TTL
+                )
+            
+            fallback_results = await asyncio.gather(
+                *[self._analyze_sentiment(pending[netuid][0]) for netuid in fallback],
+                return_exceptions=True
             )
+            for netuid, result in zip(fallback, fallback_results):
+                if isinstance(result, Exception):
+                    logging.error(f"Error analyzing sentiment for netuid {netuid}: {result}")
+                    failed.add(netuid)
+                    result = SentimentAnalysisResult(
+                        score=0,
+                        tweets_analyzed=len(pending[netuid][0]),
+                        summary=f"Error analyzing sentiment: {str(result)}"
+                    )
+                results[netuid] = result
+        
+        return results, failed
+    
+    async def _run_bulk_llm(self, texts_by_netuid: Dict[int, List[str]]) -> Dict[int, float]:
+        """Score several subnets' tweets in one LLM call, returning the scores it parsed"""
+        self.llm_stats["bulk_inferences"] += 1
+        sections = "\n\n".join(
+            f"### Subnet {netuid}\n{self._truncate_to_budget(texts, settings.SENTIMENT_BULK_TOKENS_PER_SUBNET)}"
+            for netuid, texts in texts_by_netuid.items()
+        )
+        
+        prompt = f"""
+        Analyze the sentiment of the following tweets about Bittensor subnets.
+        Tweets are grouped by subnet under "### Subnet <netuid>" headings:
+        
+        {sections}
+        
+        For each subnet, provide a sentiment score from -100 (extremely negative) to 100 (extremely positive).
+        Base your analysis on indicators like:
+        - Positive/negative language
+        - Opinions about the technology
+        - Enthusiasm for the project
+        - Criticisms or concerns
+        - Overall sentiment
+        Return ONLY a JSON object mapping each subnet netuid to its score, e.g. {{"1": 42, "18": -10}}.
+        """
+        
+        output = await self._call_llm(prompt, timeout=120.0)
+        return self._parse_bulk_scores(output, set(texts_by_netuid))
+    
+    def _truncate_to_budget(self, tweet_texts: List[str], token_budget: int) -> str:
+        """Join tweet texts, stopping once the approximate token budget (4 chars/token) is used"""
+        char_budget = token_budget * 4
+        kept = []
+        used = 0
+        for text in tweet_texts:
+            if used + len(text) > char_budget:
+                if not kept:
+                    kept.append(text[:char_budget])
+                break
+            kept.append(text)
+            used += len(text) + 2
+        return "\n\n".join(kept)
+    
+    def _parse_bulk_scores(self, output: str, netuids: set) -> Dict[int, float]:
+        """Extract a netuid -> score map from bulk LLM output, skipping invalid entries"""
+        start = output.find("{")
+        end = output.rfind("}")
+        if start == -1 or end < start:
+            raise ValueError("No JSON object in bulk sentiment output")
+        parsed = json.loads(output[start:end + 1])
+        
+        scores = {}
+        for key, value in parsed.items():
+            try:
+                netuid = int(key)
+                score = float(value)
+            except (TypeError, ValueError):
+                continue
+            if netuid in netuids:
+                scores[netuid] = max(min(score, 100), -100)
+        return scores
 
     def _extract_sentiment_score(self, output: str) -> float:
         """Extract numerical sentiment score from LLM output"""
@@ -123,16 +391,111 @@ class SentimentService:
     async def get_subnet_sentiment(self, netuid: int) -> SentimentAnalysisResult:
         """
         Get sentiment analysis for a specific subnet
+        Results are cached per netuid; failed lookups are not cached
         """
+        cache_key = cache.get_sentiment_key(netuid)
+        cached_result = await self._cache_get(cache_key)
+        if cached_result:
+            return SentimentAnalysisResult(**cached_result)
+
         # Search for tweets about the subnet
         query = f"Bittensor netuid {netuid}"
-        tweets = await self.search_tweets(query, limit=20)
+        try:
+            tweets = await self._search_tweets(query, limit=20)
+        except Exception as e:
+            logging.error(f"Error searching tweets: {e}")
+            return SentimentAnalysisResult(
+                score=0,
+                tweets_analyzed=0,
+                summary=f"Error searching tweets: {str(e)}"
+            )
 
         # Analyze sentiment
-        sentiment = await self.analyze_sentiment(tweets)
+        if not tweets:
+            sentiment = await self.analyze_sentiment(tweets)
+        else:
+            try:
+                sentiment = await self._analyze_sentiment(tweets)
+            except Exception as e:
+                logging.error(f"Error analyzing sentiment: {e}")
+                return SentimentAnalysisResult(
+                    score=0,
+                    tweets_analyzed=len(tweets),
+                    summary=f"Error analyzing sentiment: {str(e)}"
+                )
+
+        await cache.set(cache_key, sentiment.model_dump(), ttl=self._sentiment_ttl(netuid))
         return sentiment
+    
+    async def get_subnets_sentiment(self, netuids: List[int]) -> Dict[int, SentimentAnalysisResult]:
+        """
+        Get sentiment analysis for several subnets.
+        Cached results are read with one MGET; the rest are searched concurrently
+        (at most SENTIMENT_SEARCH_CONCURRENCY at a time) and scored in bulk.
+        """
+        results: Dict[int, SentimentAnalysisResult] = {}
+        netuids = list(dict.fromkeys(netuids))
+        try:
+            entries = await cache.get_many_with_ttl([cache.get_sentiment_key(netuid) for netuid in netuids])
+        except Exception as e:
+            logging.error(f"Error reading sentiment cache: {e}")
+            entries = [(None, 0)] * len(netuids)
+        
+        missing = []
+        for netuid, (cached_result, soft_ttl) in zip(netuids, entries):
+            if cached_result and soft_ttl > 0:
+                results[netuid] = SentimentAnalysisResult(**cached_result)
+            else:
+                missing.append(netuid)
+        
+        semaphore = asyncio.Semaphore(settings.SENTIMENT_SEARCH_CONCURRENCY)
+        
+        async def search(netuid: int) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self._search_tweets(f"Bittensor netuid {netuid}", limit=20)
+        
+        searched = await asyncio.gather(*[search(netuid) for netuid in missing], return_exceptions=True)
+        tweets_by_netuid = {}
+        for netuid, tweets in zip(missing, searched):
+            if isinstance(tweets, Exception):
+                logging.error(f"Error searching tweets for netuid {netuid}: {tweets}")
+                results[netuid] = SentimentAnalysisResult(
+                    score=0,
+                    tweets_analyzed=0,
+                    summary=f"Error searching tweets: {str(tweets)}"
+                )
+                continue
+            tweets_by_netuid[netuid] = tweets
+        
+        analyzed, failed = await self._analyze_sentiment_bulk(tweets_by_netuid)
+        for netuid, sentiment in analyzed.items():
+            results[netuid] = sentiment
+            if netuid not in failed:
+                await cache.set(cache.get_sentiment_key(netuid), sentiment.model_dump(), ttl=self._sentiment_ttl(netuid))
+        
+        return results
+    
+    def _sentiment_ttl(self, netuid: int) -> int:
+        """
+        Cache TTL for a subnet's sentiment, from SENTIMENT_CACHE_TTL_OVERRIDES if listed.
+        A malformed override falls back to SENTIMENT_CACHE_TTL, so the result is still cached.
+        """
+        for override in settings.SENTIMENT_CACHE_TTL_OVERRIDES.split(","):
+            override_netuid, _, ttl = override.partition(":")
+            if override_netuid.strip() != str(netuid) or not ttl.strip():
+                continue
+            if ttl.strip().isdigit() and int(ttl) > 0:
+                return int(ttl)
+            logging.error(f"Ignoring invalid sentiment TTL override: {override}")
+        return settings.SENTIMENT_CACHE_TTL
+    
+    async def _cache_get(self, key: str) -> Optional[dict]:
+        """Read from cache, treating Redis errors as a miss"""
+        try:
+            return await cache.get(key)
+        except Exception as e:
+            logging.error(f"Error reading sentiment cache: {e}")
+            return None
 
 # Create service instance
-sentiment_service = SentimentService()
-
-
+sentiment_service = SentimentService()
\ No newline at end of file
@@ -0,0 +1,159 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import func, select, update
+
+from app.config import settings
+from app.db import async_session, utcnow, StakeAction
+from app.services.bittensor_service import bittensor_service
+
+# Net amounts smaller than this (in TAO) are treated as zero
+NET_EPSILON = 1e-9
+
+class StakeExecutor:
+    """
+    Executes pending StakeAction rows in batches.
+    Stake and unstake amounts are netted per (netuid, hotkey) and the
+    remaining operations are submitted together, so opposite actions on the
+    same hotkey cancel out instead of each paying for an extrinsic.
+    """
+
+    def __init__(self, session_factory=async_session, service=bittensor_service):
+        self.session_factory = session_factory
+        self.service = service
+
+    async def execute_pending(self, action_ids: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """
+        Claim pending actions (all of them, or only action_ids), submit their
+        net operations and record the outcome.
+        """
+        await self.flag_stale_claims()
+        actions = await self._claim_pending(action_ids)
+        if not actions:
+            return {"success": True, "actions": 0, "operations": 0}
+
+        operations, netted_ids = self.net_actions(actions)
+        action_ids = [action.id for action in actions]
+        submitted_ids = [action_id for action_id in action_ids if action_id not in netted_ids]
+
+        await self._update(netted_ids, status="netted")
+        if not operations:
+            logging.info(f"{len(actions)} pending stake actions netted to zero")
+            return {"success": True, "actions": len(actions), "operations": 0}
+
+        try:
+            result = await self.service.submit_stake_batch(operations)
+        except Exception as e:
+            logging.error(f"Error submitting stake batch: {e}")
+            await self._update(submitted_ids, status="failed")
+            return {
+                "success": False,
+                "actions": len(actions),
+                "operations": len(operations),
+                "error": str(e)
+            }
+
+        transaction_hash = result.get("transaction_hash")
+        # Logged before the status update so a crash in between can still be reconciled
+        logging.info(
+            f"Submitted {len(operations)} stake operations in {transaction_hash} "
+            f"for actions {[str(action_id) for action_id in submitted_ids]}"
+        )
+        await self._update(submitted_ids, status="success", transaction_hash=transaction_hash)
+        return {
+            "success": True,
+            "actions": len(actions),
+            "operations": len(operations),
+            "transaction_hash": transaction_hash,
+            "mock": result.get("mock", False)
+        }
+
+    def net_actions(self, actions: List[StakeAction]) -> Tuple[List[Dict[str, Any]], set]:
+        """
+        Net stake against unstake amounts per (netuid, hotkey).
+        Returns the operations to submit and the ids of actions that cancelled out completely.
+        """
+        net_amounts: Dict[Tuple[int, str], float] = defaultdict(float)
+        action_ids: Dict[Tuple[int, str], List[str]] = defaultdict(list)
+        for action in actions:
+            key = (action.netuid, action.hotkey)
+            sign = 1 if action.action_type == "stake" else -1
+            net_amounts[key] += sign * action.amount
+            action_ids[key].append(action.id)
+
+        operations = []
+        netted_ids = set()
+        for (netuid, hotkey), net_amount in net_amounts.items():
+            if abs(net_amount) < NET_EPSILON:
+                netted_ids.update(action_ids[(netuid, hotkey)])
+                continue
+            operations.append({
+                "action": "stake" if net_amount > 0 else "unstake",
+                "amount": abs(net_amount),
+                "netuid": netuid,
+                "hotkey": hotkey,
+            })
+        return operations, netted_ids
+
+    async def flag_stale_claims(self) -> List[Any]:
+        """
+        Mark actions stuck in processing for over STAKE_CLAIM_TIMEOUT seconds as unreconciled.
+        Their executor died between claiming them and recording the outcome, so whether
+        they were submitted is unknown: they are flagged for reconciliation, never resubmitted.
+        """
+        cutoff = utcnow() - timedelta(seconds=settings.STAKE_CLAIM_TIMEOUT)
+        async with self.session_factory() as session:
+            statement = select(StakeAction.id).where(
+                StakeAction.status == "processing",
+                # Rows claimed before claimed_at existed fall back to their creation time
+                func.coalesce(StakeAction.claimed_at, StakeAction.created_at) < cutoff,
+            )
+            stale_ids = list((await session.execute(statement)).scalars())
+            if stale_ids:
+                await session.execute(
+                    update(StakeAction)
+                    .where(StakeAction.id.in_(stale_ids), StakeAction.status == "processing")
+                    .values(status="unreconciled")
+                )
+                await session.commit()
+        if stale_ids:
+            logging.error(
+                f"{len(stale_ids)} stake actions were stuck in processing, marked unreconciled: "
+                f"{[str(action_id) for action_id in stale_ids]}"
+            )
+        return stale_ids
+
+    async def _claim_pending(self, action_ids: Optional[List[Any]] = None) -> List[StakeAction]:
+        """Mark pending actions as processing so concurrent executors skip them"""
+        async with self.session_factory() as session:
+            statement = (
+                select(StakeAction)
+                .where(StakeAction.status == "pending")
+                .order_by(StakeAction.created_at)
+                .with_for_update(skip_locked=True)
+            )
+            if action_ids is not None:
+                statement = statement.where(StakeAction.id.in_(list(action_ids)))
+            actions = list((await session.execute(statement)).scalars())
+            claimed_at = utcnow()
+            for action in actions:
+                action.status = "processing"
+                action.claimed_at = claimed_at
+            await session.commit()
+            return actions
+
+    async def _update(self, action_ids, **values):
+        """Apply the same field values to a set of actions"""
+        if not action_ids:
+            return
+        async with self.session_factory() as session:
+            await session.execute(
+                update(StakeAction)
+                .where(StakeAction.id.in_(list(action_ids)))
+                .values(**values)
+            )
+            await session.commit()
+
+# Create executor instance
+stake_executor = StakeExecutor()
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.config import settings
+
+# Weight of the newest sample in the per-connection latency average
+LATENCY_EWMA_ALPHA = 0.2
+
+class PooledSubtensor:
+    """One subtensor connection in the pool, with its routing and health state"""
+
+    def __init__(self, endpoint: str, index: int):
+        self.endpoint = endpoint
+        self.index = index
+        self.subtensor = None
+        self.outstanding = 0
+        self.healthy = False
+        self.latency: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._connecting: Optional[asyncio.Task] = None
+        self.stats = {
+            'requests': 0,
+            'errors': 0,
+            'connects': 0,
+        }
+
+    def record_latency(self, latency: float):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_EWMA_ALPHA * (latency - self.latency)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'endpoint': self.endpoint,
+            'connected': self.subtensor is not None,
+            'healthy': self.healthy,
+            'outstanding': self.outstanding,
+            'latency_ms': round(self.latency * 1000, 3) if self.latency is not None else None,
+            'last_error': self.last_error,
+        }
+
+class SubtensorPool:
+    """
+    Pool of subtensor connections spread over one or more RPC endpoints.
+    Each call goes to the healthy connection with the fewest outstanding requests
+    (ties broken by recent latency). A failed connection is dropped and reconnected
+    in the background by the health probe, which also refreshes latencies.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[str],
+        size: int,
+        connect: Callable[[str], Awaitable[Any]],
+        probe_interval: float = None,
+    ):
+        self.connect_fn = connect
+        self.probe_interval = settings.SUBTENSOR_PROBE_INTERVAL if probe_interval is None else probe_interval
+        # Round-robin over endpoints so every endpoint gets a share of the connections
+        self.connections = [
+            PooledSubtensor(endpoints[i % len(endpoints)], i)
+            for i in range(max(size, len(endpoints)))
+        ]
+        self._probe_task: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        """Open every connection; failures are left for the health probe to retry"""
+        await asyncio.gather(*[self._connect(conn) for conn in self.connections], return_exceptions=True)
+        healthy = sum(conn.healthy for conn in self.connections)
+        logging.info(f"Subtensor pool connected {healthy}/{len(self.connections)} connections")
+        if self._probe_task is None and self.probe_interval > 0:
+            self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def _connect(self, conn: PooledSubtensor):
+        """Connect conn, sharing one attempt between concurrent callers"""
+        if conn.subtensor is not None:
+            return
+        if conn._connecting is None:
+            conn._connecting = asyncio.ensure_future(self._open(conn))
+        try:
+            await asyncio.shield(conn._connecting)
+        finally:
+            if conn._connecting is not None and conn._connecting.done():
+                conn._connecting = None
+
+    async def _open(self, conn: PooledSubtensor):
+        try:
+            conn.subtensor = await self.connect_fn(conn.endpoint)
+            conn.healthy = True
+            conn.last_error = None
+            conn.stats['connects'] += 1
+        except Exception as e:
+            conn.healthy = False
+            conn.last_error = str(e)
+            logging.error(f"Error connecting to subtensor {conn.endpoint}: {e}")
+            raise
+
+    async def _drop(self, conn: PooledSubtensor, error: Exception):
+        """Mark conn unhealthy and close its connection so it is reopened"""
+        conn.healthy = False
+        conn.last_error = str(error)
+        subtensor, conn.subtensor = conn.subtensor, None
+        if subtensor is not None:
+            try:
+                await subtensor.close()
+            except Exception as e:
+                logging.error(f"Error closing subtensor {conn.endpoint}: {e}")
+
+    def _pick(self) -> PooledSubtensor:
+        """Least-outstanding-requests choice among healthy connections"""
+        candidates = [conn for conn in self.connections if conn.healthy] or self.connections
+        return min(
+            candidates,
+            key=lambda conn: (conn.outstanding, conn.latency if conn.latency is not None else 0.0)
+        )
+
+    async def run(self, fn: Callable[[Any], Awaitable[Any]]) -> Any:
+        """Run fn(subtensor) on the least busy healthy connection"""
+        conn = self._pick()
+        conn.outstanding += 1
+        conn.stats['requests'] += 1
+        try:
+            await self._connect(conn)
+            started = time.monotonic()
+            result = await fn(conn.subtensor)
+            conn.record_latency(time.monotonic() - started)
+            return result
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            conn.stats['errors'] += 1
+            await self._drop(conn, e)
+            raise
+        finally:
+            conn.outstanding -= 1
+
+    async def probe(self):
+        """Reconnect dropped connections and measure latency on idle healthy ones"""
+        for conn in self.connections:
+            if conn.subtensor is None:
+                try:
+                    await self._connect(conn)
+                except Exception:
+                    continue
+            if conn.outstanding:
+                # Busy connections already report latency from real traffic
+                continue
+            try:
+                started = time.monotonic()
+                await asyncio.wait_for(conn.subtensor.get_current_block(), settings.CHAIN_TIMEOUT_MAX)
+                conn.record_latency(time.monotonic() - started)
+                conn.healthy = True
+            except Exception as e:
+                logging.error(f"Subtensor health probe failed for {conn.endpoint}: {e!r}")
+                await self._drop(conn, e)
+
+    async def _probe_loop(self):
+        """Probe connections until cancelled"""
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            try:
+                await self.probe()
+            except Exception as e:
+                logging.error(f"Error probing subtensor pool: {e}")
+
+    async def close(self):
+        """Stop probing and close every connection"""
+        if self._probe_task:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        for conn in self.connections:
+            subtensor, conn.subtensor = conn.subtensor, None
+            conn.healthy = False
+            if subtensor is not None:
+                try:
+                    await subtensor.close()
+                except Exception as e:
+                    logging.error(f"Error closing subtensor {conn.endpoint}: {e}")
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """Per-connection routing and health counters"""
+        return [conn.get_stats() for conn in self.connections]
@@ -1,12 +1,19 @@
 import os
 import asyncio
 import logging
+import time
+from typing import Optional, List, Tuple
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
-from app.db import async_session, StakeAction
+from app.db import engine, async_session, utcnow, StakeAction
 from app.services.bittensor_service import bittensor_service
 from app.services.sentiment_service import sentiment_service
+from app.services.cache_service import cache
+from app.services.stake_executor import stake_executor
+from app.services.history_service import history_service
+from app.services.retention_service import retention_service
 
 celery_app = Celery(
     "worker",
@@ -20,15 +27,116 @@ celery_app.conf.accept_content = ['json']
 celery_app.conf.task_routes = {'app.worker.*': {'queue': 'bittensor_queue'}}
 celery_app.conf.worker_concurrency = 4
 
-async def run_async_task(coro):
-    """Run async coroutine in a synchronous context"""
-    loop = asyncio.get_event_loop()
-    return await coro
+celery_app.conf.beat_schedule = {}
+if settings.STAKE_BATCHING:
+    celery_app.conf.beat_schedule["execute-pending-stakes"] = {
+        "task": "execute_pending_stakes",
+        "schedule": settings.STAKE_BATCH_WINDOW,
+    }
+if settings.SWEEP_ENABLED:
+    celery_app.conf.beat_schedule["sweep-sentiment-and-stake"] = {
+        "task": "sweep_sentiment_and_stake",
+        "schedule": settings.SWEEP_INTERVAL,
+        # A sweep that is still queued when the next one is due is obsolete
+        "options": {"expires": settings.SWEEP_INTERVAL},
+    }
+if settings.HISTORY_ENABLED:
+    celery_app.conf.beat_schedule["collect-dividend-history"] = {
+        "task": "collect_dividend_history",
+        "schedule": settings.HISTORY_INTERVAL,
+        "options": {"expires": settings.HISTORY_INTERVAL},
+    }
+if settings.RETENTION_ENABLED:
+    celery_app.conf.beat_schedule["apply-audit-retention"] = {
+        "task": "apply_audit_retention",
+        "schedule": settings.RETENTION_INTERVAL,
+        "options": {"expires": settings.RETENTION_INTERVAL},
+    }
+
+# Event loop kept for the life of a worker process (see WORKER_PERSISTENT_LOOP)
+worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+async def open_connections():
+    """Connect the clients shared by all tasks in this worker process"""
+    await cache.init_redis()
+    try:
+        await bittensor_service.init_subtensor()
+    except Exception as e:
+        # Retried lazily by the first task that needs the chain
+        logging.error(f"Error connecting to Bittensor at worker start: {e}")
+
+async def close_connections():
+    """Close every client bound to the current event loop"""
+    await sentiment_service.close()
+    await bittensor_service.close()
+    await cache.close()
+    await engine.dispose()
+
+@worker_process_init.connect
+def init_worker_loop(**kwargs):
+    """Create the worker process's event loop and open long-lived connections"""
+    global worker_loop
+    if not settings.WORKER_PERSISTENT_LOOP:
+        return
+    # Connections inherited from the parent process must not be reused after fork
+    engine.sync_engine.dispose(close=False)
+    worker_loop = asyncio.new_event_loop()
+    worker_loop.run_until_complete(open_connections())
+    logging.info(f"Worker process {os.getpid()} event loop initialized")
+
+@worker_process_shutdown.connect
+def close_worker_loop(**kwargs):
+    """Close long-lived connections and the worker process's event loop"""
+    global worker_loop
+    if worker_loop is None:
+        return
+    loop, worker_loop = worker_loop, None
+    try:
+        loop.run_until_complete(close_connections())
+    finally:
+        loop.close()
+
+def run_async(coro):
+    """
+    Run a coroutine from a synchronous task.
+    Uses the worker process's persistent loop when there is one; otherwise runs
+    on a fresh loop and closes the loop-bound clients afterwards.
+    """
+    if worker_loop is not None:
+        return worker_loop.run_until_complete(coro)
+    
+    async def run_once():
+        try:
+            return await coro
+        finally:
+            await close_connections()
+    
+    return asyncio.run(run_once())
+
+def plan_stake_action(score: float) -> Tuple[str, float]:
+    """Action type and amount for a sentiment score"""
+    amount = abs(score) * 0.01  # 0.01 tao * sentiment score
+    action_type = "stake" if score > 0 else "unstake"
+    return action_type, amount
+
+def parse_sweep_targets(value: str) -> List[Tuple[int, str]]:
+    """Parse SWEEP_TARGETS ("netuid:hotkey,...") into (netuid, hotkey) pairs"""
+    targets = []
+    for item in value.split(","):
+        netuid, _, hotkey = item.strip().partition(":")
+        if not netuid:
+            continue
+        try:
+            targets.append((int(netuid), hotkey.strip() or settings.DEFAULT_HOTKEY))
+        except ValueError:
+            logging.error(f"Ignoring invalid sweep target: {item}")
+    return list(dict.fromkeys(targets)) or [(settings.DEFAULT_NETUID, settings.DEFAULT_HOTKEY)]
 
 @celery_app.task(name="process_sentiment_and_stake")
 def process_sentiment_and_stake(netuid, hotkey):
     """Process sentiment and stake/unstake based on results"""
     logging.info(f"Processing sentiment for netuid {netuid}")
+    started = time.perf_counter()
     
     # Run async tasks
     async def process():
@@ -38,13 +146,12 @@ def process_sentiment_and_stake(netuid, hotkey):
             score = sentiment_result.score
             logging.info(f"Sentiment score for netuid {netuid}: {score}")
             
-            # Calculate stake amount based on sentiment
-            amount = abs(score) * 0.01  # 0.01 tao * sentiment score
+            # Calculate stake amount and action (stake or unstake) based on sentiment
+            action_type, amount = plan_stake_action(score)
             
-            # Determine action (stake or unstake)
-            action_type = "stake" if score > 0 else "unstake"
-            
-            # Create database record
+            # Create database record; an action executed here is claimed up front
+            # so execute_pending (sweeps, batching) never submits it a second time
+            executes_here = not settings.STAKE_BATCHING and amount > 0
             async with async_session() as session:
                 stake_action = StakeAction(
                     action_type=action_type,
@@ -52,13 +159,27 @@ def process_sentiment_and_stake(netuid, hotkey):
                     hotkey=hotkey,
                     amount=amount,
                     sentiment_score=score,
-                    status="pending"
+                    status="processing" if executes_here else "pending",
+                    claimed_at=utcnow() if executes_here else None
                 )
                 session.add(stake_action)
                 await session.commit()
                 await session.refresh(stake_action)
                 action_id = stake_action.id
             
+            # Leave the action to execute_pending_stakes, which nets and batches it
+            if settings.STAKE_BATCHING:
+                return {
+                    "success": True,
+                    "action": action_type,
+                    "amount": amount,
+                    "sentiment_score": score,
+                    "netuid": netuid,
+                    "hotkey": hotkey,
+                    "status": "pending",
+                    "stake_action_id": str(action_id)
+                }
+            
             # Perform stake/unstake action
             try:
                 if action_type == "stake" and amount > 0:
@@ -69,6 +190,9 @@ def process_sentiment_and_stake(netuid, hotkey):
                     logging.info(f"No action required for sentiment score {score}")
                     return {"success": True, "action": "none", "sentiment_score": score}
                 
+                # Logged before the status update so a crash in between can still be reconciled
+                logging.info(f"Submitted {action_type} for action {action_id}: {result.get('transaction_hash')}")
+                
                 # Update database record
                 async with async_session() as session:
                     stake_action = await session.get(StakeAction, action_id)
@@ -110,6 +234,100 @@ def process_sentiment_and_stake(netuid, hotkey):
             logging.error(f"Error in sentiment processing: {e}")
             return {"success": False, "error": str(e)}
     
-    return asyncio.run(process())
+    result = run_async(process())
+    duration_ms = (time.perf_counter() - started) * 1000
+    logging.info(f"process_sentiment_and_stake for netuid {netuid} took {duration_ms:.1f} ms")
+    result["duration_ms"] = duration_ms
+    return result
+
+@celery_app.task(name="execute_pending_stakes")
+def execute_pending_stakes():
+    """Net pending stake actions per netuid/hotkey and submit them together"""
+    return run_async(stake_executor.execute_pending())
+
+async def run_sweep(targets: List[Tuple[int, str]]) -> dict:
+    """
+    Score sentiment for every target subnet and record the resulting stake actions.
+    Sentiment comes from the cache where possible; the remaining tweet searches run
+    concurrently and are scored in bulk. Actions are inserted in chunks and then
+    either left to execute_pending_stakes (STAKE_BATCHING) or executed here.
+    """
+    stages = {}
+    
+    started = time.perf_counter()
+    netuids = list(dict.fromkeys(netuid for netuid, _ in targets))
+    sentiments = await sentiment_service.get_subnets_sentiment(netuids)
+    stages["sentiment_ms"] = (time.perf_counter() - started) * 1000
+    
+    started = time.perf_counter()
+    actions = []
+    for netuid, hotkey in targets:
+        score = sentiments[netuid].score
+        action_type, amount = plan_stake_action(score)
+        if amount <= 0:
+            continue
+        actions.append(StakeAction(
+            action_type=action_type,
+            netuid=netuid,
+            hotkey=hotkey,
+            amount=amount,
+            sentiment_score=score,
+            status="pending"
+        ))
+    chunk_size = max(settings.SWEEP_CHUNK_SIZE, 1)
+    for start in range(0, len(actions), chunk_size):
+        async with async_session() as session:
+            session.add_all(actions[start:start + chunk_size])
+            await session.commit()
+    stages["enqueue_ms"] = (time.perf_counter() - started) * 1000
+    
+    execution = None
+    if actions and not settings.STAKE_BATCHING:
+        started = time.perf_counter()
+        # Only this sweep's actions: other pending rows belong to their own tasks
+        execution = await stake_executor.execute_pending([action.id for action in actions])
+        stages["execute_ms"] = (time.perf_counter() - started) * 1000
+    
+    return {
+        "success": execution is None or execution.get("success", False),
+        "targets": len(targets),
+        "subnets": len(netuids),
+        "actions": len(actions),
+        "execution": execution,
+        "stages": stages,
+    }
+
+@celery_app.task(name="sweep_sentiment_and_stake")
+def sweep_sentiment_and_stake():
+    """Periodic sentiment sweep over SWEEP_TARGETS"""
+    targets = parse_sweep_targets(settings.SWEEP_TARGETS)
+    started = time.perf_counter()
+    try:
+        result = run_async(run_sweep(targets))
+    except Exception as e:
+        logging.error(f"Error in sentiment sweep: {e}")
+        result = {"success": False, "targets": len(targets), "error": str(e)}
+    
+    duration_ms = (time.perf_counter() - started) * 1000
+    result["duration_ms"] = duration_ms
+    result["overran"] = duration_ms > settings.SWEEP_INTERVAL * 1000
+    logging.info(f"Sentiment sweep over {len(targets)} targets took {duration_ms:.1f} ms: {result.get('stages')}")
+    if result["overran"]:
+        logging.warning(f"Sentiment sweep took longer than SWEEP_INTERVAL ({settings.SWEEP_INTERVAL}s)")
+    return result
 
+@celery_app.task(name="collect_dividend_history")
+def collect_dividend_history():
+    """Sample dividends of the HISTORY_NETUIDS subnets into the history table"""
+    return run_async(history_service.collect())
 
+@celery_app.task(name="apply_audit_retention")
+def apply_audit_retention():
+    """Roll tao_dividend_queries up into hourly aggregates and prune expired rows"""
+    try:
+        result = run_async(retention_service.run())
+    except Exception as e:
+        logging.error(f"Error applying audit retention: {e}")
+        return {"success": False, "error": str(e)}
+    logging.info(f"Audit retention: {result}")
+    return result
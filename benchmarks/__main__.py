@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from dataclasses import replace
+
+from benchmarks.harness import SCENARIOS, run_scenario, load_baselines, save_baselines, compare, compare_timings
+
+DEFAULT_BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Load-test the TAO dividends API against local stand-ins",
+    )
+    parser.add_argument("scenarios", nargs="*", metavar="scenario", help=f"One of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--users", type=int, help="Concurrent virtual users")
+    parser.add_argument("--requests", type=int, help="Total requests per scenario")
+    parser.add_argument("--chain-latency", type=float, help="Seconds each mock chain query takes")
+    parser.add_argument("--chain-jitter", type=float, default=0.0, help="Extra random chain latency, in seconds")
+    parser.add_argument("--redis-url", help="Use a local Redis server instead of an in-memory one (flushed first)")
+    parser.add_argument("--database-url", default="sqlite+aiosqlite://", help="Async SQLAlchemy URL for audit rows")
+    parser.add_argument("--no-write-behind", action="store_true", help="Commit audit rows on the request path")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baselines", default=DEFAULT_BASELINES)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results' counts as the new baselines")
+    parser.add_argument("--save-timings", metavar="PATH", help="Store these results with timings, for --check-timings on this machine")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero if errors, chain queries or the hit ratio regressed")
+    parser.add_argument("--check-timings", metavar="PATH", help="With --check, also compare timings against ones saved on this machine")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative slowdown for --check-timings")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    args.scenarios = args.scenarios or list(SCENARIOS)
+    return args
+
+async def main(args) -> int:
+    results = []
+    for name in args.scenarios:
+        scenario = SCENARIOS[name]
+        overrides = {
+            key: value for key, value in (
+                ("users", args.users),
+                ("requests", args.requests),
+                ("chain_latency", args.chain_latency),
+            ) if value is not None
+        }
+        result = await run_scenario(
+            replace(scenario, **overrides),
+            seed=args.seed,
+            chain_jitter=args.chain_jitter,
+            redis_url=args.redis_url,
+            database_url=args.database_url,
+            write_behind=not args.no_write_behind,
+        )
+        results.append(result)
+        print(
+            f"{result.scenario:<12} users={result.users:<4} requests={result.requests:<6} "
+            f"rps={result.rps:<9} p50={result.p50_ms:.2f}ms p95={result.p95_ms:.2f}ms "
+            f"p99={result.p99_ms:.2f}ms hits={result.cache_hits} misses={result.cache_misses} "
+            f"chain_queries={result.chain_queries} errors={result.errors}"
+        )
+
+    if args.save_baseline:
+        save_baselines(args.baselines, results)
+        print(f"Saved baselines to {args.baselines}")
+    if args.save_timings:
+        save_baselines(args.save_timings, results, timings=True)
+        print(f"Saved timings to {args.save_timings}")
+
+    if args.check:
+        baselines = load_baselines(args.baselines)
+        timings = load_baselines(args.check_timings) if args.check_timings else {}
+        failed = False
+        for result in results:
+            if result.scenario not in baselines:
+                print(f"{result.scenario}: no baseline, skipped")
+                continue
+            regressions = compare(result, baselines[result.scenario])
+            if result.scenario in timings:
+                regressions += compare_timings(result, timings[result.scenario], args.tolerance)
+            for regression in regressions:
+                print(f"{result.scenario}: REGRESSION {regression}")
+            failed = failed or bool(regressions)
+        return 1 if failed else 0
+    return 0
+
+if __name__ == "__main__":
+    # app.main configures INFO logging on import; per-request logs would dominate the run
+    logging.getLogger().setLevel(logging.WARNING)
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,294 @@
+import asyncio
+import json
+import math
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Optional, Tuple
+from unittest.mock import patch, MagicMock
+
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+
+from app.config import settings
+from app.db import get_db_session
+from app.main import app
+from app.services import audit_service as audit_module
+from app.services import bittensor_service as bittensor_module
+from app.services.audit_service import audit_service
+from app.services.bittensor_service import bittensor_service
+from app.services.cache_service import cache, LRUCache
+
+class MockAsyncSubtensor:
+    """
+    Stand-in for AsyncSubtensor with injectable latency.
+    Counts chain queries so coalescing and caching show up in the results.
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, block: int = 1000):
+        self.latency = latency
+        self.jitter = jitter
+        self.block = block
+        self.queries = 0
+
+    async def _wait(self):
+        delay = self.latency + random.uniform(0, self.jitter) if self.jitter else self.latency
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def query_tao_dividends_per_subnet(self, netuid: int, hotkey: str, block: Optional[int] = None) -> float:
+        self.queries += 1
+        await self._wait()
+        return float(netuid * 1000 + len(hotkey))
+
+    async def get_current_block(self) -> int:
+        return self.block
+
+    async def close(self):
+        pass
+
+@dataclass
+class Scenario:
+    """A load profile: how many virtual users hit which keys, and how often"""
+    name: str
+    users: int = 20
+    requests: int = 1000
+    keys: int = 100
+    # Share of requests going to the hottest 10% of keys
+    hot_share: float = 0.0
+    warm: bool = False
+    chain_latency: float = 0.05
+
+SCENARIOS = {
+    # Every request is answered from a pre-warmed cache
+    "cache_hit": Scenario("cache_hit", keys=10, warm=True),
+    # Every request misses and goes to the (simulated) chain
+    "cache_miss": Scenario("cache_miss", keys=1_000_000),
+    # Skewed traffic over a cold cache: hot keys fill quickly, the tail keeps missing
+    "mixed": Scenario("mixed", keys=500, hot_share=0.8),
+}
+
+@dataclass
+class BenchmarkResult:
+    scenario: str
+    users: int
+    requests: int
+    errors: int
+    duration_s: float
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    cache_hits: int
+    cache_misses: int
+    chain_queries: int
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.cache_hits + self.cache_misses
+        return self.cache_hits / total if total else 0.0
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+def pick_key(rng: random.Random, scenario: Scenario) -> int:
+    """Index of the key the next request asks for"""
+    hot_keys = max(scenario.keys // 10, 1)
+    if scenario.hot_share and rng.random() < scenario.hot_share:
+        return rng.randrange(hot_keys)
+    return rng.randrange(scenario.keys)
+
+def key_pair(index: int) -> Tuple[int, str]:
+    """Deterministic (netuid, hotkey) pair for a key index"""
+    return index % 64, f"5Bench{index:010d}"
+
+def make_redis(redis_url: Optional[str]):
+    """Redis client for the run: a local server when given, otherwise in memory"""
+    if redis_url:
+        import redis.asyncio as aioredis
+        return aioredis.from_url(redis_url, decode_responses=False)
+    try:
+        import fakeredis.aioredis
+        return fakeredis.aioredis.FakeRedis(decode_responses=False)
+    except ImportError:
+        from tests.mock_redis import MockRedis
+        return MockRedis()
+
+@asynccontextmanager
+async def benchmark_environment(
+    chain_latency: float = 0.05,
+    chain_jitter: float = 0.0,
+    redis_url: Optional[str] = None,
+    database_url: str = "sqlite+aiosqlite://",
+    write_behind: bool = True,
+):
+    """
+    Wire the app to local stand-ins: a mock AsyncSubtensor, an in-memory or
+    local Redis, and SQLite or a local Postgres. Yields the mock subtensor.
+    """
+    if database_url.startswith("sqlite"):
+        engine = create_async_engine(database_url, poolclass=StaticPool)
+    else:
+        engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    subtensor = MockAsyncSubtensor(chain_latency, chain_jitter)
+    redis_client = make_redis(redis_url)
+    if redis_url:
+        await redis_client.flushdb()
+
+    saved = (cache.redis, cache.l1, cache.stats.copy(), bittensor_service.async_subtensor)
+    app.dependency_overrides[get_db_session] = override_get_db
+    cache.redis = redis_client
+    # Fresh L1 so earlier runs do not turn misses into hits
+    cache.l1 = LRUCache(settings.CACHE_L1_MAX_SIZE, settings.CACHE_L1_TTL) if cache.l1 is not None else None
+    cache.stats = dict.fromkeys(cache.stats, 0)
+    bittensor_service.async_subtensor = subtensor
+
+    with patch.object(bittensor_module, "BITTENSOR_AVAILABLE", True), \
+         patch.object(audit_module, "async_session", session_factory), \
+         patch("app.api.tao_dividends.celery_app.send_task", MagicMock()):
+        if write_behind:
+            audit_service.start()
+        try:
+            yield subtensor
+        finally:
+            await audit_service.stop()
+            app.dependency_overrides.pop(get_db_session, None)
+            if redis_url:
+                await redis_client.aclose()
+            cache.redis, cache.l1, cache.stats, bittensor_service.async_subtensor = saved
+            await engine.dispose()
+
+async def warm_cache(scenario: Scenario):
+    """Prime every key the scenario will ask for"""
+    for index in range(scenario.keys):
+        netuid, hotkey = key_pair(index)
+        await bittensor_service.get_tao_dividends(netuid, hotkey)
+
+async def run_scenario(scenario: Scenario, seed: int = 0, **environment) -> BenchmarkResult:
+    """Drive the app with scenario.users concurrent virtual users and collect latencies"""
+    environment.setdefault("chain_latency", scenario.chain_latency)
+    async with benchmark_environment(**environment) as subtensor:
+        if scenario.warm:
+            await warm_cache(scenario)
+        cache.stats = dict.fromkeys(cache.stats, 0)
+        subtensor.queries = 0
+
+        headers = {"Authorization": f"Bearer {settings.API_TOKEN}"}
+        latencies: List[float] = []
+        errors = 0
+        cached = 0
+        remaining = scenario.requests
+
+        async def virtual_user(client: httpx.AsyncClient, rng: random.Random):
+            nonlocal remaining, errors, cached
+            while remaining > 0:
+                remaining -= 1
+                netuid, hotkey = key_pair(pick_key(rng, scenario))
+                started = time.perf_counter()
+                response = await client.get(
+                    "/api/v1/tao_dividends",
+                    params={"netuid": netuid, "hotkey": hotkey},
+                    headers=headers,
+                )
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+                elif response.json().get("cached"):
+                    cached += 1
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            started = time.perf_counter()
+            await asyncio.gather(*[
+                virtual_user(client, random.Random(seed + user))
+                for user in range(scenario.users)
+            ])
+            duration = time.perf_counter() - started
+
+        latencies_ms = [latency * 1000 for latency in latencies]
+        return BenchmarkResult(
+            scenario=scenario.name,
+            users=scenario.users,
+            requests=len(latencies),
+            errors=errors,
+            duration_s=round(duration, 3),
+            rps=round(len(latencies) / duration, 1) if duration else 0.0,
+            p50_ms=round(percentile(latencies_ms, 50), 3),
+            p95_ms=round(percentile(latencies_ms, 95), 3),
+            p99_ms=round(percentile(latencies_ms, 99), 3),
+            mean_ms=round(sum(latencies_ms) / len(latencies_ms), 3) if latencies_ms else 0.0,
+            cache_hits=cached,
+            cache_misses=len(latencies) - cached - errors,
+            chain_queries=subtensor.queries,
+            extra={"cache": cache.get_stats(), "coalescing": bittensor_service.get_coalescing_stats()},
+        )
+
+# Baseline fields that hardly depend on the machine, and the timing fields that do
+COUNT_FIELDS = ("users", "requests", "errors", "cache_hits", "cache_misses", "chain_queries")
+TIMING_FIELDS = ("rps", "p50_ms", "p95_ms", "p99_ms", "mean_ms")
+
+def load_baselines(path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_baselines(path: str, results: List[BenchmarkResult], timings: bool = False):
+    """Store each scenario's counts, and its timings too when timings is set"""
+    fields = COUNT_FIELDS + TIMING_FIELDS if timings else COUNT_FIELDS
+    baselines = load_baselines(path)
+    for result in results:
+        baselines[result.scenario] = {name: getattr(result, name) for name in fields}
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def compare(result: BenchmarkResult, baseline: Dict[str, Any]) -> List[str]:
+    """
+    Regressions of result against a stored baseline, on metrics that barely depend
+    on the machine: errors, chain queries and the cache hit ratio.
+    """
+    regressions = []
+    if result.errors > baseline.get("errors", 0):
+        regressions.append(f"errors {result.errors} > {baseline['errors']}")
+    # Coalescing depends on scheduling, so allow a little noise before flagging lost deduplication
+    if "chain_queries" in baseline and result.chain_queries > baseline["chain_queries"] * 1.1 + 1:
+        regressions.append(f"chain_queries {result.chain_queries} > {baseline['chain_queries']}")
+    baseline_hits = baseline.get("cache_hits", 0)
+    baseline_total = baseline_hits + baseline.get("cache_misses", 0)
+    if baseline_total and result.hit_ratio < baseline_hits / baseline_total - 0.05:
+        regressions.append(f"hit_ratio {result.hit_ratio:.2f} < {baseline_hits / baseline_total:.2f}")
+    return regressions
+
+def compare_timings(result: BenchmarkResult, baseline: Dict[str, Any], tolerance: float = 0.5) -> List[str]:
+    """
+    Latency and throughput regressions beyond a relative tolerance.
+    Only meaningful against timings recorded on the same machine.
+    """
+    regressions = []
+    for metric in ("p50_ms", "p95_ms", "p99_ms"):
+        if metric in baseline and getattr(result, metric) > baseline[metric] * (1 + tolerance):
+            regressions.append(f"{metric} {getattr(result, metric)} > {baseline[metric]} (+{tolerance:.0%})")
+    if "rps" in baseline and result.rps < baseline["rps"] * (1 - tolerance):
+        regressions.append(f"rps {result.rps} < {baseline['rps']} (-{tolerance:.0%})")
+    return regressions
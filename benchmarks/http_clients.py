@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+from benchmarks.harness import make_redis
+from app.services.cache_service import cache
+from app.services.sentiment_service import SentimentService
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers Datura searches and Chutes runs like the real APIs, over keep-alive HTTP/1.1"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    counter = itertools.count()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/twitter/search":
+            # A new tweet every time, so the LLM result cache never answers for the stub
+            body = {"data": [{"id": "1", "text": f"Bittensor update {next(self.counter)}"}]}
+        else:
+            body = {"output": "42"}
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+@contextmanager
+def stub_server() -> Iterator[str]:
+    """Run the stub API on a free local port and yield its base URL"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+@dataclass
+class ClientResult:
+    mode: str
+    runs: int
+    requests: int
+    connections_opened: int
+    handshake_ms: float
+    duration_s: float
+
+async def run_sentiment(base_url: str, runs: int = 200, pooled: bool = True) -> ClientResult:
+    """
+    Search tweets and score them runs times against the stub.
+    Unpooled runs close the service's clients after every call, which is how
+    each call used to get its own AsyncClient.
+    """
+    service = SentimentService()
+    service.datura_base_url = service.chutes_base_url = base_url
+    saved_redis = cache.redis
+    cache.redis = make_redis(None)
+    started = time.perf_counter()
+    try:
+        for run in range(runs):
+            tweets = await service.search_tweets(f"Bittensor netuid {run}")
+            if not pooled:
+                await service.close()
+            await service.analyze_sentiment(tweets)
+            if not pooled:
+                await service.close()
+    finally:
+        duration = time.perf_counter() - started
+        await service.close()
+        cache.redis = saved_redis
+
+    stats = service.get_http_stats().values()
+    return ClientResult(
+        mode="pooled" if pooled else "per_call",
+        runs=runs,
+        requests=int(sum(upstream["requests"] for upstream in stats)),
+        connections_opened=int(sum(upstream["connections_opened"] for upstream in stats)),
+        handshake_ms=round(sum(upstream["handshake_ms"] for upstream in stats), 2),
+        duration_s=round(duration, 3),
+    )
+
+async def main(args) -> int:
+    with stub_server() as base_url:
+        for pooled in (False, True):
+            result = await run_sentiment(base_url, runs=args.runs, pooled=pooled)
+            print(
+                f"{result.mode:<9} runs={result.runs:<6} requests={result.requests:<6} "
+                f"connections={result.connections_opened:<6} handshake={result.handshake_ms:.1f}ms "
+                f"duration={result.duration_s:.2f}s"
+            )
+    return 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.http_clients",
+        description="Connections and handshake time for sentiment calls, per-call clients vs pooled",
+    )
+    parser.add_argument("--runs", type=int, default=200, help="Search + analysis runs per mode")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,161 @@
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional
+
+from sqlalchemy import (
+    MetaData, Table, Column, Index, String, Integer, Float, Boolean, DateTime, Uuid, insert, text,
+)
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db import uuid7, utcnow
+
+@dataclass
+class KeySchema:
+    """A primary key layout for tao_dividend_queries"""
+    name: str
+    id_type: Any
+    new_id: Callable[[], Any]
+    new_timestamp: Callable[[], datetime]
+    indexed: bool
+
+SCHEMAS = {
+    # The schema before compact keys: random uuid4 strings, no secondary index
+    "varchar_uuid4": KeySchema("varchar_uuid4", String, lambda: str(uuid.uuid4()), datetime.utcnow, False),
+    # Native uuid column but random keys, to separate key size from key order
+    "uuid4": KeySchema("uuid4", Uuid, uuid.uuid4, utcnow, True),
+    # The current schema
+    "uuid7": KeySchema("uuid7", Uuid, uuid7, utcnow, True),
+}
+
+@dataclass
+class InsertResult:
+    schema: str
+    rows: int
+    batch_size: int
+    duration_s: float
+    rows_per_s: float
+    index_bytes: Optional[int] = None
+
+def make_table(metadata: MetaData, schema: KeySchema) -> Table:
+    """A throwaway copy of tao_dividend_queries with the given key layout"""
+    name = f"bench_queries_{schema.name}"
+    table = Table(
+        name, metadata,
+        Column("id", schema.id_type, primary_key=True),
+        Column("netuid", Integer, nullable=False),
+        Column("hotkey", String, nullable=False),
+        Column("dividend", Float, nullable=False),
+        Column("from_cache", Boolean, nullable=False),
+        Column("created_at", DateTime(timezone=True)),
+    )
+    if schema.indexed:
+        Index(f"ix_{name}_netuid_hotkey_created_at", table.c.netuid, table.c.hotkey, table.c.created_at)
+    return table
+
+def make_rows(schema: KeySchema, count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": schema.new_id(),
+            "netuid": rng.randrange(64),
+            "hotkey": f"5Bench{rng.randrange(10_000):010d}",
+            "dividend": rng.random() * 1000,
+            "from_cache": False,
+            "created_at": schema.new_timestamp(),
+        }
+        for _ in range(count)
+    ]
+
+async def run_inserts(
+    schema: KeySchema,
+    rows: int = 50_000,
+    batch_size: int = 500,
+    database_url: str = "sqlite+aiosqlite://",
+    seed: int = 0,
+) -> InsertResult:
+    """
+    Insert rows in batches of batch_size, the way the audit write-behind flushes,
+    and time the whole run. The table is dropped again afterwards.
+    """
+    if database_url.startswith("sqlite"):
+        engine = create_async_engine(database_url, poolclass=StaticPool)
+    else:
+        engine = create_async_engine(database_url)
+    metadata = MetaData()
+    table = make_table(metadata, schema)
+    rng = random.Random(seed)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.drop_all)
+            await conn.run_sync(metadata.create_all)
+
+        duration = 0.0
+        for start in range(0, rows, batch_size):
+            # Ids and timestamps are generated per batch, as the app does per request
+            batch = make_rows(schema, min(batch_size, rows - start), rng)
+            started = time.perf_counter()
+            async with engine.begin() as conn:
+                await conn.execute(insert(table), batch)
+            duration += time.perf_counter() - started
+
+        index_bytes = None
+        if engine.dialect.name == "postgresql":
+            async with engine.connect() as conn:
+                index_bytes = await conn.scalar(text(f"SELECT pg_indexes_size('{table.name}')"))
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.drop_all)
+        await engine.dispose()
+
+    return InsertResult(
+        schema=schema.name,
+        rows=rows,
+        batch_size=batch_size,
+        duration_s=round(duration, 3),
+        rows_per_s=round(rows / duration, 1) if duration else 0.0,
+        index_bytes=index_bytes,
+    )
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.inserts",
+        description="Compare audit insert throughput across primary key layouts",
+    )
+    parser.add_argument("schemas", nargs="*", metavar="schema", help=f"One of {', '.join(SCHEMAS)} (default: all)")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--database-url", default="sqlite+aiosqlite://", help="Async SQLAlchemy URL, e.g. a local Postgres")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    unknown = set(args.schemas) - set(SCHEMAS)
+    if unknown:
+        parser.error(f"unknown schemas: {', '.join(sorted(unknown))}")
+    args.schemas = args.schemas or list(SCHEMAS)
+    return args
+
+async def main(args) -> int:
+    for name in args.schemas:
+        result = await run_inserts(
+            SCHEMAS[name],
+            rows=args.rows,
+            batch_size=args.batch_size,
+            database_url=args.database_url,
+            seed=args.seed,
+        )
+        line = (
+            f"{result.schema:<14} rows={result.rows:<8} batch={result.batch_size:<5} "
+            f"duration={result.duration_s:.2f}s rows/s={result.rows_per_s}"
+        )
+        if result.index_bytes is not None:
+            line += f" index_size={result.index_bytes / 1024 / 1024:.1f}MiB"
+        print(line)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,91 @@
+import argparse
+import sys
+import time
+import timeit
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+from pydantic import TypeAdapter
+
+from app.models import TaoDividendResponse
+from app.responses import FastJSONResponse
+from app.services.cache_service import get_serializer, SOFT_EXPIRY_FIELD
+
+ENTRY = {
+    "netuid": 18,
+    "hotkey": "5FFApaS75bv5pJHfZkqPmBzlVZ7UE1qfGiI8nsSMq4q8WUWQ",
+    "dividend": 12345.67,
+    "cached": False,
+    "block": 4_500_000,
+    SOFT_EXPIRY_FIELD: 1_700_000_000.0,
+}
+
+def per_call_us(fn: Callable[[], Any], number: int) -> float:
+    """CPU microseconds per call of fn"""
+    timer = timeit.Timer(fn, timer=time.process_time)
+    return min(timer.repeat(repeat=3, number=number)) / number * 1e6
+
+def serializer_costs(number: int) -> Dict[str, float]:
+    """Encode + decode cost of one cache entry per available serializer"""
+    costs = {}
+    for name in ("json", "orjson", "msgpack"):
+        serializer = get_serializer(name)
+        if serializer.name != name:
+            continue
+        data = serializer.dumps(ENTRY)
+        costs[f"cache_{name}_dumps"] = per_call_us(lambda: serializer.dumps(ENTRY), number)
+        costs[f"cache_{name}_loads"] = per_call_us(lambda: serializer.loads(data), number)
+    return costs
+
+def response_costs(number: int) -> Dict[str, float]:
+    """Building and rendering one dividend response, with and without the response model"""
+    adapter = TypeAdapter(TaoDividendResponse)
+    result = dict(ENTRY, cached=True)
+
+    def model_path():
+        # What FastAPI does for a response_model route: build, re-validate, dump to bytes
+        response = TaoDividendResponse(
+            netuid=result["netuid"], hotkey=result["hotkey"], dividend=result["dividend"],
+            cached=result["cached"], block=result["block"],
+        )
+        return adapter.dump_json(adapter.validate_python(response))
+
+    def fast_path():
+        return FastJSONResponse({
+            "netuid": result["netuid"], "hotkey": result["hotkey"], "dividend": float(result["dividend"]),
+            "cached": True, "stake_tx_triggered": False, "stake_task_id": None, "trade_status": None,
+            "block": result["block"], "stale": False, "timestamp": datetime.utcnow(),
+        }).body
+
+    return {
+        "response_model_path": per_call_us(model_path, number),
+        "response_fast_path": per_call_us(fast_path, number),
+    }
+
+def main(args) -> int:
+    costs = {**serializer_costs(args.number), **response_costs(args.number)}
+    for name, cost in costs.items():
+        print(f"{name:<24} {cost:8.2f} us")
+
+    # A cache hit decodes one entry and renders one response
+    before = costs["cache_json_loads"] + costs["response_model_path"]
+    after = costs[f"cache_{args.serializer}_loads"] + costs["response_fast_path"]
+    print(f"{'cache hit before':<24} {before:8.2f} us  (json, response model)")
+    print(f"{'cache hit after':<24} {after:8.2f} us  ({args.serializer}, fast path)")
+    print(f"{'saved per cache hit':<24} {before - after:8.2f} us  ({(before - after) / before:.0%})")
+    return 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.serialization",
+        description="Per-request CPU spent on cache and response serialization",
+    )
+    parser.add_argument("--number", type=int, default=20_000, help="Calls per component measurement")
+    parser.add_argument("--serializer", default="orjson", choices=["json", "orjson", "msgpack"])
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if get_serializer(args.serializer).name != args.serializer:
+        sys.exit(f"{args.serializer} is not installed")
+    sys.exit(main(args))
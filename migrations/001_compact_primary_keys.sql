@@ -0,0 +1,24 @@
+-- Move stake_actions and tao_dividend_queries from VARCHAR uuid4 keys to native
+-- uuid keys and add the indexes the app queries by. New tables created by
+-- init_db() already have this schema; run this once against a database created
+-- before the change:
+--
+--   psql -d <database> -f migrations/001_compact_primary_keys.sql
+--
+-- Existing ids are valid UUID strings and cast in place; new rows get
+-- time-ordered UUIDv7 ids from the application, so old rows are unaffected.
+-- Each ALTER rewrites its table under an exclusive lock: run it in a quiet
+-- window, or stop the API and workers first.
+
+BEGIN;
+
+ALTER TABLE stake_actions ALTER COLUMN id TYPE uuid USING id::uuid;
+ALTER TABLE tao_dividend_queries ALTER COLUMN id TYPE uuid USING id::uuid;
+
+COMMIT;
+
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_stake_actions_status_created_at
+    ON stake_actions (status, created_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tao_dividend_queries_netuid_hotkey_created_at
+    ON tao_dividend_queries (netuid, hotkey, created_at);
@@ -0,0 +1,7 @@
+-- Time index used by the audit retention job (RETENTION_ENABLED). The
+-- tao_dividend_query_rollups table itself is created by init_db() on startup.
+--
+--   psql -d <database> -f migrations/002_audit_retention.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tao_dividend_queries_created_at_brin
+    ON tao_dividend_queries USING brin (created_at);
@@ -0,0 +1,6 @@
+-- When a stake action was claimed for execution. The stake executor marks
+-- actions left in "processing" past STAKE_CLAIM_TIMEOUT as "unreconciled".
+--
+--   psql -d <database> -f migrations/003_stake_action_claims.sql
+
+ALTER TABLE stake_actions ADD COLUMN IF NOT EXISTS claimed_at timestamp with time zone;
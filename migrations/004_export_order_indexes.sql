@@ -0,0 +1,10 @@
+-- Indexes matching the (created_at, id) order of /exports, so exports stream
+-- from an index scan instead of sorting every matching row first.
+--
+--   psql -d <database> -f migrations/004_export_order_indexes.sql
+
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_stake_actions_created_at_id
+    ON stake_actions (created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tao_dividend_queries_created_at_id
+    ON tao_dividend_queries (created_at, id);
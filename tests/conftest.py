@@ -1,5 +1,6 @@
 import sys
 import pytest
+import pytest_asyncio
 import asyncio
 from unittest.mock import patch, AsyncMock, MagicMock
 import os
@@ -9,6 +10,10 @@ os.environ["PYTEST_CURRENT_TEST"] = "True"
 
 # Now import app modules
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
 from app.main import app
 from app.config import settings
 from app.db import get_db_session, async_session
@@ -26,11 +31,21 @@ def test_db_session():
     """Create a test database session with a mock."""
     mock_session = AsyncMock()
     mock_session.add = AsyncMock()
+    mock_session.add_all = MagicMock()
     mock_session.commit = AsyncMock()
     mock_session.refresh = AsyncMock()
     mock_session.get = AsyncMock()
     return mock_session
 
+@pytest_asyncio.fixture
+async def session_factory():
+    """In-memory SQLite database with the app's tables."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
 @pytest.fixture
 def override_get_db(test_db_session):
     """Override the get_db dependency to use the test session."""
@@ -1,23 +1,109 @@
+import time
 from unittest.mock import AsyncMock, MagicMock
 
 # Create a mock Redis class
 class MockRedis:
     def __init__(self):
         self.data = {}
+        self.expiry = {}
+        self.published = []
+        
+    def _expire(self, key):
+        expires_at = self.expiry.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.data.pop(key, None)
+            self.expiry.pop(key, None)
         
     async def get(self, key):
+        self._expire(key)
         if key in self.data:
             return self.data[key]
         return None
         
-    async def set(self, key, value, ex=None):
+    async def set(self, key, value, ex=None, nx=False):
+        self._expire(key)
+        if nx and key in self.data:
+            return None
         self.data[key] = value
+        if ex is not None:
+            self.expiry[key] = time.monotonic() + ex
+        else:
+            self.expiry.pop(key, None)
         return True
         
     async def delete(self, key):
         if key in self.data:
             del self.data[key]
+        self.expiry.pop(key, None)
         return True
+    
+    async def mget(self, keys):
+        return [await self.get(key) for key in keys]
+    
+    async def exists(self, key):
+        self._expire(key)
+        return int(key in self.data)
+    
+    async def pttl(self, key):
+        self._expire(key)
+        if key not in self.data:
+            return -2
+        if key not in self.expiry:
+            return -1
+        return int((self.expiry[key] - time.monotonic()) * 1000)
+    
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+    
+    def pipeline(self, transaction=True):
+        return MockPipeline(self)
+    
+    def register_script(self, script):
+        return MockRateLimitScript(self)
+
+class MockRateLimitScript:
+    """Python version of the cache's token bucket rate limit script"""
+    def __init__(self, redis):
+        self.registered_client = redis
+        self.buckets = {}
+    
+    async def __call__(self, keys=(), args=()):
+        capacity, window_ms = args
+        rate = capacity / window_ms
+        now = time.monotonic() * 1000
+        tokens, ts = self.buckets.get(keys[0], (capacity, now))
+        tokens = min(capacity, tokens + max(0, now - ts) * rate)
+        if tokens >= 1:
+            self.buckets[keys[0]] = (tokens - 1, now)
+            return [1, int(tokens - 1), 0]
+        self.buckets[keys[0]] = (tokens, now)
+        return [0, int(tokens), int((1 - tokens) / rate) + 1]
+
+class MockPipeline:
+    """Queues commands and runs them against MockRedis on execute()"""
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *args):
+        self.commands = []
+    
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+    
+    async def execute(self):
+        results = []
+        for name, args, kwargs in self.commands:
+            results.append(await getattr(self.redis, name)(*args, **kwargs))
+        self.commands = []
+        return results
 
 # Create the mock Redis client
 mock_redis = MockRedis()
@@ -27,4 +113,4 @@ def mock_from_url(*args, **kwargs):
     return mock_redis
 
 # Store the original imports to restore them later if needed
-original_imports = {}
\ No newline at end of file
+original_imports = {}
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+import uuid
+import pytest
+import pytest_asyncio
+import httpx
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from app.config import settings
+from app.db import StakeAction, TaoDividendQuery
+from app.main import app
+from app.services.export_service import export_service
+
+@pytest_asyncio.fixture
+async def export_client(session_factory):
+    """ASGI client with the export service reading from an in-memory SQLite database."""
+    async with session_factory() as session:
+        for day, netuid in [(1, 18), (2, 18), (3, 19)]:
+            created_at = datetime(2024, 1, day, tzinfo=timezone.utc)
+            session.add(StakeAction(
+                action_type="stake", netuid=netuid, hotkey="a", amount=day,
+                sentiment_score=50, created_at=created_at,
+            ))
+            session.add(TaoDividendQuery(netuid=netuid, hotkey="a", dividend=day, created_at=created_at))
+        await session.commit()
+
+    transport = httpx.ASGITransport(app=app)
+    with patch.object(export_service, "session_factory", session_factory), \
+         patch.object(settings, "EXPORT_BATCH_SIZE", 2):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+
+@pytest.mark.asyncio
+async def test_export_stake_actions_ndjson_with_filters(export_client, auth_headers):
+    """Test that stake actions stream as NDJSON filtered by time range and netuid."""
+    response = await export_client.get(
+        "/api/v1/exports/stake_actions",
+        params={"netuid": 18, "start": "2024-01-02T00:00:00Z"},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 1
+    assert rows[0]["netuid"] == 18
+    assert rows[0]["amount"] == 2
+    assert rows[0]["created_at"].startswith("2024-01-02")
+
+@pytest.mark.asyncio
+async def test_export_tao_dividend_queries_csv(export_client, session_factory, auth_headers):
+    """Test that the query log streams as CSV in creation order, across several cursor batches."""
+    # A row migrated with a random uuid4 key still sorts by its creation time
+    async with session_factory() as session:
+        session.add(TaoDividendQuery(
+            id=uuid.UUID(int=uuid.uuid4().int | (0xF << 124)), netuid=18, hotkey="a", dividend=0,
+            created_at=datetime(2023, 12, 31, tzinfo=timezone.utc),
+        ))
+        await session.commit()
+
+    response = await export_client.get(
+        "/api/v1/exports/tao_dividend_queries",
+        params={"format": "csv", "end": "2024-01-04T00:00:00"},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    assert 'filename="tao_dividend_queries.csv"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [float(row["dividend"]) for row in rows] == [0.0, 1.0, 2.0, 3.0]
+    assert set(rows[0]) == {"id", "netuid", "hotkey", "dividend", "from_cache", "created_at"}
+
+@pytest.mark.asyncio
+async def test_export_rejects_bad_requests(export_client, auth_headers):
+    """Test export validation and authentication."""
+    response = await export_client.get(
+        "/api/v1/exports/stake_actions",
+        params={"start": "2024-01-02T00:00:00", "end": "2024-01-01T00:00:00"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
+
+    response = await export_client.get("/api/v1/exports/stake_actions", params={"format": "xml"}, headers=auth_headers)
+    assert response.status_code == 422
+
+    response = await export_client.get("/api/v1/exports/stake_actions")
+    assert response.status_code in (401, 403)
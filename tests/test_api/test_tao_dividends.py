@@ -1,7 +1,11 @@
 import pytest
+from datetime import datetime, timezone
 from unittest.mock import patch, AsyncMock, MagicMock
 
+from app.models import TaoDividendResponse
 from app.services.bittensor_service import bittensor_service
+from app.services.cache_service import RedisCache
+from tests.mock_redis import MockRedis
 
 @pytest.mark.asyncio
 async def test_get_tao_dividends(client, auth_headers, mock_tao_dividend_result):
@@ -21,4 +25,161 @@ async def test_get_tao_dividends(client, auth_headers, mock_tao_dividend_result)
         assert response.status_code == 200
         data = response.json()
         assert data["netuid"] == 18
-        assert data["dividend"] == 12345.67
\ No newline at end of file
+        assert data["dividend"] == 12345.67
+
+@pytest.mark.asyncio
+async def test_cache_hits_use_the_fast_path(client, auth_headers, mock_tao_dividend_result):
+    """Test that a cache hit skips the response model but returns the same fields."""
+    cached_result = {**mock_tao_dividend_result, "cached": True, "block": 100}
+    with patch.object(bittensor_service, "get_tao_dividends", AsyncMock(return_value=cached_result)), \
+         patch("app.api.tao_dividends.TaoDividendResponse") as response_model:
+        response = client.get("/api/v1/tao_dividends", headers=auth_headers)
+
+    assert response.status_code == 200
+    response_model.assert_not_called()
+    data = response.json()
+    assert set(data) == set(TaoDividendResponse.model_fields)
+    assert data["cached"] is True
+    assert data["dividend"] == 12345.67
+    assert data["block"] == 100
+
+@pytest.mark.asyncio
+async def test_get_tao_dividends_batch(client, auth_headers, test_db_session):
+    """Test the batch endpoint reports per-item results and bulk-inserts successes."""
+    batch_result = [
+        {"netuid": 18, "hotkey": "a", "dividend": 1.5, "cached": True},
+        {"netuid": 19, "hotkey": "b", "dividend": 12345.67, "cached": False, "error": "rpc down"},
+    ]
+    with patch.object(
+        bittensor_service, "get_tao_dividends_batch",
+        AsyncMock(return_value=batch_result)
+    ) as mock_batch:
+        response = client.post(
+            "/api/v1/tao_dividends/batch",
+            json={"items": [{"netuid": 18, "hotkey": "a"}, {"netuid": 19, "hotkey": "b"}]},
+            headers=auth_headers
+        )
+
+    assert response.status_code == 200
+    mock_batch.assert_awaited_once_with([(18, "a"), (19, "b")])
+    data = response.json()
+    assert data["succeeded"] == 1
+    assert data["failed"] == 1
+    assert data["results"][0]["dividend"] == 1.5
+    assert data["results"][1]["dividend"] is None
+    assert data["results"][1]["error"] == "rpc down"
+    test_db_session.add_all.assert_called_once()
+    assert len(test_db_session.add_all.call_args.args[0]) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_tao_dividends_batch_rejects_oversized_batch(client, auth_headers):
+    """Test the batch endpoint enforces BATCH_MAX_ITEMS."""
+    with patch("app.api.tao_dividends.settings.BATCH_MAX_ITEMS", 1):
+        response = client.post(
+            "/api/v1/tao_dividends/batch",
+            json={"items": [{"netuid": 1}, {"netuid": 2}]},
+            headers=auth_headers
+        )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_subnet_dividends(client, auth_headers):
+    """Test the subnet snapshot endpoint."""
+    snapshot = {
+        "netuid": 18,
+        "block_hash": "0xabc",
+        "dividends": {"a": 1.0, "b": 2.0},
+        "cached": True
+    }
+    with patch.object(
+        bittensor_service, "get_subnet_dividends",
+        AsyncMock(return_value=snapshot)
+    ):
+        response = client.get("/api/v1/tao_dividends/subnet?netuid=18", headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["block_hash"] == "0xabc"
+    assert data["dividends"] == {"a": 1.0, "b": 2.0}
+
+
+@pytest.mark.asyncio
+async def test_stats_reports_pool_metrics(client, auth_headers):
+    """Test the per-worker stats endpoint."""
+    response = client.get("/stats", headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert {"cache", "coalescing", "audit", "db_pool"} <= data.keys()
+    assert "checkout_wait_avg_ms" in data["db_pool"]
+    assert "saturation" in data["db_pool"]
+
+
+@pytest.mark.asyncio
+async def test_trade_triggers_are_debounced(client, auth_headers, mock_tao_dividend_result):
+    """Test that repeated trade triggers reuse the scheduled task."""
+    debounce_cache = RedisCache()
+    debounce_cache.redis = MockRedis()
+
+    with patch.object(
+        bittensor_service, "get_tao_dividends",
+        AsyncMock(return_value=mock_tao_dividend_result)
+    ), patch("app.api.tao_dividends.cache", debounce_cache), \
+         patch("app.api.tao_dividends.celery_app.send_task", MagicMock()) as mock_send:
+        first = client.get("/api/v1/tao_dividends?trade=true", headers=auth_headers).json()
+        second = client.get("/api/v1/tao_dividends?trade=true", headers=auth_headers).json()
+
+    mock_send.assert_called_once()
+    assert first["trade_status"] == "scheduled"
+    assert second["trade_status"] == "coalesced"
+    assert second["stake_task_id"] == first["stake_task_id"]
+    assert mock_send.call_args.kwargs["task_id"] == first["stake_task_id"]
+
+
+@pytest.mark.asyncio
+async def test_metrics_exposes_route_and_stage_latency(client, auth_headers, mock_tao_dividend_result):
+    """Test that /metrics reports latency per route template and per stage."""
+    with patch.object(
+        bittensor_service, "get_tao_dividends",
+        AsyncMock(return_value=mock_tao_dividend_result)
+    ), patch("app.api.tao_dividends.cache", RedisCache()), \
+         patch("app.api.tao_dividends.settings.TRADE_DEBOUNCE_WINDOW", 0), \
+         patch("app.api.tao_dividends.celery_app.send_task", MagicMock()):
+        client.get("/api/v1/tao_dividends?trade=true", headers=auth_headers)
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/tao_dividends",status="200"}' in body
+    assert 'stage_duration_seconds_count{stage="send_task"}' in body
+    assert "cache_hit_ratio" in body
+    assert "chain_queries_in_flight" in body
+
+
+@pytest.mark.asyncio
+async def test_get_tao_dividends_history(client, auth_headers):
+    """Test the history endpoint's defaults and range validation."""
+    point = {"timestamp": "2024-01-01T00:00:00", "min": 1.0, "max": 3.0, "avg": 2.0, "samples": 3}
+    with patch("app.api.tao_dividends.history_service.get_history", AsyncMock(return_value=[point])) as mock_history:
+        response = client.get(
+            "/api/v1/tao_dividends/history?start=2024-01-01T00:00:00&end=2024-01-02T00:00:00",
+            headers=auth_headers
+        )
+        invalid = client.get(
+            "/api/v1/tao_dividends/history?start=2024-01-02T00:00:00&end=2024-01-01T00:00:00",
+            headers=auth_headers
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["netuid"] == 18
+    assert data["interval"] == 180
+    assert data["points"][0]["avg"] == 2.0
+    assert mock_history.await_args.args[1:] == (
+        18, data["hotkey"], datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2024, 1, 2, tzinfo=timezone.utc), 180
+    )
+    assert invalid.status_code == 400
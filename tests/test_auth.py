@@ -0,0 +1,64 @@
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app import auth
+from app.auth import TokenRegistry, ApiToken
+from app.services.cache_service import RedisCache
+from tests.mock_redis import MockRedis
+
+def credentials(token):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+def test_registry_loads_tokens_and_quotas():
+    """Test API_TOKEN/API_TOKENS parsing and lookup."""
+    with patch.object(auth.settings, "API_TOKEN", "primary"), \
+         patch.object(auth.settings, "API_TOKENS", "alpha:5, beta, gamma:x:10"), \
+         patch.object(auth.settings, "RATE_LIMIT_DEFAULT", 100):
+        registry = TokenRegistry.from_settings()
+
+    assert registry.lookup("primary").quota == 100
+    assert registry.lookup("alpha").quota == 5
+    assert registry.lookup("beta").quota == 100
+    assert registry.lookup("gamma:x").quota == 10
+    assert registry.lookup("unknown") is None
+    # Tokens are identified by digest, never by their value
+    assert "alpha" not in registry.lookup("alpha").id
+
+@pytest.mark.asyncio
+async def test_verify_token_rejects_unknown_tokens():
+    """Test that unknown tokens get a 401."""
+    with patch.object(auth, "token_registry", TokenRegistry({"secret": 0})):
+        assert await auth.verify_token(credentials("secret")) == "secret"
+        with pytest.raises(HTTPException) as exc:
+            await auth.verify_token(credentials("wrong"))
+    assert exc.value.status_code == 401
+
+@pytest.mark.asyncio
+async def test_verify_token_enforces_quota():
+    """Test that a token is rejected with 429 once its quota is used up."""
+    limit_cache = RedisCache()
+    limit_cache.redis = MockRedis()
+    registry = TokenRegistry({"limited": 2, "unlimited": 0})
+
+    with patch.object(auth, "token_registry", registry), patch.object(auth, "cache", limit_cache):
+        await auth.verify_token(credentials("limited"))
+        await auth.verify_token(credentials("limited"))
+        with pytest.raises(HTTPException) as exc:
+            await auth.verify_token(credentials("limited"))
+        for _ in range(5):
+            await auth.verify_token(credentials("unlimited"))
+
+    assert exc.value.status_code == 429
+    assert int(exc.value.headers["Retry-After"]) >= 1
+
+@pytest.mark.asyncio
+async def test_rate_limit_fails_open():
+    """Test that a Redis failure lets the request through."""
+    broken_cache = RedisCache()
+    broken_cache.redis = MockRedis()
+    broken_cache.rate_limit = None  # Calling it raises TypeError
+
+    with patch.object(auth, "cache", broken_cache):
+        await auth.enforce_rate_limit(ApiToken("abc", 1))
@@ -0,0 +1,71 @@
+import pytest
+
+from benchmarks.harness import SCENARIOS, BenchmarkResult, run_scenario, compare, compare_timings, percentile
+from benchmarks.http_clients import run_sentiment, stub_server
+from benchmarks.inserts import SCHEMAS, run_inserts
+from app.services.cache_service import cache
+from app.services.bittensor_service import bittensor_service
+
+@pytest.mark.asyncio
+async def test_benchmark_harness_smoke():
+    """Test a short concurrent run against the local stand-ins."""
+    saved_redis = cache.redis
+    scenario = SCENARIOS["mixed"]
+    scenario = type(scenario)(**{**scenario.__dict__, "users": 5, "requests": 60, "keys": 20})
+
+    result = await run_scenario(scenario, chain_latency=0.001)
+
+    assert result.requests == 60
+    assert result.errors == 0
+    assert result.cache_hits + result.cache_misses == 60
+    assert 0 < result.chain_queries <= result.cache_misses
+    assert result.p50_ms <= result.p95_ms <= result.p99_ms
+    # The app's singletons are restored after the run
+    assert cache.redis is saved_redis
+    assert bittensor_service.async_subtensor is None
+
+def test_compare_flags_regressions():
+    """Test that regressions are reported against a stored baseline."""
+    baseline = {
+        "errors": 0, "chain_queries": 100, "cache_hits": 800, "cache_misses": 200,
+        "p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 30.0, "rps": 500.0,
+    }
+    result = BenchmarkResult(
+        scenario="mixed", users=20, requests=1000, errors=0, duration_s=2.0, rps=480.0,
+        p50_ms=11.0, p95_ms=45.0, p99_ms=31.0, mean_ms=12.0,
+        cache_hits=600, cache_misses=400, chain_queries=300,
+    )
+
+    regressions = compare(result, baseline)
+    timing_regressions = compare_timings(result, baseline, tolerance=0.5)
+
+    assert any(r.startswith("chain_queries") for r in regressions)
+    assert any(r.startswith("hit_ratio") for r in regressions)
+    # Timings are only checked when asked for
+    assert not any(r.startswith(("p50_ms", "p95_ms", "p99_ms", "rps")) for r in regressions)
+    assert [r.split()[0] for r in timing_regressions] == ["p95_ms"]
+
+def test_percentile():
+    assert percentile([5, 1, 3, 2, 4], 50) == 3
+    assert percentile(list(range(1, 101)), 99) == 99
+    assert percentile([], 95) == 0.0
+
+@pytest.mark.asyncio
+async def test_insert_benchmark_smoke():
+    """Test that the insert benchmark runs for every key layout."""
+    for schema in SCHEMAS.values():
+        result = await run_inserts(schema, rows=250, batch_size=100)
+
+        assert result.rows == 250
+        assert result.rows_per_s > 0
+
+@pytest.mark.asyncio
+async def test_http_client_benchmark_smoke():
+    """Test that pooled clients reuse connections to the stub server."""
+    with stub_server() as base_url:
+        per_call = await run_sentiment(base_url, runs=3, pooled=False)
+        pooled = await run_sentiment(base_url, runs=3, pooled=True)
+
+    assert per_call.requests == pooled.requests == 6
+    assert per_call.connections_opened == 6
+    assert pooled.connections_opened == 2
@@ -0,0 +1,48 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import db
+from app.config import settings
+
+@pytest.mark.asyncio
+async def test_pool_stats_time_checkout_waits():
+    """Test that a checkout blocked on a full pool is timed and saturation reported."""
+    engine = create_async_engine(
+        "sqlite+aiosqlite://", poolclass=db.InstrumentedAsyncQueuePool, pool_size=1, max_overflow=0
+    )
+    metrics = db.PoolMetrics()
+
+    async def hold(seconds):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await asyncio.sleep(seconds)
+
+    try:
+        with patch.object(db, "pool_metrics", metrics), \
+             patch.object(db, "engine", engine), \
+             patch.object(settings, "DB_MAX_OVERFLOW", 0):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                busy = db.get_pool_stats()
+            await asyncio.gather(hold(0.1), hold(0))
+            idle = db.get_pool_stats()
+    finally:
+        await engine.dispose()
+
+    assert (busy["checked_out"], busy["saturation"]) == (1, 1.0)
+    assert (idle["checked_out"], idle["saturation"]) == (0, 0.0)
+    assert metrics.checkout_waits == 3
+    assert metrics.checkout_wait_max >= 0.05
+
+def test_as_utc_normalizes_timestamps():
+    """Test that naive timestamps are taken as UTC and aware ones converted."""
+    plus_two = timezone(timedelta(hours=2))
+
+    assert db.as_utc(None) is None
+    assert db.as_utc(datetime(2024, 1, 1, 12)) == datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+    assert db.as_utc(datetime(2024, 1, 1, 12, tzinfo=plus_two)).hour == 10
+    assert db.as_utc(datetime(2024, 1, 1, 12, tzinfo=plus_two)).tzinfo is timezone.utc
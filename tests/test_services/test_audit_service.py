@@ -0,0 +1,64 @@
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from app.db import TaoDividendQuery
+from app.services.audit_service import AuditService
+
+def make_session_factory(sessions):
+    """Build an async_session stand-in that records each session it opens."""
+    def factory():
+        session = MagicMock()
+        session.commit = AsyncMock()
+        sessions.append(session)
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(return_value=session)
+        context.__aexit__ = AsyncMock(return_value=False)
+        return context
+    return factory
+
+@pytest.mark.asyncio
+async def test_record_batches_rows_and_drains_on_stop():
+    """Test that queued rows are inserted in batches and flushed on shutdown."""
+    service = AuditService()
+    service.batch_size = 3
+    service.flush_interval = 60
+    sessions = []
+
+    with patch("app.services.audit_service.async_session", make_session_factory(sessions)):
+        service.start()
+        rows = [TaoDividendQuery(netuid=18, hotkey="hk", dividend=float(i)) for i in range(5)]
+        await service.record(AsyncMock(), rows)
+        await service.stop()
+
+    flushed = [len(session.add_all.call_args.args[0]) for session in sessions]
+    assert flushed == [3, 2]
+    assert service.get_stats()["flushed"] == 5
+    assert service.get_stats()["queue_depth"] == 0
+
+@pytest.mark.asyncio
+async def test_record_drops_rows_when_queue_stays_full():
+    """Test backpressure: rows beyond the bounded queue are dropped after the timeout."""
+    service = AuditService()
+    service.enqueue_timeout = 0.01
+
+    with patch("app.services.audit_service.settings.AUDIT_QUEUE_MAX_SIZE", 1), \
+         patch.object(AuditService, "_run", AsyncMock()):
+        service.start()
+        rows = [TaoDividendQuery(netuid=18, hotkey="hk", dividend=1.0) for _ in range(3)]
+        await service.record(AsyncMock(), rows)
+
+    assert service.get_stats()["enqueued"] == 1
+    assert service.get_stats()["dropped"] == 2
+
+@pytest.mark.asyncio
+async def test_record_writes_directly_when_not_started():
+    """Test the fallback path used when write-behind is disabled."""
+    service = AuditService()
+    db = MagicMock()
+    db.commit = AsyncMock()
+    rows = [TaoDividendQuery(netuid=18, hotkey="hk", dividend=1.0)]
+
+    await service.record(db, rows)
+
+    db.add_all.assert_called_once_with(rows)
+    db.commit.assert_awaited_once()
@@ -1,7 +1,12 @@
+import asyncio
 import pytest
 from unittest.mock import patch, AsyncMock, MagicMock
 
 from app.services.bittensor_service import BittensorService
+from app.services.cache_service import RedisCache
+from app.services.block_tracker import BlockTracker, MockBlockSource, SubtensorBlockSource
+from app.services.circuit_breaker import ChainUnavailableError, OPEN
+from tests.mock_redis import MockRedis
 from app.config import settings
 
 @pytest.mark.asyncio
@@ -36,4 +41,272 @@ async def test_get_tao_dividends_custom_params():
             assert result["netuid"] == custom_netuid
             assert result["hotkey"] == custom_hotkey
             assert result["dividend"] == 9876.54
-            assert result["cached"] is False
\ No newline at end of file
+            assert result["cached"] is False
+
+@pytest.mark.asyncio
+async def test_get_tao_dividends_coalesces_concurrent_misses(mock_redis):
+    """Test that concurrent cache misses share a single chain query."""
+    service = BittensorService()
+
+    async def slow_query(netuid, hotkey):
+        await asyncio.sleep(0.05)
+        return 42.0
+
+    service.async_subtensor = MagicMock()
+    service.async_subtensor.query_tao_dividends_per_subnet = AsyncMock(side_effect=slow_query)
+
+    with patch("app.services.bittensor_service.BITTENSOR_AVAILABLE", True), \
+         patch("app.services.bittensor_service.cache", mock_redis), \
+         patch.object(service, "init_subtensor", AsyncMock()):
+        results = await asyncio.gather(
+            *[service.get_tao_dividends(18, "hotkey") for _ in range(10)]
+        )
+
+    service.async_subtensor.query_tao_dividends_per_subnet.assert_awaited_once_with(18, "hotkey")
+    assert all(result["dividend"] == 42.0 for result in results)
+    assert service.get_coalescing_stats()["coalesced_local"] == 9
+    assert service.get_coalescing_stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_get_tao_dividends_waits_for_remote_refresh(mock_redis):
+    """Test that a worker losing the refresh lock serves the peer's result."""
+    service = BittensorService()
+    service.async_subtensor = MagicMock()
+    service.async_subtensor.query_tao_dividends_per_subnet = AsyncMock(return_value=1.0)
+
+    peer_result = {"netuid": 18, "hotkey": "hotkey", "dividend": 7.5, "cached": False}
+    mock_redis.acquire_lock = AsyncMock(return_value=None)
+    mock_redis.wait_for = AsyncMock(return_value=peer_result)
+
+    with patch("app.services.bittensor_service.BITTENSOR_AVAILABLE", True), \
+         patch("app.services.bittensor_service.cache", mock_redis), \
+         patch.object(settings, "SINGLE_FLIGHT_DISTRIBUTED", True):
+        result = await service.get_tao_dividends(18, "hotkey")
+
+    service.async_subtensor.query_tao_dividends_per_subnet.assert_not_awaited()
+    assert result["dividend"] == 7.5
+    assert result["cached"] is True
+    assert service.get_coalescing_stats()["coalesced_remote"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_tao_dividends_serves_stale_and_refreshes(mock_redis):
+    """Test that a stale entry is returned immediately and refreshed in the background."""
+    service = BittensorService()
+    service.async_subtensor = MagicMock()
+    service.async_subtensor.query_tao_dividends_per_subnet = AsyncMock(return_value=2.0)
+
+    stale = {"netuid": 18, "hotkey": "hotkey", "dividend": 1.0, "cached": False}
+    mock_redis.get_with_ttl = AsyncMock(return_value=(stale, -5))
+    mock_redis.set = AsyncMock(return_value=True)
+
+    with patch("app.services.bittensor_service.BITTENSOR_AVAILABLE", True), \
+         patch("app.services.bittensor_service.cache", mock_redis), \
+         patch.object(service, "init_subtensor", AsyncMock()):
+        result = await service.get_tao_dividends(18, "hotkey")
+        assert result["dividend"] == 1.0
+        assert result["cached"] is True
+
+        await asyncio.gather(*service._inflight.values())
+
+    service.async_subtensor.query_tao_dividends_per_subnet.assert_awaited_once_with(18, "hotkey")
+    assert mock_redis.set.await_args.args[1]["dividend"] == 2.0
+
+
+@pytest.mark.asyncio
+async def test_refresh_hot_keys_refreshes_most_requested_pairs(mock_redis):
+    """Test that the refresher warms only the top-N pairs close to expiry."""
+    service = BittensorService()
+    service._request_counts.update({(18, "hot"): 10, (18, "warm"): 5, (18, "cold"): 1})
+    mock_redis.get_with_ttl = AsyncMock(return_value=(None, 0))
+
+    with patch("app.services.bittensor_service.cache", mock_redis), \
+         patch.object(settings, "REFRESH_TOP_N", 2), \
+         patch.object(service, "_fetch_tao_dividends", AsyncMock(return_value={})) as mock_fetch:
+        refreshed = await service.refresh_hot_keys()
+
+    assert refreshed == 2
+    refreshed_hotkeys = {call.args[1] for call in mock_fetch.await_args_list}
+    assert refreshed_hotkeys == {"hot", "warm"}
+
+
+def test_request_counts_are_skipped_when_disabled_and_bounded():
+    """Test that requests are only counted for the refresher, up to a fixed number of pairs."""
+    service = BittensorService()
+    with patch.object(settings, "REFRESH_TOP_N", 0):
+        service._count_request(18, "a")
+    assert not service._request_counts
+
+    with patch.object(settings, "REFRESH_TOP_N", 1), \
+         patch("app.services.bittensor_service.REQUEST_COUNTS_MAX_SIZE", 10):
+        for _ in range(3):
+            service._count_request(18, "hot")
+        for i in range(50):
+            service._count_request(18, f"one-off-{i}")
+
+    assert len(service._request_counts) <= 10
+    assert service._request_counts.most_common(1)[0][0] == (18, "hot")
+
+
+@pytest.mark.asyncio
+async def test_get_tao_dividends_batch_uses_one_mget_and_queries_misses():
+    """Test that the batch resolves hits with one MGET and fans out only the misses."""
+    service = BittensorService()
+    cache = RedisCache()
+    cache.redis = MockRedis()
+    cache.redis.mget = AsyncMock(wraps=cache.redis.mget)
+    await cache.set(cache.get_dividend_key(18, "hit"), {"netuid": 18, "hotkey": "hit", "dividend": 1.0, "cached": False})
+
+    service.async_subtensor = MagicMock()
+    service.async_subtensor.query_tao_dividends_per_subnet = AsyncMock(return_value=2.0)
+
+    with patch("app.services.bittensor_service.BITTENSOR_AVAILABLE", True), \
+         patch("app.services.bittensor_service.cache", cache), \
+         patch.object(service, "init_subtensor", AsyncMock()):
+        results = await service.get_tao_dividends_batch([(18, "hit"), (18, "miss"), (18, "hit")])
+
+    cache.redis.mget.assert_awaited_once()
+    service.async_subtensor.query_tao_dividends_per_subnet.assert_awaited_once_with(18, "miss")
+    assert [result["dividend"] for result in results] == [1.0, 2.0, 1.0]
+    assert [result["cached"] for result in results] == [True, False, True]
+
+
+class MockQueryMapResult:
+    """Async iterator standing in for AsyncSubtensor.query_map results."""
+    def __init__(self, entries):
+        self.entries = list(entries)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.entries:
+            raise StopAsyncIteration
+        return self.entries.pop(0)
+
+
+@pytest.mark.asyncio
+async def test_get_subnet_dividends_reads_whole_map_once():
+    """Test that a subnet snapshot costs one map query and is then served from cache."""
+    service = BittensorService()
+    cache = RedisCache()
+    cache.redis = MockRedis()
+
+    service.async_subtensor = MagicMock()
+    service.async_subtensor.get_block_hash = AsyncMock(return_value="0xabc")
+    service.async_subtensor.query_map = AsyncMock(
+        return_value=MockQueryMapResult([("hk1", 1.0), ("hk2", MagicMock(value=2.0))])
+    )
+
+    with patch("app.services.bittensor_service.BITTENSOR_AVAILABLE", True), \
+         patch("app.services.bittensor_service.cache", cache), \
+         patch.object(service, "init_subtensor", AsyncMock()):
+        first = await service.get_subnet_dividends(18)
+        second = await service.get_subnet_dividends(18)
+
+    service.async_subtensor.query_map.assert_awaited_once()
+    assert service.async_subtensor.query_map.await_args.kwargs["block_hash"] == "0xabc"
+    assert first["dividends"] == {"hk1": 1.0, "hk2": 2.0}
+    assert first["cached"] is False
+    assert second["dividends"] == first["dividends"]
+    assert second["cached"] is True
+
+
+@pytest.mark.asyncio
+async def test_block_aware_cache_invalidates_on_new_block():
+    """Test that cached dividends are reused within a block and refetched after it."""
+    service = BittensorService()
+    service.block_tracker = BlockTracker(MockBlockSource(block=100), poll_interval=0)
+    cache = RedisCache()
+    cache.redis = MockRedis()
+
+    service.async_subtensor = MagicMock()
+    service.async_subtensor.query_tao_dividends_per_subnet = AsyncMock(side_effect=[1.0, 2.0])
+
+    with patch("app.services.bittensor_service.BITTENSOR_AVAILABLE", True), \
+         patch("app.services.bittensor_service.cache", cache), \
+         patch.object(settings, "CACHE_BLOCK_AWARE", True), \
+         patch.object(service, "init_subtensor", AsyncMock()):
+        first = await service.get_tao_dividends(18, "hotkey")
+        second = await service.get_tao_dividends(18, "hotkey")
+        service.block_tracker.source.advance()
+        third = await service.get_tao_dividends(18, "hotkey")
+
+    assert (first["block"], first["cached"]) == (100, False)
+    assert (second["block"], second["cached"]) == (100, True)
+    assert (third["block"], third["dividend"], third["cached"]) == (101, 2.0, False)
+    service.async_subtensor.query_tao_dividends_per_subnet.assert_awaited_with(18, "hotkey", block=101)
+
+
+@pytest.mark.asyncio
+async def test_block_read_failure_serves_cache_hits():
+    """Test that cache hits are still served when the chain head cannot be read."""
+    service = BittensorService()
+    service.block_tracker = BlockTracker(MockBlockSource(block=100), poll_interval=0)
+    service.block_tracker.source.get_current_block = AsyncMock(side_effect=ConnectionError("rpc down"))
+    cache = RedisCache()
+    cache.redis = MockRedis()
+
+    service.async_subtensor = MagicMock()
+    service.async_subtensor.query_tao_dividends_per_subnet = AsyncMock(return_value=1.0)
+
+    with patch("app.services.bittensor_service.BITTENSOR_AVAILABLE", True), \
+         patch("app.services.bittensor_service.cache", cache), \
+         patch.object(settings, "CACHE_BLOCK_AWARE", True), \
+         patch.object(service, "init_subtensor", AsyncMock()):
+        first = await service.get_tao_dividends(18, "hotkey")
+        second = await service.get_tao_dividends(18, "hotkey")
+
+    assert (first["block"], first["cached"]) == (None, False)
+    assert (second["dividend"], second["cached"]) == (1.0, True)
+    service.async_subtensor.query_tao_dividends_per_subnet.assert_awaited_once_with(18, "hotkey")
+
+
+@pytest.mark.asyncio
+async def test_block_reads_go_through_the_breaker_and_pool():
+    """Test that the chain head is read through the guarded, pooled read path."""
+    service = BittensorService()
+    service.block_tracker = BlockTracker(SubtensorBlockSource(service._guarded_chain_read), poll_interval=0)
+    subtensor = MagicMock()
+    subtensor.get_current_block = AsyncMock(return_value=100)
+
+    async def chain_read(fn):
+        return await fn(subtensor)
+    service._chain_read = AsyncMock(side_effect=chain_read)
+
+    with patch.object(settings, "CACHE_BLOCK_AWARE", True):
+        assert await service._current_block() == 100
+        service.breaker.state = OPEN
+        service.breaker.opened_at = float("inf")
+        assert await service._current_block() == 100
+
+    service._chain_read.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_chain_failure_serves_last_known_good():
+    """Test that a failed chain read serves the last value read from the chain."""
+    service = BittensorService()
+    fallback_cache = RedisCache()
+    fallback_cache.redis = MockRedis()
+    service.async_subtensor = MagicMock()
+    service.async_subtensor.query_tao_dividends_per_subnet = AsyncMock(
+        side_effect=[42.0, ConnectionError("rpc down"), ConnectionError("rpc down")]
+    )
+
+    with patch("app.services.bittensor_service.BITTENSOR_AVAILABLE", True), \
+         patch("app.services.bittensor_service.cache", fallback_cache), \
+         patch("app.services.bittensor_service.settings.CHAIN_FALLBACK", "last_known_good"), \
+         patch.object(service, "init_subtensor", AsyncMock()):
+        fresh = await service.get_tao_dividends(18, "hk")
+        await fallback_cache.delete(fallback_cache.get_dividend_key(18, "hk"))
+        fallback = await service.get_tao_dividends(18, "hk")
+
+        with pytest.raises(ChainUnavailableError):
+            await service.get_tao_dividends(19, "hk")
+
+    assert fresh["dividend"] == 42.0
+    assert fallback["dividend"] == 42.0
+    assert fallback["stale"] is True
+    assert fallback["cached"] is True
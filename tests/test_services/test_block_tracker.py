@@ -0,0 +1,40 @@
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from app.config import settings
+from app.services.block_tracker import BlockTracker, MockBlockSource
+
+@pytest.mark.asyncio
+async def test_block_tracker_polls_lazily():
+    """Test that the tracker re-reads the source only once its reading is old."""
+    source = MockBlockSource(block=100)
+    tracker = BlockTracker(source, poll_interval=60)
+
+    assert await tracker.get_block() == 100
+    source.advance()
+    assert await tracker.get_block() == 100
+
+    tracker.poll_interval = 0
+    assert await tracker.get_block() == 101
+
+@pytest.mark.asyncio
+async def test_block_tracker_keeps_last_block_when_poll_fails():
+    """Test that a failed poll returns the last known block and backs off."""
+    source = MockBlockSource(block=100)
+    tracker = BlockTracker(source, poll_interval=0)
+    assert await tracker.get_block() == 100
+
+    source.get_current_block = AsyncMock(side_effect=ConnectionError("rpc down"))
+    assert await tracker.get_block() == 100
+
+    tracker.poll_interval = 60
+    assert await tracker.get_block() == 100
+    assert source.get_current_block.await_count == 1
+
+def test_block_tracker_versions_by_update_interval():
+    """Test that blocks in the same dividend period share a version."""
+    tracker = BlockTracker(MockBlockSource())
+
+    with patch.object(settings, "DIVIDEND_UPDATE_INTERVAL_BLOCKS", 360):
+        assert tracker.get_version(359) == tracker.get_version(0)
+        assert tracker.get_version(360) == tracker.get_version(0) + 1
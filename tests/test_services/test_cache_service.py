@@ -1,6 +1,10 @@
+import json
 import pytest
 from unittest.mock import AsyncMock
 
+from app.services.cache_service import RedisCache, LRUCache, INVALIDATION_CHANNEL, Serializer, get_serializer
+from tests.mock_redis import MockRedis
+
 @pytest.mark.asyncio
 async def test_cache_get_set(mock_redis):
     """Test setting and getting cache values."""
@@ -33,3 +37,91 @@ async def test_dividend_key_generation(mock_redis):
     assert key == expected_key
 
 
+@pytest.mark.asyncio
+async def test_l1_cache_serves_hot_keys_without_redis():
+    """Test that the L1 tier serves repeat reads and tracks per-tier hits."""
+    cache = RedisCache()
+    cache.redis = MockRedis()
+    cache.l1 = LRUCache(max_size=2, ttl=60)
+
+    await cache.redis.set("key", json.dumps({"dividend": 1.0}), ex=30)
+
+    assert await cache.get("key") == {"dividend": 1.0}
+    cache.redis.get = AsyncMock(side_effect=AssertionError("L1 should serve this"))
+    assert await cache.get("key") == {"dividend": 1.0}
+
+    stats = cache.get_stats()
+    assert stats["l1_hits"] == 1
+    assert stats["l1_misses"] == 1
+    assert stats["l2_hits"] == 1
+
+@pytest.mark.asyncio
+async def test_l1_cache_invalidation_is_published_on_set():
+    """Test that writes publish an invalidation tagged with this worker's id."""
+    cache = RedisCache()
+    cache.redis = MockRedis()
+    cache.l1 = LRUCache(max_size=2, ttl=60)
+
+    await cache.set("key", {"dividend": 2.0})
+
+    cache.redis.get = AsyncMock(side_effect=AssertionError("L1 should serve this"))
+    assert await cache.get("key") == {"dividend": 2.0}
+    assert cache.redis.published == [(INVALIDATION_CHANNEL, f"{cache.instance_id}:key")]
+
+def test_lru_cache_evicts_least_recently_used_and_expired():
+    """Test LRU eviction and TTL capping."""
+    lru = LRUCache(max_size=2, ttl=60)
+    lru.set("a", {"v": 1})
+    lru.set("b", {"v": 2})
+    lru.get("a")
+    lru.set("c", {"v": 3})
+
+    assert lru.get("b") is None
+    assert lru.get("a") == {"v": 1}
+
+    lru.set("d", {"v": 4}, ttl=0)
+    assert lru.get("d") is None
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_served_until_hard_ttl():
+    """Test soft/hard TTL semantics."""
+    cache = RedisCache()
+    cache.redis = MockRedis()
+    cache.ttl = 0
+    cache.stale_ttl = 60
+
+    await cache.set("key", {"dividend": 3.0})
+
+    value, soft_ttl = await cache.get_with_ttl("key")
+    assert value == {"dividend": 3.0}
+    assert soft_ttl <= 0
+    assert await cache.get("key") is None
+
+@pytest.mark.asyncio
+async def test_cache_serializer_round_trips_bytes_and_reads_json_entries():
+    """Test that entries are stored as bytes and entries in another format read as misses."""
+    cache = RedisCache()
+    cache.redis = MockRedis()
+    cache.l1 = None
+    cache.serializer = get_serializer("orjson")
+
+    await cache.set("key", {"dividend": 1.5, "netuid": 18})
+    # Entries written by the stdlib json serializer stay readable
+    await cache.redis.set("legacy", Serializer().dumps({"dividend": 2.5}), ex=30)
+    await cache.redis.set("garbage", b"\x93\x01", ex=30)
+
+    assert isinstance(cache.redis.data["key"], bytes)
+    assert await cache.get("key") == {"dividend": 1.5, "netuid": 18}
+    assert await cache.get("legacy") == {"dividend": 2.5}
+    assert await cache.get("garbage") is None
+    assert cache.get_stats()["l2_misses"] == 1
+
+@pytest.mark.asyncio
+async def test_claim_returns_existing_value_as_text():
+    """Test that claim decodes the existing value from a bytes-mode client."""
+    cache = RedisCache()
+    cache.redis = MockRedis()
+    await cache.redis.set("trade", b"task-1", ex=30)
+
+    assert await cache.claim("trade", "task-2", 30) == "task-1"
+
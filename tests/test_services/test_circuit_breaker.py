@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN
+
+async def fail():
+    raise ConnectionError("rpc down")
+
+async def succeed():
+    return "ok"
+
+@pytest.mark.asyncio
+async def test_breaker_opens_and_recovers_through_probe():
+    """Test open -> half-open -> closed transitions."""
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=30)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            await breaker.call(fail)
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(succeed)
+    assert breaker.stats["rejected"] == 1
+
+    # Once the recovery timeout has passed, one probe is let through
+    breaker.opened_at -= 30
+    assert await breaker.call(succeed) == "ok"
+    assert breaker.state == CLOSED
+    assert breaker.consecutive_failures == 0
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens_breaker():
+    """Test that a failing half-open probe opens the breaker again."""
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=30)
+    with pytest.raises(ConnectionError):
+        await breaker.call(fail)
+
+    breaker.opened_at -= 30
+    with pytest.raises(ConnectionError):
+        await breaker.call(fail)
+
+    assert breaker.state == OPEN
+    assert breaker.stats["opened"] == 2
+
+@pytest.mark.asyncio
+async def test_half_open_allows_a_single_probe():
+    """Test that concurrent calls during a probe are rejected."""
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0)
+    with pytest.raises(ConnectionError):
+        await breaker.call(fail)
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    results = await asyncio.gather(breaker.call(slow), breaker.call(slow), return_exceptions=True)
+
+    assert results[0] == "ok"
+    assert isinstance(results[1], CircuitOpenError)
+
+@pytest.mark.asyncio
+async def test_adaptive_timeout_follows_latency():
+    """Test that the timeout tracks recent latency within its bounds."""
+    breaker = CircuitBreaker("test", min_timeout=0.01, max_timeout=5, timeout_multiplier=3)
+    assert breaker.current_timeout() == 5
+
+    breaker.latencies.extend([0.01] * 50)
+    assert breaker.current_timeout() == pytest.approx(0.03)
+
+    async def hang():
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await breaker.call(hang)
+    assert breaker.stats["timeouts"] == 1
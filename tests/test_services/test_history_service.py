@@ -0,0 +1,59 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy import select
+
+from app.db import TaoDividendHistory
+from app.services.history_service import HistoryService
+
+def snapshot(netuid, block, dividends):
+    return {"netuid": netuid, "block": block, "block_hash": None, "dividends": dividends, "cached": False}
+
+@pytest.mark.asyncio
+async def test_collect_samples_every_hotkey_once_per_block(session_factory):
+    """Test that a sample stores one row per hotkey and skips repeated blocks."""
+    service = MagicMock()
+    service.get_subnet_dividends = AsyncMock(side_effect=[
+        snapshot(18, 100, {"a": 1.0, "b": 2.0}),
+        snapshot(18, 100, {"a": 1.0, "b": 2.0}),
+    ])
+    history = HistoryService(session_factory=session_factory, service=service)
+
+    first = await history.collect([18])
+    second = await history.collect([18])
+
+    assert first == {"success": True, "rows": 2, "skipped": 0, "errors": 0}
+    assert second["skipped"] == 1
+    async with session_factory() as session:
+        rows = list((await session.execute(select(TaoDividendHistory))).scalars())
+    assert sorted((row.hotkey, row.dividend, row.block) for row in rows) == [("a", 1.0, 100), ("b", 2.0, 100)]
+
+@pytest.mark.asyncio
+async def test_get_history_downsamples_in_sql(session_factory):
+    """Test min/max/avg aggregation per bucket within the requested range."""
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    async with session_factory() as session:
+        session.add_all([
+            TaoDividendHistory(netuid=18, hotkey="a", sampled_at=base + timedelta(minutes=minute), dividend=value)
+            for minute, value in [(0, 1.0), (20, 3.0), (40, 2.0), (60, 10.0), (130, 99.0)]
+        ])
+        session.add(TaoDividendHistory(netuid=18, hotkey="b", sampled_at=base, dividend=50.0))
+        await session.commit()
+
+        points = await HistoryService().get_history(
+            session, 18, "a", base, base + timedelta(hours=2), interval=3600
+        )
+
+    assert points == [
+        {"timestamp": base, "min": 1.0, "max": 3.0, "avg": 2.0, "samples": 3},
+        {"timestamp": base + timedelta(hours=1), "min": 10.0, "max": 10.0, "avg": 10.0, "samples": 1},
+    ]
+
+def test_pick_interval_fits_max_points():
+    """Test automatic bucket sizing."""
+    history = HistoryService()
+    start = datetime(2024, 1, 1)
+
+    assert history.pick_interval(start, start + timedelta(hours=1)) == 60
+    assert history.pick_interval(start, start + timedelta(days=90)) % 60 == 0
+    assert timedelta(days=90).total_seconds() / history.pick_interval(start, start + timedelta(days=90)) <= 500
@@ -0,0 +1,98 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from sqlalchemy import event, select
+
+from app.config import settings
+from app.db import TaoDividendQuery, TaoDividendQueryRollup
+from app.services.retention_service import RetentionService
+
+NOW = datetime(2024, 1, 10, 12, 30, tzinfo=timezone.utc)
+
+async def add_queries(session_factory, *queries):
+    async with session_factory() as session:
+        for created_at, netuid, hotkey, dividend, from_cache in queries:
+            session.add(TaoDividendQuery(
+                netuid=netuid, hotkey=hotkey, dividend=dividend, from_cache=from_cache, created_at=created_at
+            ))
+        await session.commit()
+
+async def load(session_factory, model):
+    async with session_factory() as session:
+        return list((await session.execute(select(model))).scalars())
+
+@pytest.mark.asyncio
+async def test_rollup_aggregates_completed_hours_once(session_factory):
+    """Test that completed hours are rolled up per pair and cache flag, and only once."""
+    hour = datetime(2024, 1, 10, 10, tzinfo=timezone.utc)
+    await add_queries(
+        session_factory,
+        (hour + timedelta(minutes=1), 18, "a", 1.0, False),
+        (hour + timedelta(minutes=2), 18, "a", 3.0, False),
+        (hour + timedelta(minutes=3), 18, "a", 3.0, True),
+        (hour + timedelta(hours=1, minutes=5), 18, "a", 5.0, False),
+        # The current hour is not complete yet
+        (NOW, 18, "a", 7.0, False),
+    )
+    retention = RetentionService(session_factory=session_factory)
+
+    first = await retention.rollup(NOW)
+    second = await retention.rollup(NOW)
+
+    rollups = sorted(await load(session_factory, TaoDividendQueryRollup), key=lambda r: (r.hour, r.from_cache))
+    assert first == {"hours": 2, "rollup_rows": 3}
+    assert second == {"hours": 0, "rollup_rows": 0}
+    assert [(r.hour.hour, r.from_cache, r.queries) for r in rollups] == [(10, False, 2), (10, True, 1), (11, False, 1)]
+    assert (rollups[0].min_dividend, rollups[0].max_dividend, rollups[0].avg_dividend) == (1.0, 3.0, 2.0)
+
+@pytest.mark.asyncio
+async def test_rollup_skips_hours_without_queries(session_factory):
+    """Test that a long gap in traffic costs one lookup, not one INSERT per empty hour."""
+    await add_queries(
+        session_factory,
+        (NOW - timedelta(days=30), 18, "a", 1.0, False),
+        (NOW - timedelta(hours=2), 18, "a", 2.0, False),
+    )
+    inserts = []
+    engine = session_factory.kw["bind"].sync_engine
+
+    def listener(conn, cursor, statement, *args):
+        if statement.startswith("INSERT"):
+            inserts.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    retention = RetentionService(session_factory=session_factory)
+    try:
+        first = await retention.rollup(NOW)
+        second = await retention.rollup(NOW + timedelta(days=30))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert first == {"hours": 2, "rollup_rows": 2}
+    assert second == {"hours": 0, "rollup_rows": 0}
+    # Each run ends on one empty hour, then finds nothing further to roll up
+    assert len(inserts) == 5
+
+@pytest.mark.asyncio
+async def test_prune_deletes_expired_rolled_up_rows_in_batches(session_factory):
+    """Test that expired rows are deleted in bounded batches after being rolled up."""
+    old = NOW - timedelta(days=settings.RETENTION_DAYS + 1)
+    await add_queries(session_factory, *[(old + timedelta(seconds=i), 1, "a", 1.0, False) for i in range(5)])
+    await add_queries(session_factory, (NOW - timedelta(hours=2), 1, "a", 2.0, False))
+    retention = RetentionService(session_factory=session_factory)
+
+    # Nothing has been rolled up yet, so nothing may be deleted
+    assert (await retention.prune(NOW))["deleted"] == 0
+
+    with patch.object(settings, "RETENTION_BATCH_SIZE", 2), patch.object(settings, "RETENTION_MAX_BATCHES", 2):
+        result = await retention.run(NOW)
+        assert result["deleted"] == 4
+        assert result["backlog"] is True
+        result = await retention.run(NOW)
+
+    assert result["deleted"] == 1
+    assert result["backlog"] is False
+    remaining = await load(session_factory, TaoDividendQuery)
+    assert [row.dividend for row in remaining] == [2.0]
+    rollups = await load(session_factory, TaoDividendQueryRollup)
+    assert sum(r.queries for r in rollups) == 6
@@ -1,8 +1,20 @@
+import asyncio
+import httpx
 import pytest
 from unittest.mock import patch, AsyncMock
 
 from app.services.sentiment_service import SentimentService
+from app.services.cache_service import RedisCache
 from app.models import SentimentAnalysisResult
+from tests.mock_redis import MockRedis
+
+@pytest.fixture(autouse=True)
+def sentiment_cache():
+    """Back the sentiment cache with an in-memory Redis."""
+    cache = RedisCache()
+    cache.redis = MockRedis()
+    with patch("app.services.sentiment_service.cache", cache):
+        yield cache
 
 @pytest.mark.asyncio
 async def test_search_tweets():
@@ -56,4 +68,200 @@ async def test_analyze_sentiment():
         # Skip specific assertions on the score
         assert isinstance(result, SentimentAnalysisResult)
         # We could add this assertion if we want to test against the exact score:
-        # assert result.score == 75.0
\ No newline at end of file
+        # assert result.score == 75.0
+
+@pytest.mark.asyncio
+async def test_clients_are_reused_across_calls():
+    """Test that each upstream gets one pooled client reused across requests."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.url.path == "/twitter/search":
+            return httpx.Response(200, json={"data": [{"id": "1", "text": "Bittensor"}]})
+        return httpx.Response(200, json={"output": "42"})
+
+    service = SentimentService(transport=httpx.MockTransport(handler))
+
+    await service.search_tweets("Bittensor netuid 18")
+    datura_client = service._get_client("datura")
+    await service.search_tweets("Bittensor netuid 19")
+    result = await service.get_subnet_sentiment(18)
+
+    assert service._get_client("datura") is datura_client
+    assert set(service._clients) == {"datura", "chutes"}
+    assert result.score == 42
+    assert requests[0].headers["Authorization"] == f"Bearer {service.datura_api_key}"
+    assert service.get_http_stats()["datura"]["requests"] == 3
+
+    await service.close()
+    assert service._clients == {}
+
+
+def test_client_replaced_on_loop_change_is_closed():
+    """Test that a client left behind by an old event loop is closed, not leaked."""
+    service = SentimentService(transport=make_transport([]))
+
+    async def get_client():
+        return service._get_client("datura")
+
+    old_loop = asyncio.new_event_loop()
+    try:
+        stale = old_loop.run_until_complete(get_client())
+        # The old loop is still open, so the stale client is closed there
+        fresh = asyncio.run(get_client())
+        assert fresh is not stale and not stale.is_closed
+        old_loop.run_until_complete(asyncio.sleep(0))
+        assert stale.is_closed
+    finally:
+        old_loop.close()
+
+    async def replace_and_settle():
+        client = service._get_client("datura")
+        await asyncio.sleep(0)
+        return client
+
+    # Once its loop is closed, the stale client is closed on the new one
+    assert not fresh.is_closed
+    asyncio.run(replace_and_settle())
+    assert fresh.is_closed
+
+
+def make_transport(requests, output="42"):
+    """Build a mock transport answering Datura searches and Chutes runs."""
+    def handler(request):
+        requests.append(request.url.path)
+        if request.url.path == "/twitter/search":
+            return httpx.Response(200, json={"data": [{"id": "1", "text": "Bittensor"}]})
+        return httpx.Response(200, json={"output": output})
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_subnet_sentiment_is_cached_per_netuid():
+    """Test that repeated sentiment lookups for a netuid reuse the cached result."""
+    requests = []
+    service = SentimentService(transport=make_transport(requests))
+
+    first = await service.get_subnet_sentiment(18)
+    second = await service.get_subnet_sentiment(18)
+
+    assert first == second
+    assert requests == ["/twitter/search", "/v1/app/chute/20acffc0-0c5f-58e3-97af-21fc0b261ec4/run"]
+
+
+@pytest.mark.asyncio
+async def test_identical_tweet_sets_share_one_inference():
+    """Test that the LLM is called once per distinct tweet set, even concurrently."""
+    requests = []
+    service = SentimentService(transport=make_transport(requests))
+    tweets = [{"id": "1", "text": "Bittensor"}, {"id": "2", "text": "TAO"}]
+
+    results = await asyncio.gather(*[service.analyze_sentiment(tweets) for _ in range(3)])
+    await service.analyze_sentiment(list(reversed(tweets)))
+
+    assert all(result.score == 42 for result in results)
+    assert service.llm_stats["inferences"] == 1
+    assert service.llm_stats["deduplicated"] == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_sentiment_is_not_cached(sentiment_cache):
+    """Test that LLM errors return a neutral score without poisoning the cache."""
+    def handler(request):
+        if request.url.path == "/twitter/search":
+            return httpx.Response(200, json={"data": [{"id": "1", "text": "Bittensor"}]})
+        return httpx.Response(503)
+
+    service = SentimentService(transport=httpx.MockTransport(handler))
+
+    result = await service.get_subnet_sentiment(18)
+
+    assert result.score == 0
+    assert await sentiment_cache.get(sentiment_cache.get_sentiment_key(18)) is None
+
+
+def test_sentiment_ttl_overrides():
+    """Test per-netuid TTL overrides."""
+    service = SentimentService()
+
+    with patch("app.services.sentiment_service.settings.SENTIMENT_CACHE_TTL_OVERRIDES", "18:60, 19:600, 21:1m, 22:0"), \
+         patch("app.services.sentiment_service.settings.SENTIMENT_CACHE_TTL", 300):
+        assert service._sentiment_ttl(18) == 60
+        assert service._sentiment_ttl(19) == 600
+        assert service._sentiment_ttl(20) == 300
+        # Malformed overrides fall back to the default instead of raising
+        assert service._sentiment_ttl(21) == 300
+        assert service._sentiment_ttl(22) == 300
+
+
+@pytest.mark.asyncio
+async def test_bulk_sentiment_uses_one_inference():
+    """Test that several subnets are scored in a single LLM call."""
+    requests = []
+    output = 'Scores: {"1": 40, "2": -150, "3": 10}'
+    service = SentimentService(transport=make_transport(requests, output=output))
+    tweets_by_netuid = {
+        1: [{"id": "1", "text": "Great subnet"}],
+        2: [{"id": "2", "text": "Terrible subnet"}],
+        3: [{"id": "3", "text": "Fine subnet"}],
+    }
+
+    results = await service.analyze_sentiment_bulk(tweets_by_netuid)
+
+    assert len(requests) == 1
+    assert service.llm_stats["bulk_inferences"] == 1
+    assert results[1].score == 40
+    assert results[2].score == -100
+    assert results[3].score == 10
+
+    # The same tweet sets are served from the LLM cache afterwards
+    await service.analyze_sentiment_bulk(tweets_by_netuid)
+    assert len(requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_sentiment_falls_back_per_subnet():
+    """Test that subnets missing from the bulk output are scored one by one."""
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.path)
+        if b"### Subnet" in request.content:
+            return httpx.Response(200, json={"output": '{"1": 25}'})
+        return httpx.Response(200, json={"output": "-30"})
+
+    service = SentimentService(transport=httpx.MockTransport(handler))
+
+    results = await service.analyze_sentiment_bulk({
+        1: [{"id": "1", "text": "Great subnet"}],
+        2: [{"id": "2", "text": "Quiet subnet"}],
+    })
+
+    assert results[1].score == 25
+    assert results[2].score == -30
+    assert len(requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_subnets_sentiment_reads_cache_first(sentiment_cache):
+    """Test that only uncached subnets are searched and analyzed."""
+    requests = []
+    service = SentimentService(transport=make_transport(requests, output='{"2": 15}'))
+    cached = SentimentAnalysisResult(score=50, tweets_analyzed=3, summary="cached")
+    await sentiment_cache.set(sentiment_cache.get_sentiment_key(1), cached.model_dump())
+
+    results = await service.get_subnets_sentiment([1, 2])
+
+    assert results[1].score == 50
+    assert results[2].score == 15
+    assert requests == ["/twitter/search", "/v1/app/chute/20acffc0-0c5f-58e3-97af-21fc0b261ec4/run"]
+    assert await sentiment_cache.get(sentiment_cache.get_sentiment_key(2)) is not None
+
+
+def test_truncate_to_budget():
+    """Test that bulk prompts respect the per-subnet token budget."""
+    service = SentimentService()
+
+    assert service._truncate_to_budget(["a" * 8, "b" * 8], 2) == "a" * 8
+    assert service._truncate_to_budget(["a" * 20], 2) == "a" * 8
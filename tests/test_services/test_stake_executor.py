@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from datetime import timedelta
+from unittest.mock import patch, AsyncMock, MagicMock
+from sqlalchemy import select
+
+from app.config import settings
+from app.db import StakeAction, utcnow
+from app.services.bittensor_service import BittensorService
+from app.services.stake_executor import StakeExecutor
+
+async def add_actions(session_factory, *actions):
+    async with session_factory() as session:
+        for action_type, netuid, hotkey, amount in actions:
+            session.add(StakeAction(
+                action_type=action_type,
+                netuid=netuid,
+                hotkey=hotkey,
+                amount=amount,
+                sentiment_score=0
+            ))
+        await session.commit()
+
+async def load_actions(session_factory):
+    async with session_factory() as session:
+        return list((await session.execute(select(StakeAction))).scalars())
+
+@pytest.mark.asyncio
+async def test_execute_pending_nets_actions_into_one_batch(session_factory):
+    """Test that opposite actions net out and the rest share one transaction."""
+    await add_actions(
+        session_factory,
+        ("stake", 18, "a", 0.5),
+        ("unstake", 18, "a", 0.2),
+        ("stake", 18, "b", 0.3),
+        ("unstake", 18, "b", 0.3),
+        ("unstake", 19, "c", 0.1),
+    )
+    service = MagicMock()
+    service.submit_stake_batch = AsyncMock(return_value={"success": True, "transaction_hash": "0xbatch"})
+
+    result = await StakeExecutor(session_factory, service).execute_pending()
+
+    operations = service.submit_stake_batch.await_args.args[0]
+    assert sorted((op["action"], op["netuid"], op["hotkey"], round(op["amount"], 9)) for op in operations) == [
+        ("stake", 18, "a", 0.3),
+        ("unstake", 19, "c", 0.1),
+    ]
+    assert result["actions"] == 5
+    assert result["operations"] == 2
+
+    statuses = {(action.hotkey, action.status, action.transaction_hash) for action in await load_actions(session_factory)}
+    assert statuses == {("a", "success", "0xbatch"), ("b", "netted", None), ("c", "success", "0xbatch")}
+
+@pytest.mark.asyncio
+async def test_execute_pending_marks_actions_failed_on_submit_error(session_factory):
+    """Test that a failed batch fails every contributing action."""
+    await add_actions(session_factory, ("stake", 18, "a", 0.5))
+    service = MagicMock()
+    service.submit_stake_batch = AsyncMock(side_effect=Exception("rpc down"))
+
+    result = await StakeExecutor(session_factory, service).execute_pending()
+
+    assert result["success"] is False
+    assert [action.status for action in await load_actions(session_factory)] == ["failed"]
+    assert (await StakeExecutor(session_factory, service).execute_pending())["actions"] == 0
+
+@pytest.mark.asyncio
+async def test_stale_processing_actions_are_flagged_not_resubmitted(session_factory):
+    """Test that actions stuck in processing past the claim timeout are marked unreconciled."""
+    now = utcnow()
+    async with session_factory() as session:
+        session.add(StakeAction(action_type="stake", netuid=18, hotkey="stuck", amount=1, sentiment_score=0,
+                                status="processing", claimed_at=now - timedelta(hours=1)))
+        session.add(StakeAction(action_type="stake", netuid=18, hotkey="busy", amount=1, sentiment_score=0,
+                                status="processing", claimed_at=now))
+        await session.commit()
+    service = MagicMock()
+    service.submit_stake_batch = AsyncMock()
+
+    with patch.object(settings, "STAKE_CLAIM_TIMEOUT", 600):
+        result = await StakeExecutor(session_factory, service).execute_pending()
+
+    assert result["actions"] == 0
+    service.submit_stake_batch.assert_not_awaited()
+    statuses = {action.hotkey: action.status for action in await load_actions(session_factory)}
+    assert statuses == {"stuck": "unreconciled", "busy": "processing"}
+
+@pytest.mark.asyncio
+async def test_submit_stake_batch_uses_utility_batch_all():
+    """Test that several operations are composed into one signed batch extrinsic."""
+    service = BittensorService()
+    substrate = MagicMock()
+    substrate.compose_call = AsyncMock(side_effect=lambda **kwargs: kwargs)
+    substrate.create_signed_extrinsic = AsyncMock(return_value="signed")
+    response = MagicMock(extrinsic_hash="0xabc")
+    response.is_success = AsyncMock(return_value=True)()
+    substrate.submit_extrinsic = AsyncMock(return_value=response)
+    service.async_subtensor = MagicMock(substrate=substrate)
+    service.wallet = MagicMock()
+
+    with patch("app.services.bittensor_service.BITTENSOR_AVAILABLE", True):
+        result = await service.submit_stake_batch([
+            {"action": "stake", "amount": 0.3, "netuid": 18, "hotkey": "a"},
+            {"action": "unstake", "amount": 0.1, "netuid": 19, "hotkey": "c"},
+        ])
+
+    batch_call = substrate.create_signed_extrinsic.await_args.kwargs["call"]
+    assert batch_call["call_module"] == "Utility"
+    assert [call["call_function"] for call in batch_call["call_params"]["calls"]] == ["add_stake", "remove_stake"]
+    assert batch_call["call_params"]["calls"][1]["call_params"]["amount_unstaked"] == 100000000
+    substrate.submit_extrinsic.assert_awaited_once()
+    assert result["transaction_hash"] == "0xabc"
+
+@pytest.mark.asyncio
+async def test_stake_action_ids_are_time_ordered(session_factory):
+    """Test that new stake actions get UUIDv7 keys that sort in creation order."""
+    for amount in range(5):
+        await add_actions(session_factory, ("stake", 1, "hotkey", amount + 1))
+        await asyncio.sleep(0.002)
+
+    actions = sorted(await load_actions(session_factory), key=lambda action: action.id)
+
+    assert all(action.id.version == 7 for action in actions)
+    assert [action.amount for action in actions] == [1, 2, 3, 4, 5]
+    assert all(action.created_at is not None for action in actions)
@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from app.services.bittensor_service import BittensorService
+from app.services.cache_service import RedisCache
+from app.services.subtensor_pool import SubtensorPool
+from tests.mock_redis import MockRedis
+
+class FakeSubtensor:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.calls = 0
+        self.fail = False
+        self.closed = False
+
+    async def query_tao_dividends_per_subnet(self, netuid, hotkey, block=None):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise ConnectionError("socket closed")
+        return 1.0
+
+    async def get_current_block(self):
+        if self.fail:
+            raise ConnectionError("socket closed")
+        return 100
+
+    async def close(self):
+        self.closed = True
+
+def make_pool(endpoints, size):
+    opened = []
+
+    async def connect(endpoint):
+        subtensor = FakeSubtensor(endpoint)
+        opened.append(subtensor)
+        return subtensor
+
+    return SubtensorPool(endpoints, size, connect, probe_interval=0), opened
+
+@pytest.mark.asyncio
+async def test_pool_spreads_concurrent_reads():
+    """Test least-outstanding routing across connections and endpoints."""
+    pool, opened = make_pool(["ws://a", "ws://b"], 4)
+    await pool.connect()
+
+    await asyncio.gather(*[
+        pool.run(lambda s: s.query_tao_dividends_per_subnet(1, "hk")) for _ in range(8)
+    ])
+
+    assert [s.calls for s in opened] == [2, 2, 2, 2]
+    assert [conn.endpoint for conn in pool.connections] == ["ws://a", "ws://b", "ws://a", "ws://b"]
+    assert all(stats["healthy"] for stats in pool.get_stats())
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_failed_connection_is_dropped_and_reconnected():
+    """Test that a failing connection is avoided until the probe reconnects it."""
+    pool, opened = make_pool(["ws://a"], 2)
+    await pool.connect()
+    opened[0].fail = True
+
+    with pytest.raises(ConnectionError):
+        await pool.run(lambda s: s.query_tao_dividends_per_subnet(1, "hk"))
+
+    assert opened[0].closed
+    assert not pool.connections[0].healthy
+    # Reads go to the remaining healthy connection
+    await pool.run(lambda s: s.query_tao_dividends_per_subnet(1, "hk"))
+    assert opened[1].calls == 1
+
+    await pool.probe()
+    assert pool.connections[0].healthy
+    assert pool.connections[0].stats["connects"] == 2
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_service_routes_reads_through_pool():
+    """Test that dividend queries use the pool when it is configured."""
+    service = BittensorService()
+    pool, opened = make_pool(["ws://a", "ws://b"], 2)
+    service.pool = pool
+    pool_cache = RedisCache()
+    pool_cache.redis = MockRedis()
+
+    with patch("app.services.bittensor_service.BITTENSOR_AVAILABLE", True), \
+         patch("app.services.bittensor_service.cache", pool_cache), \
+         patch("app.services.bittensor_service.settings.SUBTENSOR_POOL_SIZE", 2), \
+         patch.object(service, "init_subtensor", AsyncMock()) as mock_init:
+        await pool.connect()
+        await asyncio.gather(*[service.get_tao_dividends(18, f"hk{i}") for i in range(4)])
+
+    mock_init.assert_not_awaited()
+    assert sum(s.calls for s in opened) == 4
+    assert all(s.calls for s in opened)
+    await service.close()
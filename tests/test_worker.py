@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock
+from sqlalchemy import select
+
+from app import worker
+from app.db import StakeAction
+from app.models import SentimentAnalysisResult
+from app.services.stake_executor import StakeExecutor
+
+async def current_loop():
+    return asyncio.get_running_loop()
+
+def test_tasks_share_the_worker_process_loop():
+    """Test that tasks reuse one event loop and connections open/close once."""
+    with patch.object(worker, "open_connections", AsyncMock()) as mock_open, \
+         patch.object(worker, "close_connections", AsyncMock()) as mock_close:
+        worker.init_worker_loop()
+        try:
+            first = worker.run_async(current_loop())
+            second = worker.run_async(current_loop())
+        finally:
+            worker.close_worker_loop()
+
+    assert first is second
+    assert first.is_closed()
+    assert worker.worker_loop is None
+    mock_open.assert_awaited_once()
+    mock_close.assert_awaited_once()
+
+def test_run_async_without_worker_loop_closes_connections():
+    """Test the per-task loop fallback closes loop-bound clients after each task."""
+    with patch.object(worker, "close_connections", AsyncMock()) as mock_close:
+        first = worker.run_async(current_loop())
+        second = worker.run_async(current_loop())
+
+    assert first is not second
+    assert mock_close.await_count == 2
+
+def test_parse_sweep_targets():
+    """Test sweep target parsing, defaults and deduplication."""
+    with patch.object(worker.settings, "DEFAULT_HOTKEY", "hk-default"), \
+         patch.object(worker.settings, "DEFAULT_NETUID", 18):
+        assert worker.parse_sweep_targets("1:hk1, 2, 1:hk1, x:hk") == [(1, "hk1"), (2, "hk-default")]
+        assert worker.parse_sweep_targets("") == [(18, "hk-default")]
+
+@pytest.mark.asyncio
+async def test_sweep_enqueues_actions_in_chunks(session_factory):
+    """Test that a sweep scores each subnet once and records one action per target."""
+    sentiments = {
+        1: SentimentAnalysisResult(score=50, tweets_analyzed=5, summary=""),
+        2: SentimentAnalysisResult(score=-20, tweets_analyzed=5, summary=""),
+        3: SentimentAnalysisResult(score=0, tweets_analyzed=0, summary=""),
+    }
+    targets = [(1, "hk1"), (1, "hk2"), (2, "hk1"), (3, "hk1")]
+
+    with patch.object(worker, "async_session", session_factory), \
+         patch.object(worker.sentiment_service, "get_subnets_sentiment", AsyncMock(return_value=sentiments)) as mock_sentiment, \
+         patch.object(worker.stake_executor, "execute_pending", AsyncMock()) as mock_execute, \
+         patch.object(worker.settings, "STAKE_BATCHING", True), \
+         patch.object(worker.settings, "SWEEP_CHUNK_SIZE", 2):
+        result = await worker.run_sweep(targets)
+
+    mock_sentiment.assert_awaited_once_with([1, 2, 3])
+    mock_execute.assert_not_awaited()
+    assert result["actions"] == 3
+    assert set(result["stages"]) == {"sentiment_ms", "enqueue_ms"}
+
+    async with session_factory() as session:
+        actions = list((await session.execute(select(StakeAction))).scalars())
+    assert sorted((a.netuid, a.hotkey, a.action_type) for a in actions) == [
+        (1, "hk1", "stake"), (1, "hk2", "stake"), (2, "hk1", "unstake")
+    ]
+    assert all(action.status == "pending" for action in actions)
+
+
+@pytest.mark.asyncio
+async def test_sweep_executes_only_its_own_actions(session_factory):
+    """Test that a non-batching sweep leaves actions owned by other tasks alone."""
+    sentiments = {1: SentimentAnalysisResult(score=50, tweets_analyzed=5, summary="")}
+    service = AsyncMock()
+    service.submit_stake_batch = AsyncMock(return_value={"transaction_hash": "0xsweep"})
+    async with session_factory() as session:
+        # Rows of a concurrent process_sentiment_and_stake (executing itself) and a batched trade
+        session.add(StakeAction(action_type="stake", netuid=1, hotkey="other", amount=1, sentiment_score=50, status="processing"))
+        session.add(StakeAction(action_type="stake", netuid=1, hotkey="queued", amount=1, sentiment_score=50, status="pending"))
+        await session.commit()
+
+    executor = StakeExecutor(session_factory=session_factory, service=service)
+    with patch.object(worker, "async_session", session_factory), \
+         patch.object(worker, "stake_executor", executor), \
+         patch.object(worker.sentiment_service, "get_subnets_sentiment", AsyncMock(return_value=sentiments)), \
+         patch.object(worker.settings, "STAKE_BATCHING", False):
+        result = await worker.run_sweep([(1, "hk1")])
+
+    assert result["success"] is True
+    assert result["execution"]["actions"] == 1
+    operations = service.submit_stake_batch.await_args.args[0]
+    assert [operation["hotkey"] for operation in operations] == ["hk1"]
+    async with session_factory() as session:
+        statuses = {a.hotkey: a.status for a in (await session.execute(select(StakeAction))).scalars()}
+    assert statuses == {"hk1": "success", "other": "processing", "queued": "pending"}